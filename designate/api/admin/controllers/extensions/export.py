@@ -16,6 +16,7 @@ import pecan
 from oslo_log import log as logging
 
 from designate.api.v2.controllers import rest
+from designate.api.v2.controllers.zones.tasks import exports
 from designate import utils
 from designate import policy
 
@@ -30,6 +31,5 @@ class ExportController(rest.RestController):
         context = pecan.request.environ['context']
         policy.check('zone_export', context)
 
-        zones = self.central_api.export_zone(context, zone_id)
-
-        return zones
+        return exports.stream_zone_export(
+            self.central_api, context, zone_id)
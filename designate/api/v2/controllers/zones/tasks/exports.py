@@ -14,15 +14,73 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import pecan
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from designate import exceptions
+from designate import export_store
 from designate import policy
 from designate import utils
 from designate.api.v2.controllers import rest
 from designate.objects.adapters import DesignateAdapter
 
 LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+
+def stream_zone_export(central_api, context, zone_id):
+    """
+    Respond with the zone file of a zone, streamed from central a chunk of
+    `zone_export_chunk_size` records at a time.
+    """
+    limit = CONF['service:api'].zone_export_chunk_size
+
+    # The first chunk is fetched before the response starts, so that errors
+    # are still reported with their status code.
+    chunk = central_api.export_zone_chunk(context, zone_id, limit=limit)
+
+    def app_iter(chunk):
+        while True:
+            yield chunk['data'].encode('utf-8')
+            if chunk['marker'] is None:
+                return
+            chunk = central_api.export_zone_chunk(
+                context, zone_id, marker=chunk['marker'], limit=limit)
+
+    response = pecan.response
+    response.content_type = 'text/dns'
+    response.app_iter = app_iter(chunk)
+    return response
+
+
+def serve_stored_export(location):
+    """Respond with a zone export from the export store, or a range of it"""
+    store = export_store.get_export_store(
+        export_store.get_location_driver(location))
+    size = store.get_size(location)
+
+    request = pecan.request
+    response = pecan.response
+    response.content_type = 'text/dns'
+    if location.endswith('.gz'):
+        response.content_encoding = 'gzip'
+    response.accept_ranges = 'bytes'
+
+    start, stop = 0, size
+    if request.range is not None:
+        content_range = request.range.content_range(size)
+        if content_range is None:
+            response.status_int = 416
+            response.content_range = 'bytes */%d' % size
+            return response
+
+        start, stop = content_range.start, content_range.stop
+        response.status_int = 206
+        response.content_range = content_range
+
+    response.content_length = stop - start
+    response.app_iter = store.read(location, start, stop)
+    return response
 
 
 class ZoneExportController(rest.RestController):
@@ -37,8 +95,10 @@ class ZoneExportController(rest.RestController):
         export = self.central_api.get_zone_export(context, export_id)
 
         if export.location and export.location.startswith('designate://'):
-            return self.central_api.\
-                export_zone(context, export['zone_id'])
+            return stream_zone_export(
+                self.central_api, context, export['zone_id'])
+        elif export.location and export.status == 'COMPLETE':
+            return serve_stored_export(export.location)
         else:
             msg = 'Zone can not be exported synchronously'
             raise exceptions.BadRequest(msg)
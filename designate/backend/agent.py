@@ -40,6 +40,7 @@ from designate.backend import base
 from designate import exceptions
 from designate.mdns import rpcapi as mdns_api
 from designate.utils import DEFAULT_AGENT_PORT
+from designate.worker import utils as worker_utils
 import designate.backend.private_codes as pcodes
 
 dns_query = eventlet.import_patched('dns.query')
@@ -176,6 +177,9 @@ class AgentPoolBackend(base.Backend):
             if not CONF['service:mdns'].all_tcp:
                 response = dns_query.udp(
                     dns_message, dest_ip, port=dest_port, timeout=timeout)
+            elif CONF['service:worker'].tcp_pool_size:
+                response = worker_utils.get_tcp_pool().query(
+                    dns_message, dest_ip, port=dest_port, timeout=timeout)
             else:
                 response = dns_query.tcp(
                     dns_message, dest_ip, port=dest_port, timeout=timeout)
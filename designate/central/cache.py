@@ -0,0 +1,174 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import re
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from designate.metrics import metrics
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+# Marks the node of a trie where a TLD ends
+_TLD_END = None
+
+# Patterns with back references can't be combined with other patterns, as
+# the group numbers they refer to would change.
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+# Nor can patterns with global inline flags, e.g. (?i), which would apply to
+# every pattern in the combined regex. Python only rejects them after the
+# start of a regex from 3.11, earlier versions just warn.
+_GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+class TldTrie(object):
+    """The TLDs, as a trie of their labels starting from the right"""
+
+    def __init__(self, names):
+        self._root = {}
+        self._size = 0
+
+        for name in names:
+            node = self._root
+            for label in reversed(name.strip('.').lower().split('.')):
+                node = node.setdefault(label, {})
+            if _TLD_END not in node:
+                node[_TLD_END] = True
+                self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def match(self, zone_name):
+        """
+        Match a zone name against the TLDs
+
+        :returns: A tuple of whether the zone name is in one of the TLDs, and
+                  whether it is a TLD itself.
+        """
+        node = self._root
+        in_tld = False
+
+        for label in reversed(zone_name.strip('.').lower().split('.')):
+            node = node.get(label)
+            if node is None:
+                return in_tld, False
+            in_tld = in_tld or _TLD_END in node
+
+        return in_tld, _TLD_END in node
+
+
+class BlacklistMatcher(object):
+    """
+    The blacklist patterns, compiled into as few regexes as possible.
+
+    Patterns are combined into a single alternation, except for those that
+    can't be, which are kept as regexes of their own.
+    """
+
+    def __init__(self, patterns):
+        self.regexes = []
+
+        combined = []
+        for pattern in patterns:
+            # Invalid patterns raise here, as they did when searched
+            regex = re.compile(pattern)
+            if (_BACKREFERENCE.search(pattern) or
+                    _GLOBAL_FLAGS.search(pattern)):
+                self.regexes.append((regex, 1))
+            else:
+                combined.append(pattern)
+
+        if len(combined) > 1:
+            try:
+                self.regexes.insert(0, (re.compile('|'.join(
+                    '(?:%s)' % pattern for pattern in combined)),
+                    len(combined)))
+                return
+            except re.error:
+                # Fall back to searching the patterns one at a time
+                pass
+
+        self.regexes[0:0] = [(re.compile(pattern), 1)
+                             for pattern in combined]
+
+    def __len__(self):
+        return sum(count for _, count in self.regexes)
+
+
+class ZoneNameCache(object):
+    """
+    Per process cache of the TLDs and blacklists new zone names are checked
+    against.
+
+    Each is loaded from storage when first needed, and kept until central
+    changes it or for at most `zone_name_cache_ttl` seconds, which bounds how
+    long changes made by other central processes take to apply. A load that
+    overlaps a change is used, but not kept.
+    """
+
+    def __init__(self, storage, ttl=None):
+        self.storage = storage
+        if ttl is None:
+            ttl = CONF['service:central'].zone_name_cache_ttl
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._versions = collections.Counter()
+
+    def get_tlds(self, context):
+        return self._get(context, 'tlds', self._load_tlds)
+
+    def get_blacklists(self, context):
+        return self._get(context, 'blacklists', self._load_blacklists)
+
+    def invalidate(self, kind):
+        with self._lock:
+            self._versions[kind] += 1
+            self._entries.pop(kind, None)
+
+        metrics.counter('central.zone_name_cache.invalidate').increment()
+
+    def _get(self, context, kind, load):
+        with self._lock:
+            entry = self._entries.get(kind)
+            version = self._versions[kind]
+
+        now = time.time()
+        if entry is not None and now - entry[1] < self.ttl:
+            metrics.counter('central.zone_name_cache.hit').increment()
+            return entry[0]
+
+        metrics.counter('central.zone_name_cache.miss').increment()
+
+        # Right after a change, replicas may not have caught up with it yet
+        with self.storage.primary_reads():
+            value = load(context)
+
+        with self._lock:
+            if self._versions[kind] == version:
+                self._entries[kind] = (value, now)
+
+        return value
+
+    def _load_tlds(self, context):
+        return TldTrie(tld.name for tld in self.storage.find_tlds(context))
+
+    def _load_blacklists(self, context):
+        return BlacklistMatcher(
+            blacklist.pattern
+            for blacklist in self.storage.find_blacklists(context))
@@ -62,8 +62,12 @@ class CentralAPI(object):
         6.0 - Renamed domains to zones
         6.1 - Add ServiceStatus methods
         6.2 - Changed 'find_recordsets' method args
+        6.3 - Add zone journal purging task
+        6.4 - Add update_statuses
+        6.5 - Changed 'find_zones' method args
+        6.6 - Add export_zone_chunk
     """
-    RPC_API_VERSION = '6.2'
+    RPC_API_VERSION = '6.6'
 
     # This allows us to mark some methods as not logged.
     # This can be for a few reasons - some methods my not actually call over
@@ -76,7 +80,7 @@ class CentralAPI(object):
 
         target = messaging.Target(topic=self.topic,
                                   version=self.RPC_API_VERSION)
-        self.client = rpc.get_client(target, version_cap='6.2')
+        self.client = rpc.get_client(target, version_cap='6.6')
 
     @classmethod
     def get_instance(cls):
@@ -153,10 +157,10 @@ class CentralAPI(object):
                                 zone_id=zone_id)
 
     def find_zones(self, context, criterion=None, marker=None, limit=None,
-                   sort_key=None, sort_dir=None):
+                   sort_key=None, sort_dir=None, count=True):
         return self.client.call(context, 'find_zones', criterion=criterion,
                                 marker=marker, limit=limit, sort_key=sort_key,
-                                sort_dir=sort_dir)
+                                sort_dir=sort_dir, count=count)
 
     def find_zone(self, context, criterion=None):
         return self.client.call(context, 'find_zone', criterion=criterion)
@@ -172,6 +176,10 @@ class CentralAPI(object):
         return self.client.call(context, 'purge_zones',
                                 criterion=criterion, limit=limit)
 
+    def purge_zone_journal(self, context, criterion):
+        return self.client.call(context, 'purge_zone_journal',
+                                criterion=criterion)
+
     def count_zones(self, context, criterion=None):
         return self.client.call(context, 'count_zones', criterion=criterion)
 
@@ -219,6 +227,10 @@ class CentralAPI(object):
     def export_zone(self, context, zone_id):
         return self.client.call(context, 'export_zone', zone_id=zone_id)
 
+    def export_zone_chunk(self, context, zone_id, marker=None, limit=None):
+        return self.client.call(context, 'export_zone_chunk',
+                                zone_id=zone_id, marker=marker, limit=limit)
+
     def update_recordset(self, context, recordset, increment_serial=True):
         return self.client.call(context, 'update_recordset',
                                 recordset=recordset,
@@ -356,6 +368,9 @@ class CentralAPI(object):
         self.client.cast(context, 'update_status', zone_id=zone_id,
                          status=status, serial=serial)
 
+    def update_statuses(self, context, updates):
+        self.client.cast(context, 'update_statuses', updates=updates)
+
     # Zone Ownership Transfers
     def create_zone_transfer_request(self, context, zone_transfer_request):
         return self.client.call(
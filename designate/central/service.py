@@ -14,8 +14,8 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
-import re
 import collections
+import contextlib
 import copy
 import functools
 import threading
@@ -27,6 +27,7 @@ from random import SystemRandom
 import time
 
 import six
+import eventlet
 from eventlet import tpool
 from dns import zone as dnszone
 from dns import exception as dnsexception
@@ -38,6 +39,7 @@ from designate import context as dcontext
 from designate import coordination
 from designate import exceptions
 from designate import dnsutils
+from designate import export_store
 from designate import network_api
 from designate import notifications
 from designate import objects
@@ -48,6 +50,7 @@ from designate import service
 from designate import scheduler
 from designate import storage
 from designate import utils
+from designate.central import cache
 from designate.mdns import rpcapi as mdns_rpcapi
 from designate.storage import transaction
 from designate.storage import transaction_shallow_copy
@@ -132,6 +135,43 @@ def synchronized_zone(zone_arg=1, new_zone=False):
     return outer
 
 
+def replica_reads(f):
+    """
+    Let a read only RPC method be answered from the read replica.
+
+    Calls made by other central methods keep reading from the primary
+    database, as those may be about to write what they read.
+    """
+    @functools.wraps(f)
+    def replica_wrapper(self, *args, **kwargs):
+        # expected_exceptions counts the central methods in progress
+        if getattr(rpc.EXPECTED_EXCEPTION, 'depth', 0) > 1:
+            return f(self, *args, **kwargs)
+
+        with self.storage.replica_reads():
+            return f(self, *args, **kwargs)
+
+    return replica_wrapper
+
+
+def invalidate_zone_name_cache(kind):
+    """Drops the cached TLDs or blacklists once a change to them is done
+
+    Used outside of the transaction making the change, so reloading them
+    can't miss it.
+    """
+    def outer(f):
+        @functools.wraps(f)
+        def invalidate_wrapper(self, *args, **kwargs):
+            try:
+                return f(self, *args, **kwargs)
+            finally:
+                self.zone_name_cache.invalidate(kind)
+        return invalidate_wrapper
+
+    return outer
+
+
 def notification(notification_type):
     def outer(f):
         @functools.wraps(f)
@@ -185,7 +225,7 @@ def notification(notification_type):
 
 
 class Service(service.RPCService):
-    RPC_API_VERSION = '6.2'
+    RPC_API_VERSION = '6.6'
 
     target = messaging.Target(version=RPC_API_VERSION)
 
@@ -193,6 +233,7 @@ class Service(service.RPCService):
         self._scheduler = None
         self._storage = None
         self._quota = None
+        self._zone_name_cache = None
 
         super(Service, self).__init__(
             self.service_name, cfg.CONF['service:central'].topic,
@@ -227,6 +268,12 @@ class Service(service.RPCService):
             self._storage = storage.get_storage(storage_driver)
         return self._storage
 
+    @property
+    def zone_name_cache(self):
+        if not self._zone_name_cache:
+            self._zone_name_cache = cache.ZoneNameCache(self.storage)
+        return self._zone_name_cache
+
     @property
     def service_name(self):
         return 'central'
@@ -272,31 +319,20 @@ class Service(service.RPCService):
             raise exceptions.InvalidZoneName('More than one label is '
                                              'required')
 
-        tlds = self.storage.find_tlds(context)
+        tlds = self.zone_name_cache.get_tlds(context)
         if tlds:
             LOG.debug("Checking if %s has a valid TLD", zone_name)
-            allowed = False
-            for i in range(-len(zone_labels), 0):
-                last_i_labels = zone_labels[i:]
-                LOG.debug("Checking %s against the TLD list", last_i_labels)
-                if ".".join(last_i_labels) in tlds:
-                    allowed = True
-                    break
-            if not allowed:
+            in_tld, is_tld = tlds.match(zone_name)
+            if not in_tld:
                 raise exceptions.InvalidZoneName('Invalid TLD')
 
             # Now check that the zone name is not the same as a TLD
-            try:
-                stripped_zone_name = zone_name.rstrip('.').lower()
-                self.storage.find_tld(
-                    context,
-                    {'name': stripped_zone_name})
-            except exceptions.TldNotFound:
-                LOG.debug("%s has a valid TLD", zone_name)
-            else:
+            if is_tld:
                 raise exceptions.InvalidZoneName(
                     'Zone name cannot be the same as a TLD')
 
+            LOG.debug("%s has a valid TLD", zone_name)
+
         # Check zone name blacklist
         if self._is_blacklisted_zone_name(context, zone_name):
             # Some users are allowed bypass the blacklist.. Is this one?
@@ -398,7 +434,7 @@ class Service(service.RPCService):
         """
         Ensures the provided zone_name is not blacklisted.
         """
-        blacklists = self.storage.find_blacklists(context)
+        blacklists = self.zone_name_cache.get_blacklists(context)
 
         class Timeout(Exception):
             pass
@@ -409,11 +445,12 @@ class Service(service.RPCService):
         signal.signal(signal.SIGALRM, _handle_timeout)
 
         try:
-            for blacklist in blacklists:
-                signal.setitimer(signal.ITIMER_REAL, 0.02)
+            # Each regex may combine several of the blacklist patterns
+            for regex, count in blacklists.regexes:
+                signal.setitimer(signal.ITIMER_REAL, 0.02 * count)
 
                 try:
-                    if bool(re.search(blacklist.pattern, zone_name)):
+                    if regex.search(zone_name):
                         return True
                 finally:
                     signal.setitimer(signal.ITIMER_REAL, 0)
@@ -423,7 +460,7 @@ class Service(service.RPCService):
                 'Blacklist regex (%(pattern)s) took too long to evaluate '
                 'against zone name (%(zone_name)s',
                 {
-                    'pattern': blacklist.pattern,
+                    'pattern': regex.pattern,
                     'zone_name': zone_name
                 })
 
@@ -438,25 +475,11 @@ class Service(service.RPCService):
         """
         context = context.elevated(all_tenants=True)
 
-        # Break the name up into it's component labels
-        labels = zone_name.split(".")
-
-        criterion = {"pool_id": pool_id}
-
-        i = 1
-
-        # Starting with label #2, search for matching zone's in the database
-        while (i < len(labels)):
-            name = '.'.join(labels[i:])
-            criterion["name"] = name
-            try:
-                zone = self.storage.find_zone(context, criterion)
-            except exceptions.ZoneNotFound:
-                i += 1
-            else:
-                return zone
-
-        return False
+        try:
+            return self.storage.find_ancestor_zone(
+                context, zone_name, {"pool_id": pool_id})
+        except exceptions.ZoneNotFound:
+            return False
 
     def _is_superzone(self, context, zone_name, pool_id):
         """
@@ -465,13 +488,8 @@ class Service(service.RPCService):
         """
         context = context.elevated(all_tenants=True)
 
-        # Create wildcard term to catch all subzones
-        search_term = "%%.%(name)s" % {"name": zone_name}
-
-        criterion = {'name': search_term, "pool_id": pool_id}
-        subzones = self.storage.find_zones(context, criterion)
-
-        return subzones
+        return self.storage.find_descendant_zones(
+            context, zone_name, {"pool_id": pool_id})
 
     def _is_valid_ttl(self, context, ttl):
         if ttl is None:
@@ -489,8 +507,11 @@ class Service(service.RPCService):
         Optionally set delayed_notify to have PM issue delayed notify
         """
 
-        # Increment the serial number
-        zone.serial = utils.increment_serial(zone.serial)
+        # Increment the serial number. The zone may have been read before a
+        # concurrent change, or from a lagging read replica, so never go
+        # below the serial in storage.
+        serial = self.storage.get_zone_serial(context, zone.id)
+        zone.serial = utils.increment_serial(max(zone.serial, serial))
         if set_delayed_notify:
             zone.delayed_notify = True
 
@@ -501,6 +522,57 @@ class Service(service.RPCService):
 
         return zone
 
+    # Zone Journal Methods
+    def _is_journaled(self, zone):
+        return (cfg.CONF['service:central'].zone_journal_enabled and
+                zone.type == 'PRIMARY')
+
+    @staticmethod
+    def _get_journal_rrs(zone, recordset, records=None):
+        """The (name, type, ttl, data) of every RR a recordset publishes"""
+        if records is None:
+            if not recordset.obj_attr_is_set('records'):
+                return set()
+            records = recordset.records
+
+        ttl = recordset.ttl if recordset.ttl is not None else zone.ttl
+        return set(
+            (recordset.name, recordset.type, ttl, record.data)
+            for record in records if record.action != 'DELETE'
+        )
+
+    def _get_stored_journal_rrs(self, context, zone, recordset_id):
+        try:
+            recordset = self.storage.get_recordset(context, recordset_id)
+        except exceptions.RecordSetNotFound:
+            return set()
+        return self._get_journal_rrs(zone, recordset)
+
+    def _journal_zone_changes(self, context, zone, deleted, added,
+                              increment_serial=True):
+        """Record the RRs a change removed from and added to a zone
+
+        Changes made without incrementing the serial can't be attributed to
+        a version of the zone, so only a RESET is recorded for them, which
+        forces transfers from any older serial to be full ones.
+        """
+        deleted, added = deleted - added, added - deleted
+        if not deleted and not added:
+            return
+
+        # Changes to the SOA are the serial increment itself
+        if increment_serial or all(rr[1] == 'SOA' for rr in deleted | added):
+            entries = ([('DEL',) + rr for rr in sorted(deleted)] +
+                       [('ADD',) + rr for rr in sorted(added)])
+            self.storage.create_zone_journal(
+                context, zone.id, zone.serial, entries)
+        else:
+            self._reset_zone_journal(context, zone, zone.serial + 1)
+
+    def _reset_zone_journal(self, context, zone, serial):
+        self.storage.create_zone_journal(
+            context, zone.id, serial, [('RESET', None, None, None, None)])
+
     # SOA Recordset Methods
     def _build_soa_record(self, zone, ns_records):
         return "%s %s. %d %d %d %d %d" % (ns_records[0]['hostname'],
@@ -524,7 +596,7 @@ class Service(service.RPCService):
         }
         soa, zone = self._create_recordset_in_storage(
             context, zone, objects.RecordSet(**values),
-            increment_serial=False)
+            increment_serial=False, journal=False)
         return soa
 
     def _update_soa(self, context, zone):
@@ -545,7 +617,7 @@ class Service(service.RPCService):
                                           increment_serial=False)
 
     # NS Recordset Methods
-    def _create_ns(self, context, zone, ns_records):
+    def _create_ns(self, context, zone, ns_records, journal=True):
         # NOTE: We should not be creating NS records when a zone is SECONDARY.
         if zone.type != 'PRIMARY':
             return
@@ -560,7 +632,7 @@ class Service(service.RPCService):
         }
         ns, zone = self._create_recordset_in_storage(
             context, zone, objects.RecordSet(**values),
-            increment_serial=False)
+            increment_serial=False, journal=journal)
 
         return ns
 
@@ -699,6 +771,7 @@ class Service(service.RPCService):
     # TLD Methods
     @rpc.expected_exceptions()
     @notification('dns.tld.create')
+    @invalidate_zone_name_cache('tlds')
     @transaction
     def create_tld(self, context, tld):
         policy.check('create_tld', context)
@@ -724,6 +797,7 @@ class Service(service.RPCService):
 
     @rpc.expected_exceptions()
     @notification('dns.tld.update')
+    @invalidate_zone_name_cache('tlds')
     @transaction
     def update_tld(self, context, tld):
         target = {
@@ -737,6 +811,7 @@ class Service(service.RPCService):
 
     @rpc.expected_exceptions()
     @notification('dns.tld.delete')
+    @invalidate_zone_name_cache('tlds')
     @transaction
     def delete_tld(self, context, tld_id):
         policy.check('delete_tld', context, {'tld_id': tld_id})
@@ -774,38 +849,50 @@ class Service(service.RPCService):
 
     @rpc.expected_exceptions()
     @notification('dns.tsigkey.update')
-    @transaction
     def update_tsigkey(self, context, tsigkey):
         target = {
             'tsigkey_id': tsigkey.obj_get_original_value('id'),
         }
         policy.check('update_tsigkey', context, target)
 
-        tsigkey = self.storage.update_tsigkey(context, tsigkey)
+        name = tsigkey.obj_get_original_value('name')
+        tsigkey = self._update_tsigkey_in_storage(context, tsigkey)
 
-        # TODO(Ron): this method needs to do more than update storage.
+        # Only once the change is committed, so mDNS can't load the old key
+        # again.
+        self.mdns_api.invalidate_tsigkeys(
+            context, sorted({name, tsigkey.name}))
 
         return tsigkey
 
+    @transaction
+    def _update_tsigkey_in_storage(self, context, tsigkey):
+        return self.storage.update_tsigkey(context, tsigkey)
+
     @rpc.expected_exceptions()
     @notification('dns.tsigkey.delete')
-    @transaction
     def delete_tsigkey(self, context, tsigkey_id):
         policy.check('delete_tsigkey', context, {'tsigkey_id': tsigkey_id})
 
-        tsigkey = self.storage.delete_tsigkey(context, tsigkey_id)
+        tsigkey = self._delete_tsigkey_in_storage(context, tsigkey_id)
 
-        # TODO(Ron): this method needs to do more than update storage.
+        self.mdns_api.invalidate_tsigkeys(context, [tsigkey.name])
 
         return tsigkey
 
+    @transaction
+    def _delete_tsigkey_in_storage(self, context, tsigkey_id):
+        return self.storage.delete_tsigkey(context, tsigkey_id)
+
     # Tenant Methods
     @rpc.expected_exceptions()
+    @replica_reads
     def find_tenants(self, context):
         policy.check('find_tenants', context)
         return self.storage.find_tenants(context)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def get_tenant(self, context, tenant_id):
         target = {
             'tenant_id': tenant_id
@@ -816,6 +903,7 @@ class Service(service.RPCService):
         return self.storage.get_tenant(context, tenant_id)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def count_tenants(self, context):
         policy.check('count_tenants', context)
         return self.storage.count_tenants(context)
@@ -852,6 +940,14 @@ class Service(service.RPCService):
     def create_zone(self, context, zone):
         """Create zone: perform checks and then call _create_zone()
         """
+        subzones = self._check_new_zone(context, zone)
+
+        # End of pre-flight checks, create zone
+        return self._create_zone(context, zone, subzones)
+
+    def _check_new_zone(self, context, zone):
+        """Pre-flight checks for a new zone, returning its subzones
+        """
 
         # Default to creating in the current users tenant
         zone.tenant_id = zone.tenant_id or context.project_id
@@ -910,8 +1006,7 @@ class Service(service.RPCService):
                          'one nameserver')
             raise exceptions.NoServersConfigured()
 
-        # End of pre-flight checks, create zone
-        return self._create_zone(context, zone, subzones)
+        return subzones
 
     def _create_zone(self, context, zone, subzones):
         """Create zone straight away
@@ -925,6 +1020,11 @@ class Service(service.RPCService):
 
         zone = self._create_zone_in_storage(context, zone)
 
+        return self._deploy_new_zone(context, zone, subzones)
+
+    def _deploy_new_zone(self, context, zone, subzones):
+        """Send a zone, once it is stored, to the nameservers of its pool
+        """
         self.zone_api.create_zone(context, zone)
 
         if zone.type == 'SECONDARY':
@@ -952,19 +1052,18 @@ class Service(service.RPCService):
         # Create the SOA and NS recordsets for the new zone.  The SOA
         # record will always be the first 'created_at' record for a zone.
         self._create_soa(context, zone)
-        self._create_ns(context, zone, [n.hostname for n in pool_ns_records])
+        # Nothing has been served from the new zone yet, so there is no
+        # history to journal.
+        self._create_ns(context, zone, [n.hostname for n in pool_ns_records],
+                        journal=False)
 
-        if zone.obj_attr_is_set('recordsets'):
-            for rrset in zone.recordsets:
-                # This allows eventlet to yield, as this looping operation
-                # can be very long-lived.
-                time.sleep(0)
-                self._create_recordset_in_storage(
-                    context, zone, rrset, increment_serial=False)
+        if zone.obj_attr_is_set('recordsets') and len(zone.recordsets) > 0:
+            self._create_recordsets_in_storage(context, zone, zone.recordsets)
 
         return zone
 
     @rpc.expected_exceptions()
+    @replica_reads
     def get_zone(self, context, zone_id):
         """Get a zone, even if flagged for deletion
         """
@@ -980,6 +1079,7 @@ class Service(service.RPCService):
         return zone
 
     @rpc.expected_exceptions()
+    @replica_reads
     def get_zone_ns_records(self, context, zone_id=None, criterion=None):
 
         if zone_id is None:
@@ -1005,17 +1105,19 @@ class Service(service.RPCService):
         return pool.ns_records
 
     @rpc.expected_exceptions()
+    @replica_reads
     def find_zones(self, context, criterion=None, marker=None, limit=None,
-                   sort_key=None, sort_dir=None):
+                   sort_key=None, sort_dir=None, count=True):
         """List existing zones including the ones flagged for deletion.
         """
         target = {'tenant_id': context.project_id}
         policy.check('find_zones', context, target)
 
         return self.storage.find_zones(context, criterion, marker, limit,
-                                       sort_key, sort_dir)
+                                       sort_key, sort_dir, count)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def find_zone(self, context, criterion=None):
         target = {'tenant_id': context.project_id}
         policy.check('find_zone', context, target)
@@ -1079,6 +1181,8 @@ class Service(service.RPCService):
         zone.action = 'UPDATE'
         zone.status = 'PENDING'
 
+        ttl_changed = 'ttl' in zone.obj_what_changed()
+
         if increment_serial:
             # _increment_zone_serial increments and updates the zone
             zone = self._increment_zone_serial(
@@ -1086,6 +1190,13 @@ class Service(service.RPCService):
         else:
             zone = self.storage.update_zone(context, zone)
 
+        if ttl_changed and self._is_journaled(zone):
+            # Every RR without a TTL of its own changed, rather than
+            # journaling each of them force a full transfer.
+            self._reset_zone_journal(
+                context, zone,
+                zone.serial if increment_serial else zone.serial + 1)
+
         return zone
 
     @rpc.expected_exceptions()
@@ -1156,6 +1267,18 @@ class Service(service.RPCService):
 
         return self.storage.purge_zones(context, criterion, limit)
 
+    @rpc.expected_exceptions()
+    @transaction
+    def purge_zone_journal(self, context, criterion):
+        """Purge old zone journal entries.
+        :returns: number of purged entries
+        """
+        policy.check('purge_zones', context, criterion)
+
+        LOG.debug("Purging zone journal with criterion of %r", criterion)
+
+        return self.storage.purge_zone_journal(context, criterion)
+
     @rpc.expected_exceptions()
     def xfr_zone(self, context, zone_id):
         zone = self.storage.get_zone(context, zone_id)
@@ -1186,6 +1309,7 @@ class Service(service.RPCService):
             self.mdns_api.perform_zone_xfr(context, zone)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def count_zones(self, context, criterion=None):
         if criterion is None:
             criterion = {}
@@ -1200,6 +1324,7 @@ class Service(service.RPCService):
 
     # Report combining all the count reports based on criterion
     @rpc.expected_exceptions()
+    @replica_reads
     def count_report(self, context, criterion=None):
         reports = []
 
@@ -1317,7 +1442,7 @@ class Service(service.RPCService):
 
     @transaction_shallow_copy
     def _create_recordset_in_storage(self, context, zone, recordset,
-                                     increment_serial=True):
+                                     increment_serial=True, journal=True):
 
         # Ensure the tenant has enough quota to continue
         self._enforce_recordset_quota(context, zone)
@@ -1343,10 +1468,108 @@ class Service(service.RPCService):
         recordset = self.storage.create_recordset(context, zone.id,
                                                   recordset)
 
+        if journal and self._is_journaled(zone):
+            self._journal_zone_changes(
+                context, zone, set(), self._get_journal_rrs(zone, recordset),
+                increment_serial)
+
         # Return the zone too in case it was updated
         return (recordset, zone)
 
+    def _validate_recordsets(self, context, zone, recordsets, types=None):
+        """
+        Validate many new recordsets for a zone, with the same rules as
+        _validate_recordset but a fixed number of queries.
+
+        :param types: The types of the recordsets at each name, both the
+                      existing ones and the new ones, if already known.
+        """
+        if types is None:
+            # The types of the recordsets at each name, both the existing
+            # ones and the new ones.
+            types = collections.defaultdict(set)
+            for recordset in itertools.chain(
+                    self.storage.find_recordsets(
+                        context, {'zone_id': zone.id}),
+                    recordsets):
+                types[recordset.name].add(recordset.type)
+
+        child_zones = self.storage.find_zones(
+            context.elevated(all_tenants=True),
+            {"parent_zone_id": zone.id}, count=False)
+
+        for recordset in recordsets:
+            # This allows eventlet to yield, as this looping operation
+            # can be very long-lived.
+            time.sleep(0)
+
+            self._is_valid_ttl(context, getattr(recordset, 'ttl', None))
+            self._is_valid_recordset_name(context, zone, recordset.name)
+
+            if recordset.type == 'CNAME' and recordset.name == zone.name:
+                raise exceptions.InvalidRecordSetLocation(
+                    'CNAME recordsets may not be created at the zone apex')
+
+            if 'CNAME' in types[recordset.name] and \
+                    len(types[recordset.name]) > 1:
+                raise exceptions.InvalidRecordSetLocation(
+                    'CNAME recordsets may not share a name with any other '
+                    'records')
+
+            if recordset.name != zone.name:
+                for child_zone in child_zones:
+                    try:
+                        self._is_valid_recordset_name(
+                            context, child_zone, recordset.name)
+                    except Exception:
+                        continue
+                    else:
+                        msg = 'RecordSet belongs in a child zone: %s' % \
+                            child_zone['name']
+                        raise exceptions.InvalidRecordSetLocation(msg)
+
+            self._is_valid_recordset_records(recordset)
+
+    def _create_recordsets_in_storage(self, context, zone, recordsets,
+                                      types=None):
+        """
+        Create the recordsets of a new zone with a bulk insert, without
+        incrementing its serial or journaling the changes.
+        """
+        self._validate_recordsets(context, zone, recordsets, types)
+
+        # Ensure the tenant has enough quota to continue. Quotas are checked
+        # against the count before each recordset is created, so the last
+        # check made creating them one at a time is the strictest one.
+        recordset_count = self.storage.count_recordsets(
+            context, {'zone_id': zone.id})
+        self.quota.limit_check(
+            context, zone.tenant_id,
+            zone_recordsets=recordset_count + len(recordsets) - 1)
+
+        # Quotas don't apply to managed records.
+        new_records = sum(
+            len(rs.records) for rs in recordsets
+            if not rs.managed and rs.obj_attr_is_set('records'))
+        if new_records:
+            record_count = self.storage.count_records(
+                context, {'zone_id': zone.id, 'managed': False})
+            self.quota.limit_check(
+                context, zone.tenant_id,
+                zone_records=record_count + new_records)
+
+        for recordset in recordsets:
+            if recordset.obj_attr_is_set('records'):
+                for record in recordset.records:
+                    record.action = 'CREATE'
+                    record.status = 'PENDING'
+                    record.serial = zone.serial
+
+        return self.storage.create_recordsets_bulk(
+            context, zone.id, recordsets)
+
     @rpc.expected_exceptions()
+    @replica_reads
     def get_recordset(self, context, zone_id, recordset_id):
         recordset = self.storage.get_recordset(context, recordset_id)
 
@@ -1374,6 +1597,7 @@ class Service(service.RPCService):
         return recordset
 
     @rpc.expected_exceptions()
+    @replica_reads
     def find_recordsets(self, context, criterion=None, marker=None, limit=None,
                         sort_key=None, sort_dir=None, force_index=False):
         target = {'tenant_id': context.project_id}
@@ -1386,6 +1610,7 @@ class Service(service.RPCService):
         return recordsets
 
     @rpc.expected_exceptions()
+    @replica_reads
     def find_recordset(self, context, criterion=None):
         target = {'tenant_id': context.project_id}
         policy.check('find_recordset', context, target)
@@ -1395,15 +1620,48 @@ class Service(service.RPCService):
         return recordset
 
     @rpc.expected_exceptions()
+    @replica_reads
     def export_zone(self, context, zone_id):
         zone = self.get_zone(context, zone_id)
 
         criterion = {'zone_id': zone_id}
-        recordsets = self.storage.find_recordsets_export(context, criterion)
+        recordsets = self.storage.iter_recordsets_export(context, criterion)
+
+        return ''.join(utils.generate_template('export-zone.jinja2',
+                                               zone=zone,
+                                               recordsets=recordsets))
+
+    @rpc.expected_exceptions()
+    def export_zone_chunk(self, context, zone_id, marker=None, limit=None):
+        """
+        Render part of the zone file of a zone, of at most `limit` records
+        after `marker`. The marker returned continues the export, it is None
+        once the whole zone was rendered.
+
+        Every chunk is read on its own, so a zone changed while its export is
+        being streamed may be rendered as a file that matches no single
+        serial. Callers needing a consistent zone file should use an
+        asynchronous export, which reads the zone in one pass.
+        """
+        zone = self.get_zone(context, zone_id)
 
-        return utils.render_template('export-zone.jinja2',
+        criterion = {'zone_id': zone_id}
+        recordsets = list(self.storage.iter_recordsets_export(
+            context, criterion, marker=marker, limit=limit))
+
+        data = utils.render_template('export-zone.jinja2',
                                      zone=zone,
-                                     recordsets=recordsets)
+                                     recordsets=recordsets,
+                                     continued=marker is not None)
+
+        if limit is None or len(recordsets) < limit:
+            return {'data': data, 'marker': None}
+
+        created_at, recordset_id, record_id = recordsets[-1][-3:]
+        return {
+            'data': data.rstrip('\n') + '\n',
+            'marker': [created_at.isoformat(), recordset_id, record_id],
+        }
 
     @rpc.expected_exceptions()
     @notification('dns.recordset.update')
@@ -1457,6 +1715,11 @@ class Service(service.RPCService):
 
         self._validate_recordset(context, zone, recordset)
 
+        journaled = self._is_journaled(zone)
+        if journaled:
+            deleted = self._get_stored_journal_rrs(
+                context, zone, recordset.id)
+
         if increment_serial:
             # update the zone's status and increment the serial
             zone = self._update_zone_in_storage(
@@ -1477,6 +1740,11 @@ class Service(service.RPCService):
         # Update the recordset
         recordset = self.storage.update_recordset(context, recordset)
 
+        if journaled:
+            self._journal_zone_changes(
+                context, zone, deleted, self._get_journal_rrs(zone, recordset),
+                increment_serial)
+
         return (recordset, zone)
 
     @rpc.expected_exceptions()
@@ -1522,6 +1790,10 @@ class Service(service.RPCService):
     def _delete_recordset_in_storage(self, context, zone, recordset,
                                      increment_serial=True):
 
+        journaled = self._is_journaled(zone)
+        if journaled:
+            deleted = self._get_journal_rrs(zone, recordset)
+
         if increment_serial:
             # update the zone's status and increment the serial
             zone = self._update_zone_in_storage(
@@ -1537,9 +1809,14 @@ class Service(service.RPCService):
         self.storage.update_recordset(context, recordset)
         recordset = self.storage.delete_recordset(context, recordset.id)
 
+        if journaled:
+            self._journal_zone_changes(
+                context, zone, deleted, set(), increment_serial)
+
         return (recordset, zone)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def count_recordsets(self, context, criterion=None):
         if criterion is None:
             criterion = {}
@@ -1604,9 +1881,16 @@ class Service(service.RPCService):
         record = self.storage.create_record(context, zone.id, recordset.id,
                                             record)
 
+        if self._is_journaled(zone):
+            self._journal_zone_changes(
+                context, zone, set(),
+                self._get_journal_rrs(zone, recordset, [record]),
+                increment_serial)
+
         return (record, zone)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def get_record(self, context, zone_id, recordset_id, record_id):
         zone = self.storage.get_zone(context, zone_id)
         recordset = self.storage.get_recordset(context, recordset_id)
@@ -1634,6 +1918,7 @@ class Service(service.RPCService):
         return record
 
     @rpc.expected_exceptions()
+    @replica_reads
     def find_records(self, context, criterion=None, marker=None, limit=None,
                      sort_key=None, sort_dir=None):
         target = {'tenant_id': context.project_id}
@@ -1643,6 +1928,7 @@ class Service(service.RPCService):
                                          sort_key, sort_dir)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def find_record(self, context, criterion=None):
         target = {'tenant_id': context.project_id}
         policy.check('find_record', context, target)
@@ -1704,6 +1990,11 @@ class Service(service.RPCService):
     def _update_record_in_storage(self, context, zone, record,
                                   increment_serial=True):
 
+        journaled = self._is_journaled(zone)
+        if journaled:
+            deleted = self._get_stored_journal_rrs(
+                context, zone, record.recordset_id)
+
         if increment_serial:
             # update the zone's status and increment the serial
             zone = self._update_zone_in_storage(
@@ -1716,6 +2007,13 @@ class Service(service.RPCService):
         # Update the record
         record = self.storage.update_record(context, record)
 
+        if journaled:
+            self._journal_zone_changes(
+                context, zone, deleted,
+                self._get_stored_journal_rrs(
+                    context, zone, record.recordset_id),
+                increment_serial)
+
         return (record, zone)
 
     @rpc.expected_exceptions()
@@ -1766,6 +2064,11 @@ class Service(service.RPCService):
     def _delete_record_in_storage(self, context, zone, record,
                                   increment_serial=True):
 
+        journaled = self._is_journaled(zone)
+        if journaled:
+            deleted = self._get_stored_journal_rrs(
+                context, zone, record.recordset_id)
+
         if increment_serial:
             # update the zone's status and increment the serial
             zone = self._update_zone_in_storage(
@@ -1777,9 +2080,17 @@ class Service(service.RPCService):
 
         record = self.storage.update_record(context, record)
 
+        if journaled:
+            self._journal_zone_changes(
+                context, zone, deleted,
+                self._get_stored_journal_rrs(
+                    context, zone, record.recordset_id),
+                increment_serial)
+
         return (record, zone)
 
     @rpc.expected_exceptions()
+    @replica_reads
     def count_records(self, context, criterion=None):
         if criterion is None:
             criterion = {}
@@ -1800,7 +2111,7 @@ class Service(service.RPCService):
     def sync_zones(self, context):
         policy.check('diagnostics_sync_zones', context)
 
-        zones = self.storage.find_zones(context)
+        zones = self.storage.find_zones(context, count=False)
 
         results = {}
         for zone in zones:
@@ -2187,6 +2498,7 @@ class Service(service.RPCService):
     # Blacklisted zones
     @rpc.expected_exceptions()
     @notification('dns.blacklist.create')
+    @invalidate_zone_name_cache('blacklists')
     @transaction
     def create_blacklist(self, context, blacklist):
         policy.check('create_blacklist', context)
@@ -2224,6 +2536,7 @@ class Service(service.RPCService):
 
     @rpc.expected_exceptions()
     @notification('dns.blacklist.update')
+    @invalidate_zone_name_cache('blacklists')
     @transaction
     def update_blacklist(self, context, blacklist):
         target = {
@@ -2237,6 +2550,7 @@ class Service(service.RPCService):
 
     @rpc.expected_exceptions()
     @notification('dns.blacklist.delete')
+    @invalidate_zone_name_cache('blacklists')
     @transaction
     def delete_blacklist(self, context, blacklist_id):
         policy.check('delete_blacklist', context)
@@ -2382,6 +2696,123 @@ class Service(service.RPCService):
         self._update_record_status(context, zone_id, status, serial)
         return zone
 
+    @rpc.expected_exceptions()
+    def update_statuses(self, context, updates):
+        """
+        :param context: Security context information.
+        :param updates: A list of (zone_id, status, serial) tuples, applied
+                        in order.
+        :return: None
+        """
+        try:
+            # The zones are locked like update_status does, so the statuses
+            # don't race with other changes to them.
+            with self._synchronized_zones(
+                    [zone_id for zone_id, _, _ in updates]):
+                zone_ids = self._bulk_update_status(context, updates)
+        except Exception:
+            # Don't let one bad zone lose the statuses of the others
+            LOG.warning('Failed to update the status of %d zones at once, '
+                        'updating them one at a time', len(updates),
+                        exc_info=True)
+            self._update_statuses_one_by_one(context, updates)
+            return
+
+        # Notify of every updated zone as update_status does, once the
+        # changes are committed.
+        zones = self.storage.find_zones(
+            context.elevated(all_tenants=True, show_deleted=True),
+            {'id': list(zone_ids)})
+        for zone in zones:
+            self._notify_zone_status(context, zone)
+
+    def _update_statuses_one_by_one(self, context, updates):
+        for zone_id, status, serial in updates:
+            try:
+                self.update_status(context, zone_id, status, serial)
+            except exceptions.ZoneNotFound:
+                LOG.debug('Not updating status of zone %s, it no longer '
+                          'exists', zone_id)
+            except Exception:
+                LOG.exception('Failed to update status of zone %(zone)s to '
+                              '%(status)s at serial %(serial)s',
+                              {'zone': zone_id, 'status': status,
+                               'serial': serial})
+
+    @contextlib.contextmanager
+    def _synchronized_zones(self, zone_ids):
+        """
+        Hold the locks synchronized_zone takes for many zones. They are
+        taken in order, so two holders of more than one can't deadlock.
+        """
+        if not hasattr(ZONE_LOCKS, 'held'):
+            ZONE_LOCKS.held = set()
+
+        with contextlib.ExitStack() as stack:
+            for zone_id in sorted(set(zone_ids) - ZONE_LOCKS.held):
+                stack.enter_context(
+                    self.coordination.get_lock('zone-%s' % zone_id))
+                ZONE_LOCKS.held.add(zone_id)
+                stack.callback(ZONE_LOCKS.held.remove, zone_id)
+            yield
+
+    @transaction
+    def _bulk_update_status(self, context, updates):
+        """
+        Apply status updates with a few UPDATE statements for all the zones
+        and records with the same status and serial.
+
+        :returns: The IDs of the zones updated.
+        """
+        zone_ids = set()
+        for batch in self._group_status_updates(updates):
+            for (status, serial), batch_ids in batch.items():
+                zones = self.storage.bulk_update_zone_status(
+                    context, batch_ids, status, serial)
+                records = self.storage.bulk_update_record_status(
+                    context, batch_ids, status, serial)
+
+                LOG.debug('Set status of %(zones)d zones and %(records)d '
+                          'records to %(status)s at serial %(serial)s',
+                          {'zones': zones, 'records': records,
+                           'status': status, 'serial': serial})
+
+                zone_ids.update(batch_ids)
+
+        if zone_ids:
+            # TODO(Ron): Including this to retain the current logic.
+            # We should NOT be deleting records.  The record status should
+            # be used to indicate the record has been deleted.
+            self.storage.purge_deleted_records(context, list(zone_ids))
+
+        return zone_ids
+
+    @staticmethod
+    def _group_status_updates(updates):
+        """
+        Group status updates by status and serial, keeping the order of the
+        updates to each zone.
+
+        :returns: A list of batches, each a dict of the zone IDs to update
+                  keyed by (status, serial). A zone is in a batch at most
+                  once, and its later updates are in later batches.
+        """
+        batches = []
+        next_batch = {}
+        for zone_id, status, serial in updates:
+            index = next_batch.get(zone_id, 0)
+            if index == len(batches):
+                batches.append(collections.OrderedDict())
+            batches[index].setdefault((status, serial), []).append(zone_id)
+            next_batch[zone_id] = index + 1
+
+        return batches
+
+    @notification('dns.domain.update')
+    @notification('dns.zone.update')
+    def _notify_zone_status(self, context, zone):
+        return zone
+
     def _update_zone_status(self, context, zone_id, status, serial):
         """Update zone status in storage
 
@@ -2405,57 +2836,22 @@ class Service(service.RPCService):
 
     def _update_record_status(self, context, zone_id, status, serial):
         """Update status on every record in a zone based on `serial`
-        :returns: updated records
+        :returns: the number of records updated
         """
-        criterion = {
-            'zone_id': zone_id
-        }
+        count = self.storage.bulk_update_record_status(
+            context, zone_id, status, serial)
 
-        if status == 'SUCCESS':
-            criterion.update({
-                'status': ['PENDING', 'ERROR'],
-                'serial': '<=%d' % serial,
-            })
-
-        elif status == 'ERROR' and serial == 0:
-            criterion.update({
-                'status': 'PENDING',
-            })
-
-        elif status == 'ERROR':
-            criterion.update({
-                'status': 'PENDING',
-                'serial': '<=%d' % serial,
-            })
+        # TODO(Ron): Including this to retain the current logic.
+        # We should NOT be deleting records.  The record status should
+        # be used to indicate the record has been deleted.
+        deleted = self.storage.purge_deleted_records(context, zone_id)
 
-        records = self.storage.find_records(context, criterion=criterion)
+        LOG.debug('Set status of %(count)d records of zone %(zone)s to '
+                  '%(status)s at serial %(serial)s, deleted %(deleted)d',
+                  {'count': count, 'zone': zone_id, 'status': status,
+                   'serial': serial, 'deleted': deleted})
 
-        for record in records:
-            record, deleted = self._update_zone_or_record_status(
-                record, status, serial)
-
-            if record.obj_what_changed():
-                LOG.debug('Setting record %s, serial %s: action %s, '
-                          'status %s', record.id, record.serial,
-                          record.action, record.status)
-                self.storage.update_record(context, record)
-
-            # TODO(Ron): Including this to retain the current logic.
-            # We should NOT be deleting records.  The record status should
-            # be used to indicate the record has been deleted.
-            if deleted:
-                LOG.debug('Deleting record %s, serial %s: action %s, '
-                          'status %s', record.id, record.serial,
-                          record.action, record.status)
-
-                self.storage.delete_record(context, record.id)
-
-                recordset = self.storage.get_recordset(
-                    context, record.recordset_id)
-                if len(recordset.records) == 0:
-                    self.storage.delete_recordset(context, recordset.id)
-
-        return records
+        return count
 
     @staticmethod
     def _update_zone_or_record_status(zone_or_record, status, serial):
@@ -2739,78 +3135,237 @@ class Service(service.RPCService):
         return created_zone_import
 
     def _import_zone(self, context, zone_import, request_body):
-
-        def _import(self, context, zone_import, request_body):
-            # Dnspython needs a str instead of a unicode object
-            if six.PY2:
-                request_body = str(request_body)
-            zone = None
+        # Dnspython needs a str instead of a unicode object
+        if six.PY2:
+            request_body = str(request_body)
+
+        config = cfg.CONF['service:central']
+        pool = eventlet.GreenPool(config.zone_import_workers)
+        started_at = time.time()
+
+        # The zone and its subzones, once created from the first batch, the
+        # number of records written so far and the first error of a batch.
+        state = {'zone': None, 'subzones': [], 'records': 0, 'error': None}
+        # The recordsets and records of every batch read so far. Batches are
+        # written concurrently, and only see the rows of those committed
+        # before them, so quotas are checked against these instead.
+        reserved = {'recordsets': 0, 'records': 0}
+        # The types of the recordsets at each name, the only thing kept for
+        # the whole zonefile while it is read.
+        types = collections.defaultdict(set)
+        # Recordsets adding records to one of an earlier batch, which are
+        # merged into it once every batch has been written.
+        merges = objects.RecordSetList()
+
+        def _write_batch(recordsets):
             try:
-                dnspython_zone = dnszone.from_text(
-                    request_body,
-                    # Don't relativize, or we end up with '@' record names.
-                    relativize=False,
-                    # Don't check origin, we allow missing NS records
-                    # (missing SOA records are taken care of in _create_zone).
-                    check_origin=False)
-                zone = dnsutils.from_dnspython_zone(dnspython_zone)
+                self._import_recordsets(
+                    context, state['zone'], recordsets, types)
+            except Exception as e:
+                if state['error'] is None:
+                    state['error'] = e
+            else:
+                state['records'] += _count_records(recordsets)
+                _save_progress()
+
+        def _read_batch(batches, first):
+            # Runs in a native thread, as parsing a large zonefile would hold
+            # up every other request central is handling.
+            batch = next(batches, None)
+            if batch is None:
+                return None
+            elif first:
+                return dnsutils.from_dnspython_zone(batch)
+            return dnsutils.dnspyrecords_to_recordsetlist(batch.nodes)
+
+        def _import_batch(batch):
+            # Stop reading the zonefile once a batch failed
+            if state['error'] is not None:
+                raise state['error']
+
+            if state['zone'] is None:
+                zone = batch
                 zone.type = 'PRIMARY'
+                zone.recordsets = _imported_recordsets(zone, zone.recordsets)
+                for recordset in zone.recordsets:
+                    types[recordset.name].add(recordset.type)
+                types[zone.name].update(['SOA', 'NS'])
+
+                state['zone'], state['subzones'] = self._create_imported_zone(
+                    context, zone)
+                state['records'] += _count_records(zone.recordsets)
+                reserved['recordsets'] = self.storage.count_recordsets(
+                    context, {'zone_id': state['zone'].id})
+                reserved['records'] = self.storage.count_records(
+                    context, {'zone_id': state['zone'].id, 'managed': False})
+                # Don't hold on to the first batch
+                state['zone'].recordsets = objects.RecordSetList()
+                _save_progress()
+            else:
+                recordsets = objects.RecordSetList()
+                for recordset in _imported_recordsets(state['zone'], batch):
+                    if recordset.type in types[recordset.name]:
+                        merges.append(recordset)
+                    else:
+                        types[recordset.name].add(recordset.type)
+                        recordsets.append(recordset)
+
+                # Blocks while every writer is busy, so no more of the
+                # zonefile is parsed than can be written.
+                if recordsets:
+                    _reserve(recordsets)
+                    pool.spawn(_write_batch, recordsets)
+
+        def _reserve(recordsets):
+            # The same checks _create_recordsets_in_storage makes, against
+            # the batches that may not have been committed yet as well.
+            reserved['recordsets'] += len(recordsets)
+            reserved['records'] += _count_records(recordsets)
+            self.quota.limit_check(
+                context, state['zone'].tenant_id,
+                zone_recordsets=reserved['recordsets'] - 1,
+                zone_records=reserved['records'])
+
+        def _set_progress():
+            elapsed = max(time.time() - started_at, 0.001)
+            zone_import.records_processed = state['records']
+            zone_import.records_per_second = int(state['records'] / elapsed)
+
+        def _save_progress():
+            _set_progress()
+            try:
+                self.storage.update_zone_import(context, zone_import)
+            except Exception:
+                LOG.warning('Failed to update the progress of zone import %s',
+                            zone_import.id, exc_info=True)
 
-                for rrset in list(zone.recordsets):
-                    if rrset.type == 'SOA':
-                        zone.recordsets.remove(rrset)
-                    # subdomain NS records should be kept
-                    elif rrset.type == 'NS' and rrset.name == zone.name:
-                        zone.recordsets.remove(rrset)
-
-            except dnszone.UnknownOrigin:
-                zone_import.message = ('The $ORIGIN statement is required and'
-                                      ' must be the first statement in the'
-                                      ' zonefile.')
-                zone_import.status = 'ERROR'
-            except dnsexception.SyntaxError:
-                zone_import.message = 'Malformed zonefile.'
-                zone_import.status = 'ERROR'
-            except exceptions.BadRequest:
-                zone_import.message = 'An SOA record is required.'
-                zone_import.status = 'ERROR'
-            except Exception as e:
-                LOG.exception('An undefined error occurred during zone import')
-                msg = 'An undefined error occurred. %s'\
-                      % six.text_type(e)[:130]
-                zone_import.message = msg
-                zone_import.status = 'ERROR'
+        def _imported_recordsets(zone, recordsets):
+            # The SOA and apex NS records are managed by Designate, subdomain
+            # NS records should be kept.
+            return objects.RecordSetList(objects=[
+                rrset for rrset in recordsets
+                if rrset.type != 'SOA' and
+                not (rrset.type == 'NS' and rrset.name == zone.name)])
 
-            return zone, zone_import
+        def _count_records(recordsets):
+            return sum(len(rrset.records) for rrset in recordsets)
 
-        # Execute the import in a real Python thread
-        zone, zone_import = tpool.execute(_import, self, context,
-            zone_import, request_body)
+        try:
+            batches = iter(dnsutils.ZoneFileReader(
+                request_body, config.zone_import_batch_size))
+            while True:
+                # The writers run while the next batch is read
+                batch = tpool.execute(
+                    _read_batch, batches, state['zone'] is None)
+                if batch is None:
+                    break
+                _import_batch(batch)
 
-        # If the zone import was valid, create the zone
-        if zone_import.status != 'ERROR':
-            try:
-                zone = self.create_zone(context, zone)
-                zone_import.status = 'COMPLETE'
-                zone_import.zone_id = zone.id
-                zone_import.message = '%(name)s imported' % {'name':
-                                                             zone.name}
-            except exceptions.DuplicateZone:
-                zone_import.status = 'ERROR'
-                zone_import.message = 'Duplicate zone.'
-            except exceptions.InvalidTTL as e:
-                zone_import.status = 'ERROR'
-                zone_import.message = six.text_type(e)
-            except Exception as e:
-                LOG.exception('An undefined error occurred during zone '
-                              'import creation')
-                msg = 'An undefined error occurred. %s'\
-                      % six.text_type(e)[:130]
-                zone_import.message = msg
-                zone_import.status = 'ERROR'
+            pool.waitall()
+            if state['error'] is not None:
+                raise state['error']
+
+            if merges:
+                self._merge_imported_recordsets(
+                    context, state['zone'], merges)
+                state['records'] += _count_records(merges)
+
+            zone = self._deploy_imported_zone(
+                context, state['zone'], state['subzones'])
 
+            zone_import.status = 'COMPLETE'
+            zone_import.zone_id = zone.id
+            zone_import.message = '%(name)s imported' % {'name': zone.name}
+        except Exception as e:
+            pool.waitall()
+            if state['zone'] is not None:
+                # The zone was never sent to its nameservers, so it can
+                # simply be removed again.
+                try:
+                    self.storage.purge_zone(context, state['zone'])
+                except Exception:
+                    LOG.exception('Failed to remove partially imported '
+                                  'zone %s', state['zone'].name)
+
+            zone_import.status = 'ERROR'
+            zone_import.message = self._zone_import_error(e)
+
+        _set_progress()
         self.update_zone_import(context, zone_import)
 
+    def _zone_import_error(self, error):
+        if isinstance(error, dnszone.UnknownOrigin):
+            return ('The $ORIGIN statement is required and must be the first '
+                    'statement in the zonefile.')
+        elif isinstance(error, dnsexception.SyntaxError):
+            return 'Malformed zonefile.'
+        elif isinstance(error, exceptions.DuplicateZone):
+            return 'Duplicate zone.'
+        elif isinstance(error, dnszone.NoSOA):
+            return 'An SOA record is required.'
+        elif isinstance(error, exceptions.OverQuota):
+            return 'The zone exceeds the quota of its tenant.'
+        elif (isinstance(error, exceptions.DesignateException) and
+                error.expected and six.text_type(error)):
+            # Invalid records, rejected the same way the API would
+            return six.text_type(error)
+
+        LOG.error('An undefined error occurred during zone import',
+                  exc_info=error)
+        return 'An undefined error occurred. %s' % six.text_type(error)[:130]
+
+    @synchronized_zone(new_zone=True)
+    def _create_imported_zone(self, context, zone):
+        """
+        Store an imported zone with the recordsets of the first batch of its
+        zonefile, without sending it to its nameservers yet.
+        """
+        subzones = self._check_new_zone(context, zone)
+
+        # randomize the zone refresh time
+        zone.refresh = self._generate_soa_refresh_interval()
+
+        return self._create_zone_in_storage(context, zone), subzones
+
+    @transaction
+    def _import_recordsets(self, context, zone, recordsets, types):
+        return self._create_recordsets_in_storage(
+            context, zone, recordsets, types)
+
+    @transaction
+    def _merge_imported_recordsets(self, context, zone, recordsets):
+        """
+        Add records to the recordsets of an imported zone, for recordsets
+        that were split across more than one batch of the zonefile.
+        """
+        for recordset in recordsets:
+            existing = self.storage.find_recordset(context, {
+                'zone_id': zone.id,
+                'name': recordset.name,
+                'type': recordset.type,
+            })
+
+            data = set(record.data for record in existing.records)
+            for record in recordset.records:
+                if record.data in data:
+                    continue
+                data.add(record.data)
+
+                record.action = 'CREATE'
+                record.status = 'PENDING'
+                record.serial = zone.serial
+                existing.records.append(record)
+
+            self._is_valid_recordset_records(existing)
+            self._enforce_record_quota(context, zone, existing)
+
+            self.storage.update_recordset(context, existing)
+
+    @notification('dns.domain.create')
+    @notification('dns.zone.create')
+    def _deploy_imported_zone(self, context, zone, subzones):
+        return self._deploy_new_zone(context, zone, subzones)
+
     @rpc.expected_exceptions()
     def find_zone_imports(self, context, criterion=None, marker=None,
                   limit=None, sort_key=None, sort_dir=None):
@@ -2921,6 +3476,18 @@ class Service(service.RPCService):
 
         zone_export = self.storage.delete_zone_export(context, zone_export_id)
 
+        location = zone_export.location
+        if location and not location.startswith('designate://'):
+            # Remove what the worker wrote to the export store. The zone
+            # export is kept if that fails, so it can be deleted again.
+            store = export_store.get_export_store(
+                export_store.get_location_driver(location))
+            try:
+                store.delete(location)
+            except exceptions.ZoneExportNotFound:
+                LOG.debug('Zone export %s was already removed from %s',
+                          zone_export_id, location)
+
         return zone_export
 
     @rpc.expected_exceptions()
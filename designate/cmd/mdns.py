@@ -13,6 +13,7 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import socket
 import sys
 
 from oslo_log import log as logging
@@ -29,6 +30,7 @@ from designate.mdns import service as mdns_service
 
 CONF = designate.conf.CONF
 CONF.import_opt('workers', 'designate.mdns', group='service:mdns')
+LOG = logging.getLogger(__name__)
 
 
 def main():
@@ -38,8 +40,15 @@ def main():
 
     hookpoints.log_hook_setup()
 
+    workers = CONF['service:mdns'].workers
+    if workers and workers > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+        # Every worker binds its own sockets, which needs SO_REUSEPORT
+        LOG.warning('SO_REUSEPORT is not available, running 1 mdns worker '
+                    'process instead of %d', workers)
+        workers = 1
+
     server = mdns_service.Service()
     heartbeat = heartbeat_emitter.get_heartbeat_emitter(server.service_name)
-    service.serve(server, workers=CONF['service:mdns'].workers)
+    service.serve(server, workers=workers)
     heartbeat.start()
     service.wait()
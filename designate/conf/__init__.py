@@ -23,6 +23,7 @@ from designate.conf import coordination
 from designate.conf import denominator
 from designate.conf import djbdns
 from designate.conf import dynect
+from designate.conf import export_store
 from designate.conf import gdnsd
 from designate.conf import heartbeat_emitter
 from designate.conf import infoblox
@@ -50,6 +51,7 @@ coordination.register_opts(CONF)
 denominator.register_opts(CONF)
 djbdns.register_opts(CONF)
 dynect.register_opts(CONF)
+export_store.register_opts(CONF)
 gdnsd.register_opts(CONF)
 heartbeat_emitter.register_opts(CONF)
 infoblox.register_opts(CONF)
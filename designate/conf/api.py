@@ -52,6 +52,9 @@ API_OPTS = [
                     "Keystone v3 API with big service catalogs)."),
     cfg.BoolOpt('pecan_debug', default=False,
                 help='Pecan HTML Debug Interface'),
+    cfg.IntOpt('zone_export_chunk_size', default=1000, min=1,
+               help='Number of records fetched from central at a time when '
+                    'streaming a zone export'),
 ]
 
 APT_V2_OPTS = [
@@ -50,6 +50,23 @@ CENTRAL_OPTS = [
         'scheduler_filters',
         default=['default_pool'],
         help='Enabled Pool Scheduling filters'),
+    cfg.BoolOpt('zone_journal_enabled', default=False,
+                help='Record every change to a primary zone in a per-zone '
+                     'journal, used by mDNS to answer IXFR requests with '
+                     'only the changes since the requested serial'),
+    cfg.FloatOpt('zone_name_cache_ttl', default=30.0, min=0.0,
+                 help='Seconds the TLDs and blacklists new zone names are '
+                      'checked against are cached for. Changes made through '
+                      'this central process apply at once, changes made '
+                      'through other ones within this time. 0 disables the '
+                      'cache'),
+    cfg.IntOpt('zone_import_batch_size', default=1000, min=1,
+               help='Number of names of a zonefile that are parsed, '
+                    'validated and written to storage together when '
+                    'importing a zone'),
+    cfg.IntOpt('zone_import_workers', default=4, min=1,
+               help='Number of batches of an import that are validated and '
+                    'written to storage concurrently'),
 ]
 
 
@@ -0,0 +1,81 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo_config import cfg
+
+EXPORT_STORE_GROUP = cfg.OptGroup(
+    name='export_store',
+    title="Configuration for the store of asynchronous zone exports"
+)
+
+EXPORT_STORE_FILESYSTEM_GROUP = cfg.OptGroup(
+    name='export_store:filesystem',
+    title="Configuration for the filesystem zone export store"
+)
+
+EXPORT_STORE_SWIFT_GROUP = cfg.OptGroup(
+    name='export_store:swift',
+    title="Configuration for the Swift zone export store"
+)
+
+EXPORT_STORE_OPTS = [
+    cfg.StrOpt('driver',
+               help='The driver of the store zone exports are written to by '
+                    'the worker, when they are not performed synchronously, '
+                    'e.g. filesystem or swift. Zone exports are only '
+                    'performed synchronously when unset'),
+    cfg.BoolOpt('compress', default=False,
+                help='Whether to gzip zone exports written to the store'),
+]
+
+EXPORT_STORE_FILESYSTEM_OPTS = [
+    cfg.StrOpt('path', default='$state_path/exports',
+               help='The directory zone exports are written to, it needs '
+                    'to be shared by the worker and API hosts'),
+]
+
+EXPORT_STORE_SWIFT_OPTS = [
+    cfg.StrOpt('auth_url',
+               help='Keystone URL to authenticate with Swift'),
+    cfg.StrOpt('username',
+               help='Username for connecting to Swift'),
+    cfg.StrOpt('password', secret=True,
+               help='Password for connecting to Swift'),
+    cfg.StrOpt('project_name',
+               help='Project name for connecting to Swift'),
+    cfg.StrOpt('user_domain_name', default='Default',
+               help='Domain name of the user'),
+    cfg.StrOpt('project_domain_name', default='Default',
+               help='Domain name of the project'),
+    cfg.StrOpt('region_name',
+               help='Region of the Swift endpoint'),
+    cfg.StrOpt('container', default='designate-exports',
+               help='The container zone exports are written to'),
+]
+
+
+def register_opts(conf):
+    conf.register_group(EXPORT_STORE_GROUP)
+    conf.register_opts(EXPORT_STORE_OPTS, group=EXPORT_STORE_GROUP)
+    conf.register_group(EXPORT_STORE_FILESYSTEM_GROUP)
+    conf.register_opts(EXPORT_STORE_FILESYSTEM_OPTS,
+                       group=EXPORT_STORE_FILESYSTEM_GROUP)
+    conf.register_group(EXPORT_STORE_SWIFT_GROUP)
+    conf.register_opts(EXPORT_STORE_SWIFT_OPTS,
+                       group=EXPORT_STORE_SWIFT_GROUP)
+
+
+def list_opts():
+    return {
+        EXPORT_STORE_GROUP: EXPORT_STORE_OPTS,
+        EXPORT_STORE_FILESYSTEM_GROUP: EXPORT_STORE_FILESYSTEM_OPTS,
+        EXPORT_STORE_SWIFT_GROUP: EXPORT_STORE_SWIFT_OPTS,
+    }
@@ -23,14 +23,34 @@ MDNS_GROUP = cfg.OptGroup(
 
 MDNS_OPTS = [
     cfg.IntOpt('workers',
-               help='Number of mdns worker processes to spawn'),
+               help='Number of mdns worker processes to spawn. Each one '
+                    'binds its own sockets with SO_REUSEPORT, so the kernel '
+                    'spreads DNS queries across them and they can use a CPU '
+                    'core each'),
     cfg.IntOpt('threads', default=1000,
                help='Number of mdns greenthreads to spawn'),
     cfg.ListOpt('listen',
                 default=['0.0.0.0:%d' % DEFAULT_MDNS_PORT],
                 help='mDNS host:port pairs to listen on'),
+    cfg.IntOpt('udp_handler_threads', default=0, min=0,
+               help='Number of greenthreads handling DNS queries over UDP, '
+                    'fed through a bounded queue by a loop reading the '
+                    'socket in batches. 0 handles every query in a '
+                    'greenthread of its own instead'),
+    cfg.IntOpt('udp_queue_size', default=1000, min=1,
+               help='Maximum number of DNS queries over UDP waiting for a '
+                    'handler, when udp_handler_threads is set'),
+    cfg.StrOpt('udp_overload_action', default='drop',
+               choices=['drop', 'refuse'],
+               help='What to do with DNS queries over UDP that arrive while '
+                    'the queue is full: drop them, or answer REFUSED'),
     cfg.IntOpt('tcp_backlog', default=100,
                help='mDNS TCP Backlog'),
+    cfg.IntOpt('tcp_max_pipelined', default=16, min=1,
+               help='Maximum number of queries pipelined over a TCP '
+                    'connection to process concurrently. Responses are sent '
+                    'as soon as they are ready, possibly out of order. 1 '
+                    'processes them one after the other'),
     cfg.FloatOpt('tcp_recv_timeout', default=0.5,
                  help='mDNS TCP Receive Timeout'),
     cfg.BoolOpt('all_tcp', default=False,
@@ -46,6 +66,51 @@ MDNS_OPTS = [
                help='RPC topic name for mdns'),
     cfg.IntOpt('xfr_timeout', help="Timeout in seconds for XFR's.",
                default=10),
+    cfg.BoolOpt('zone_cache_enabled', default=False,
+                help='Cache zones and their rendered RRsets in memory to '
+                     'answer queries and AXFRs without reading every record '
+                     'from storage. Zones are cached when they are '
+                     'transferred'),
+    cfg.IntOpt('zone_cache_size', default=256, min=1,
+               help='Approximate memory budget of the zone cache, in MiB'),
+    cfg.FloatOpt('zone_cache_revalidate_interval', default=0.0, min=0.0,
+                 help='Seconds a cached zone is used before its serial is '
+                      'checked against storage again. 0 checks the serial '
+                      'on every use'),
+    cfg.BoolOpt('answer_cache_enabled', default=False,
+                help='Cache the answers to record queries, such as the SOA '
+                     'queries secondaries poll with, so repeated queries '
+                     'are answered without looking the records up in '
+                     'storage'),
+    cfg.IntOpt('answer_cache_size', default=10000, min=1,
+               help='Maximum number of answers to cache'),
+    cfg.FloatOpt('answer_cache_revalidate_interval', default=0.0, min=0.0,
+                 help='Seconds a cached answer is used before the serial of '
+                      'its zone is checked against storage again. 0 checks '
+                      'the serial on every use. Changes to a zone may not '
+                      'be seen by secondaries notified of them for up to '
+                      'this long'),
+    cfg.FloatOpt('answer_cache_negative_ttl', default=5.0, min=0.0,
+                 help='Seconds a refused answer is cached for, and so how '
+                      'long a new record or zone may be refused for. 0 '
+                      'does not cache refused answers'),
+    cfg.BoolOpt('axfr_snapshot_enabled', default=False,
+                help='Keep the rendered messages of each AXFR, so further '
+                     'transfers of the same zone serial only need to update '
+                     'the message IDs and TSIG signatures'),
+    cfg.IntOpt('axfr_snapshot_size', default=512, min=1,
+               help='Approximate size budget of the AXFR snapshots, in MiB'),
+    cfg.FloatOpt('tsigkey_cache_ttl', default=60.0, min=0.0,
+                 help='Seconds a TSIG key is used for after it was loaded '
+                      'from storage. Keys changed through central are '
+                      'dropped right away. 0 disables the cache'),
+    cfg.IntOpt('tsigkey_cache_size', default=1024, min=1,
+               help='Maximum number of TSIG keys to cache'),
+    cfg.StrOpt('axfr_snapshot_path',
+               help='Directory to store AXFR snapshots in. They are memory '
+                    'mapped and can be shared by every mDNS process using '
+                    'the same directory. Snapshots are kept in memory when '
+                    'unset'),
 ]
 
 
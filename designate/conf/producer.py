@@ -45,6 +45,11 @@ PRODUCER_TASK_ZONE_PURGE_GROUP = cfg.OptGroup(
     title='Configuration for Producer Task: Zone Purge'
 )
 
+PRODUCER_TASK_ZONE_JOURNAL_PURGE_GROUP = cfg.OptGroup(
+    name='producer_task:zone_journal_purge',
+    title='Configuration for Producer Task: Zone Journal Purge'
+)
+
 PRODUCER_OPTS = [
     cfg.IntOpt('workers',
                help='Number of Producer worker processes to spawn'),
@@ -104,6 +109,16 @@ PRODUCER_TASK_ZONE_PURGE_OPTS = [
                help='How many zones to be purged on each run'),
 ]
 
+PRODUCER_TASK_ZONE_JOURNAL_PURGE_OPTS = [
+    cfg.IntOpt('interval', default=3600,
+               help='Run interval in seconds'),
+    cfg.IntOpt('per_page', default=100,
+               help='Default amount of results returned per page'),
+    cfg.IntOpt('time_threshold', default=86400,
+               help='How old zone journal entries should be (created_at) to '
+                    'be purged, in seconds'),
+]
+
 
 def register_opts(conf):
     conf.register_group(PRODUCER_GROUP)
@@ -123,6 +138,9 @@ def register_opts(conf):
     conf.register_group(PRODUCER_TASK_ZONE_PURGE_GROUP)
     conf.register_opts(PRODUCER_TASK_ZONE_PURGE_OPTS,
                        group=PRODUCER_TASK_ZONE_PURGE_GROUP)
+    conf.register_group(PRODUCER_TASK_ZONE_JOURNAL_PURGE_GROUP)
+    conf.register_opts(PRODUCER_TASK_ZONE_JOURNAL_PURGE_OPTS,
+                       group=PRODUCER_TASK_ZONE_JOURNAL_PURGE_GROUP)
 
 
 def list_opts():
@@ -137,4 +155,6 @@ def list_opts():
         PRODUCER_TASK_WORKER_PERIODIC_RECOVERY_GROUP:
             PRODUCER_TASK_WORKER_PERIODIC_RECOVERY_OPTS,
         PRODUCER_TASK_ZONE_PURGE_GROUP: PRODUCER_TASK_ZONE_PURGE_OPTS,
+        PRODUCER_TASK_ZONE_JOURNAL_PURGE_GROUP:
+            PRODUCER_TASK_ZONE_JOURNAL_PURGE_OPTS,
     }
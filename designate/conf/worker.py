@@ -24,6 +24,10 @@ WORKER_OPTS = [
                help='Number of Worker worker processes to spawn'),
     cfg.IntOpt('threads', default=200,
                help='Number of Worker threads to spawn per process'),
+    cfg.IntOpt('executor_queue_size', default=0, min=0,
+               help='The maximum number of zone operations waiting for a '
+                    'free thread, further operations block until one is '
+                    'available. 0 means unbounded'),
     # cfg.ListOpt('enabled_tasks',
     #             help='Enabled tasks to run'),
     cfg.StrOpt('storage_driver', default='sqlalchemy',
@@ -42,6 +46,40 @@ WORKER_OPTS = [
     cfg.IntOpt('poll_delay', default=5,
                help='The time to wait before sending the first request '
                     'to a server'),
+    cfg.BoolOpt('serial_poller_enabled', default=False,
+                help='Whether to send the SOA queries polling for zone '
+                     'serials over a small set of shared sockets per '
+                     'nameserver, rather than a new socket per query'),
+    cfg.IntOpt('serial_poller_sockets', default=2, min=1,
+               help='The number of UDP sockets the serial poller uses per '
+                    'nameserver'),
+    cfg.FloatOpt('serial_poller_min_timeout', default=0.2,
+                 help='The minimum time the serial poller waits for a '
+                      'response before retransmitting a query. The actual '
+                      'timeout adapts to the round trip times seen from '
+                      'each nameserver'),
+    cfg.FloatOpt('serial_poller_max_timeout', default=5.0,
+                 help='The maximum time the serial poller waits for a '
+                      'response before retransmitting a query'),
+    cfg.IntOpt('tcp_pool_size', default=4, min=0,
+               help='The number of idle TCP connections kept open per '
+                    'nameserver, for DNS queries sent over TCP when '
+                    '[service:mdns] all_tcp is set. 0 opens a new connection '
+                    'for every query'),
+    cfg.FloatOpt('tcp_pool_idle_timeout', default=20.0, min=0,
+                 help='The time an idle TCP connection to a nameserver is '
+                      'kept open for. Keep it below the time the '
+                      'nameservers close idle connections after, e.g. '
+                      '[service:agent] tcp_recv_timeout for designate-agent, '
+                      'or connections are reopened for every query. '
+                      'Connections the nameserver closed are not reused'),
+    cfg.FloatOpt('status_update_interval', default=0, min=0,
+                 help='The time zone status updates are collected for '
+                      'before they are sent to central in a single batch. '
+                      '0 sends every update on its own'),
+    cfg.IntOpt('status_update_batch_size', default=500, min=1,
+               help='The maximum number of zone status updates sent to '
+                    'central in a single batch'),
     cfg.BoolOpt('notify', default=True,
                 deprecated_for_removal=True,
                 deprecated_reason='This option is being removed to reduce '
@@ -13,6 +13,7 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
 import random
 import socket
 import time
@@ -21,6 +22,7 @@ from threading import Lock
 import six
 import dns
 import dns.exception
+import dns.name
 import dns.zone
 import eventlet
 from dns import rdatatype
@@ -31,6 +33,7 @@ import designate.conf
 from designate import context
 from designate import exceptions
 from designate import objects
+from designate.metrics import metrics
 
 CONF = designate.conf.CONF
 LOG = logging.getLogger(__name__)
@@ -137,24 +140,140 @@ class SerializationMiddleware(DNSMiddleware):
                     LOG.error("Unexpected response %r", response)
 
 
+class CachedTsigKey(object):
+    """A TSIG key and its decoded secret, as held by the TsigKeyCache"""
+
+    def __init__(self, tsigkey):
+        self.tsigkey = tsigkey
+        self.secret = base64.decode_as_bytes(tsigkey.secret)
+        self.loaded_at = time.time()
+
+
+class TsigKeyCache(object):
+    """
+    Per process LRU cache of TSIG keys by name.
+
+    A key is used for at most `tsigkey_cache_ttl` seconds after it was
+    loaded, and is reloaded in the background once it is half that old, so
+    keys in use are rarely loaded while a request waits. Keys are dropped as
+    soon as central announces they changed. A TTL of 0 disables caching.
+    """
+
+    def __init__(self, storage, ttl=None, max_size=None):
+        self.storage = storage
+
+        if ttl is None:
+            ttl = CONF['service:mdns'].tsigkey_cache_ttl
+        if max_size is None:
+            max_size = CONF['service:mdns'].tsigkey_cache_size
+
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._lock = Lock()
+        self._keys = collections.OrderedDict()
+        self._refreshing = set()
+        # Bumped by every invalidation, so loads that overlap one are not kept
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, name):
+        """Fetch a TSIG key by name, or raise TsigKeyNotFound"""
+        with self._lock:
+            key = self._keys.get(name)
+            if key is not None:
+                self._keys.move_to_end(name)
+            generation = self._generation
+
+        if key is not None:
+            age = time.time() - key.loaded_at
+            if age < self.ttl:
+                metrics.counter('tsigkey_cache.hit').increment()
+                if age >= self.ttl / 2:
+                    self._refresh(name, generation)
+                return key
+
+        metrics.counter('tsigkey_cache.miss').increment()
+        return self._load(name, generation)
+
+    def invalidate(self, name):
+        with self._lock:
+            self._generation += 1
+            if self._keys.pop(name, None) is not None:
+                metrics.counter('tsigkey_cache.invalidate').increment()
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._keys.clear()
+
+    def _load(self, name, generation):
+        # Cached keys are shared by every request, so they are not loaded
+        # with the context of any one of them.
+        tsigkey = self.storage.find_tsigkey(
+            context.DesignateContext.get_admin_context(all_tenants=True),
+            {'name': name})
+        key = CachedTsigKey(tsigkey)
+
+        if self.ttl <= 0:
+            return key
+
+        with self._lock:
+            if self._generation == generation:
+                self._keys.pop(name, None)
+                self._keys[name] = key
+                while len(self._keys) > self.max_size:
+                    self._keys.popitem(last=False)
+                    metrics.counter('tsigkey_cache.evict').increment()
+
+        return key
+
+    def _refresh(self, name, generation):
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+
+        eventlet.spawn_n(self._background_load, name, generation)
+
+    def _background_load(self, name, generation):
+        try:
+            self._load(name, generation)
+        except exceptions.TsigKeyNotFound:
+            self.invalidate(name)
+        except Exception:
+            LOG.exception('Failed to refresh TSIG key %s', name)
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+
+def _key_name(key):
+    name = key.to_text(True)
+    if six.PY3 and isinstance(name, bytes):
+        name = name.decode('utf-8')
+    return name
+
+
 class TsigInfoMiddleware(DNSMiddleware):
     """Middleware which looks up the information available for a TsigKey"""
 
-    def __init__(self, application, storage):
+    def __init__(self, application, storage, tsigkey_cache=None):
         super(TsigInfoMiddleware, self).__init__(application)
         self.storage = storage
+        if tsigkey_cache is None:
+            tsigkey_cache = TsigKeyCache(storage, ttl=0)
+        self.tsigkey_cache = tsigkey_cache
 
     def process_request(self, request):
         if not request.had_tsig:
             return None
 
         try:
-            name = request.keyname.to_text(True)
-            if six.PY3 and isinstance(name, bytes):
-                name = name.decode('utf-8')
-            criterion = {'name': name}
-            tsigkey = self.storage.find_tsigkey(
-                    context.get_current(), criterion)
+            tsigkey = self.tsigkey_cache.get(
+                _key_name(request.keyname)).tsigkey
 
             request.environ['tsigkey'] = tsigkey
             request.environ['context'].tsigkey_id = tsigkey.id
@@ -170,22 +289,18 @@ class TsigInfoMiddleware(DNSMiddleware):
 class TsigKeyring(object):
     """Implements the DNSPython KeyRing API, backed by the Designate DB"""
 
-    def __init__(self, storage):
+    def __init__(self, storage, tsigkey_cache=None):
         self.storage = storage
+        if tsigkey_cache is None:
+            tsigkey_cache = TsigKeyCache(storage, ttl=0)
+        self.tsigkey_cache = tsigkey_cache
 
     def __getitem__(self, key):
         return self.get(key)
 
     def get(self, key, default=None):
         try:
-            name = key.to_text(True)
-            if six.PY3 and isinstance(name, bytes):
-                name = name.decode('utf-8')
-            criterion = {'name': name}
-            tsigkey = self.storage.find_tsigkey(
-                context.get_current(), criterion)
-
-            return base64.decode_as_bytes(tsigkey.secret)
+            return self.tsigkey_cache.get(_key_name(key)).secret
 
         except exceptions.TsigKeyNotFound:
             return default
@@ -298,6 +413,140 @@ def from_dnspython_zone(dnspython_zone):
     return zone
 
 
+def _zonefile_code(line, depth):
+    """
+    The part of a zonefile line before its comment, and the depth of the
+    parentheses at its end.
+    """
+    if '"' not in line and '\\' not in line:
+        code = line.split(';', 1)[0]
+        return code, depth + code.count('(') - code.count(')')
+
+    quoted = escaped = False
+    for i, char in enumerate(line):
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == ';':
+            return line[:i], depth
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+    return line, depth
+
+
+class ZoneFileReader(object):
+    """
+    Read a zonefile in batches of about `batch_size` names, rather than
+    building one zone out of all of them.
+
+    The zonefile is split into chunks of text, each parsed on its own by
+    dns.zone.from_text after the $ORIGIN and $TTL in effect where it starts.
+    Chunks only start at a line with an owner name, outside parentheses. The
+    first one runs at least to the SOA, whose minimum is the default TTL of
+    the others when there is no $TTL, as it is for a whole zonefile.
+
+    Each batch is a dnspython zone holding some of the nodes. The first one
+    holds the SOA. Records of a name are kept together while they are
+    contiguous in the zonefile, but a name or rdataset that reappears later
+    on ends up in more than one batch.
+
+    A zonefile without an SOA at its origin raises dns.zone.NoSOA.
+    """
+
+    def __init__(self, text, batch_size=1000):
+        self.text = text
+        self.batch_size = batch_size
+
+    def __iter__(self):
+        # The origin of the zone, and the default TTL once the SOA is read
+        origin = None
+        soa_ttl = None
+        # The $ORIGIN and $TTL in effect at the end of the chunk
+        current_origin = None
+        default_ttl = None
+
+        prefix = ''
+        chunk = []
+        names = 0
+        last_owner = None
+        seen_soa = False
+        depth = 0
+
+        for line in six.StringIO(self.text):
+            starts_inside = depth > 0
+            code, depth = _zonefile_code(line, depth)
+            tokens = code.split()
+            if starts_inside or not tokens:
+                chunk.append(line)
+                continue
+
+            if line[0] == '$':
+                directive = tokens[0].upper()
+                if directive == '$ORIGIN' and len(tokens) > 1:
+                    current_origin = dns.name.from_text(
+                        tokens[1], current_origin)
+                elif directive == '$TTL' and len(tokens) > 1:
+                    default_ttl = tokens[1]
+                chunk.append(line)
+                continue
+
+            owner = None if line[0].isspace() else tokens[0]
+            if owner is not None and owner != last_owner:
+                if seen_soa and names >= self.batch_size:
+                    zone = self._parse(prefix, chunk, origin)
+                    if origin is None:
+                        origin, soa_ttl = self._check_soa(zone)
+
+                    prefix = '$ORIGIN %s\n' % current_origin.to_text()
+                    ttl = default_ttl or soa_ttl
+                    if ttl is not None:
+                        prefix += '$TTL %s\n' % ttl
+                    chunk = []
+                    names = 0
+                    yield zone
+
+                names += 1
+                last_owner = owner
+
+            if not seen_soa:
+                types = tokens[1:4] if owner is not None else tokens[:3]
+                seen_soa = 'SOA' in (token.upper() for token in types)
+
+            chunk.append(line)
+
+        zone = self._parse(prefix, chunk, origin)
+        if origin is None:
+            self._check_soa(zone)
+        if zone.nodes or origin is None:
+            yield zone
+
+    @staticmethod
+    def _parse(prefix, chunk, origin):
+        return dns.zone.from_text(
+            prefix + ''.join(chunk), origin=origin,
+            # Don't relativize, or we end up with '@' record names.
+            relativize=False,
+            # Don't check origin, we allow missing NS records.
+            check_origin=False)
+
+    @staticmethod
+    def _check_soa(zone):
+        """
+        :returns: The origin of the zone, and the minimum of its SOA
+        """
+        soa = zone.get_rdataset(zone.origin, 'SOA')
+        if soa is None:
+            raise dns.zone.NoSOA()
+        return zone.origin, soa[0].minimum
+
+
 def dnspyrecords_to_recordsetlist(dnspython_records):
     rrsets = objects.RecordSetList()
 
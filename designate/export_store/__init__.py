@@ -0,0 +1,66 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import zlib
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from designate.export_store import base
+
+
+LOG = logging.getLogger(__name__)
+
+BLOCK_SIZE = 65536
+
+
+def get_export_store(driver=None):
+    """Load an export store driver, by default the configured one"""
+    driver = driver or cfg.CONF['export_store'].driver
+
+    LOG.debug("Loading export store driver: %s", driver)
+
+    cls = base.ExportStore.get_driver(driver)
+
+    return cls()
+
+
+def get_location_driver(location):
+    """The name of the driver a location was written by"""
+    return location.split('://', 1)[0]
+
+
+def buffer_chunks(chunks, block_size=BLOCK_SIZE):
+    """Join small byte strings into blocks of about block_size bytes"""
+    block = []
+    size = 0
+    for chunk in chunks:
+        block.append(chunk)
+        size += len(chunk)
+        if size >= block_size:
+            yield b''.join(block)
+            block = []
+            size = 0
+
+    if block:
+        yield b''.join(block)
+
+
+def gzip_chunks(chunks):
+    """Compress byte strings into the gzip format"""
+    compressor = zlib.compressobj(
+        zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
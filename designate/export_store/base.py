@@ -0,0 +1,70 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import abc
+
+import six
+
+from designate.plugin import DriverPlugin
+
+
+@six.add_metaclass(abc.ABCMeta)
+class ExportStore(DriverPlugin):
+
+    """Base class for the stores of asynchronous zone exports"""
+    __plugin_ns__ = 'designate.export_store'
+    __plugin_type__ = 'export_store'
+
+    def get_location(self, name):
+        return '%s://%s' % (self.get_plugin_name(), name)
+
+    def get_name(self, location):
+        prefix = '%s://' % self.get_plugin_name()
+        if not location.startswith(prefix):
+            raise ValueError('%s is not a location of this store' % location)
+        return location[len(prefix):]
+
+    @abc.abstractmethod
+    def write(self, name, chunks):
+        """
+        Write a zone export.
+
+        :param name: Name of the export in the store.
+        :param chunks: Iterable of the byte strings of the export.
+        :return: The location of the export.
+        """
+
+    @abc.abstractmethod
+    def get_size(self, location):
+        """
+        Get the size of a zone export in bytes.
+
+        :param location: Location of the export.
+        """
+
+    @abc.abstractmethod
+    def read(self, location, start=0, stop=None):
+        """
+        Read a zone export, yielding its bytes in blocks.
+
+        :param location: Location of the export.
+        :param start: Offset of the first byte to read.
+        :param stop: Offset after the last byte to read, None to read up to
+                     the end of the export.
+        """
+
+    @abc.abstractmethod
+    def delete(self, location):
+        """
+        Delete a zone export.
+
+        :param location: Location of the export.
+        """
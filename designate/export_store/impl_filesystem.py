@@ -0,0 +1,92 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+import tempfile
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from designate import exceptions
+from designate import export_store
+from designate.export_store import base
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+
+class FilesystemExportStore(base.ExportStore):
+    """Store zone exports as files in a directory"""
+    __plugin_name__ = 'filesystem'
+
+    def __init__(self):
+        super(FilesystemExportStore, self).__init__()
+
+        self.path = CONF['export_store:filesystem'].path
+
+    def _get_path(self, location):
+        name = self.get_name(location)
+        if not name or os.path.basename(name) != name:
+            raise ValueError('Invalid zone export name %s' % name)
+        return os.path.join(self.path, name)
+
+    def write(self, name, chunks):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        location = self.get_location(name)
+        path = self._get_path(location)
+
+        # The export is renamed into place once complete, so a partial
+        # export is never read.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as output_fh:
+                for chunk in chunks:
+                    output_fh.write(chunk)
+            os.rename(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        LOG.debug('Wrote zone export %s', path)
+        return location
+
+    def get_size(self, location):
+        try:
+            return os.path.getsize(self._get_path(location))
+        except OSError:
+            raise exceptions.ZoneExportNotFound()
+
+    def read(self, location, start=0, stop=None):
+        try:
+            input_fh = open(self._get_path(location), 'rb')
+        except (IOError, OSError):
+            raise exceptions.ZoneExportNotFound()
+
+        with input_fh:
+            input_fh.seek(start)
+            remaining = None if stop is None else stop - start
+            while remaining is None or remaining > 0:
+                size = export_store.BLOCK_SIZE
+                if remaining is not None:
+                    size = min(size, remaining)
+                    remaining -= size
+                data = input_fh.read(size)
+                if not data:
+                    break
+                yield data
+
+    def delete(self, location):
+        try:
+            os.unlink(self._get_path(location))
+        except OSError:
+            raise exceptions.ZoneExportNotFound()
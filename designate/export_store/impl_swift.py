@@ -0,0 +1,104 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import importutils
+
+from designate import exceptions
+from designate import export_store
+from designate.export_store import base
+
+try:
+    swift_client = importutils.import_module('swiftclient.client')
+    swift_exceptions = importutils.import_module('swiftclient.exceptions')
+except ImportError:
+    swift_client = None
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+
+class SwiftExportStore(base.ExportStore):
+    """Store zone exports as objects in a Swift container"""
+    __plugin_name__ = 'swift'
+
+    def __init__(self):
+        super(SwiftExportStore, self).__init__()
+
+        # Ensure python-swiftclient has been installed
+        if swift_client is None:
+            raise exceptions.ConfigurationError(
+                'Dependency missing, please install python-swiftclient')
+
+        config = CONF['export_store:swift']
+        self.container = config.container
+        self.connection = swift_client.Connection(
+            authurl=config.auth_url,
+            user=config.username,
+            key=config.password,
+            auth_version='3',
+            os_options={
+                'project_name': config.project_name,
+                'user_domain_name': config.user_domain_name,
+                'project_domain_name': config.project_domain_name,
+                'region_name': config.region_name,
+            })
+
+    def write(self, name, chunks):
+        self.connection.put_container(self.container)
+        # An iterable is sent with chunked transfer encoding, without
+        # holding the whole export in memory.
+        self.connection.put_object(
+            self.container, name, contents=chunks,
+            content_type='text/dns')
+
+        LOG.debug('Wrote zone export %s to container %s',
+                  name, self.container)
+        return self.get_location(name)
+
+    def get_size(self, location):
+        try:
+            headers = self.connection.head_object(
+                self.container, self.get_name(location))
+        except swift_exceptions.ClientException as e:
+            if e.http_status == 404:
+                raise exceptions.ZoneExportNotFound()
+            raise
+
+        return int(headers['content-length'])
+
+    def read(self, location, start=0, stop=None):
+        headers = {}
+        if start or stop is not None:
+            headers['Range'] = 'bytes=%d-%s' % (
+                start, '' if stop is None else stop - 1)
+
+        try:
+            _, body = self.connection.get_object(
+                self.container, self.get_name(location), headers=headers,
+                resp_chunk_size=export_store.BLOCK_SIZE)
+        except swift_exceptions.ClientException as e:
+            if e.http_status == 404:
+                raise exceptions.ZoneExportNotFound()
+            raise
+
+        for data in body:
+            yield data
+
+    def delete(self, location):
+        try:
+            self.connection.delete_object(
+                self.container, self.get_name(location))
+        except swift_exceptions.ClientException as e:
+            if e.http_status == 404:
+                raise exceptions.ZoneExportNotFound()
+            raise
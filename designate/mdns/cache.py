@@ -0,0 +1,649 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import hashlib
+import itertools
+import mmap
+import operator
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import dns.name
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
+import dns.rrset
+import dns.tokenizer
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from designate import exceptions
+from designate.metrics import metrics
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+# Rough per-RR bookkeeping overhead (rdata object, list slot, rrset share)
+# used when estimating how much memory a cached zone occupies.
+RR_OVERHEAD = 128
+
+# How many zones too large for the zone cache are remembered, so they are
+# not built again until their serial changes.
+TOO_LARGE_ZONES = 1024
+
+# Each rendered AXFR message in a snapshot is prefixed with its answer count
+# and length.
+PACKET_HEADER = struct.Struct('!HH')
+
+# The rdata type and the class used to parse it, by type name.
+_RDATA_TYPES = {}
+
+
+def get_rdata_type(rrtype):
+    """Look up the rdata type and rdata class of a record type name"""
+    try:
+        return _RDATA_TYPES[rrtype]
+    except KeyError:
+        rdtype = dns.rdatatype.from_text(rrtype)
+        rdcls = dns.rdata.get_rdata_class(dns.rdataclass.IN, rdtype)
+        _RDATA_TYPES[rrtype] = (rdtype, rdcls)
+        return rdtype, rdcls
+
+
+def rrsets_from_rows(rows, default_ttl):
+    """
+    Build an RRset for each recordset in rows of find_recordsets_axfr.
+
+    The rows are ordered by recordset id, so every recordset is a run of
+    consecutive rows which becomes a single RRset.
+    """
+    for _, group in itertools.groupby(rows, key=operator.itemgetter(0)):
+        row = next(group)
+        rdtype, rdcls = get_rdata_type(str(row[1]))
+
+        rrset = dns.rrset.RRset(
+            dns.name.from_text(str(row[3])), dns.rdataclass.IN, rdtype)
+        rrset.update_ttl(int(row[2]) if row[2] is not None else default_ttl)
+
+        for row in itertools.chain((row,), group):
+            data = str(row[4])
+            if data.startswith('\\#'):
+                # Generic rdata syntax, leave it to dnspython
+                rdata = dns.rdata.from_text(dns.rdataclass.IN, rdtype, data)
+            else:
+                rdata = rdcls.from_text(
+                    dns.rdataclass.IN, rdtype, dns.tokenizer.Tokenizer(data),
+                    None, True)
+            rrset.add(rdata)
+
+        yield rrset
+
+
+class CachedZone(object):
+    """An immutable, fully rendered copy of a zone held by the ZoneCache"""
+
+    def __init__(self, zone, soa, rrsets, size):
+        self.id = zone.id
+        self.name = zone.name
+        self.pool_id = zone.pool_id
+        self.serial = zone.serial
+        self.ttl = zone.ttl
+
+        self.soa = soa
+        self.rrsets = rrsets
+        self.size = size
+        self.checked_at = time.time()
+
+        self._index = {}
+        for rrset in ([soa] if soa is not None else []) + rrsets:
+            self._index[(rrset.name.to_text(), rrset.rdtype)] = rrset
+
+    def get_rrset(self, name, rdtype):
+        return self._index.get((name, rdtype))
+
+    def matches(self, criterion):
+        """Check the cached zone against a zone criterion built from a
+        request, the same way storage would have filtered the zone.
+        """
+        for key, value in criterion.items():
+            if getattr(self, key, None) != value:
+                return False
+        return True
+
+
+class ZoneCache(object):
+    """
+    Per process LRU cache of zones and their pre-built dnspython RRsets.
+
+    Entries are validated against the serial currently in storage, at most
+    every `zone_cache_revalidate_interval` seconds, and dropped as soon as
+    the serial differs. The cache is bounded by an approximate memory
+    budget rather than by the number of zones. Zones that don't fit in it
+    are remembered by serial, and not built again until it changes.
+    """
+
+    def __init__(self, storage, max_size=None, revalidate_interval=None):
+        self.storage = storage
+
+        if max_size is None:
+            max_size = CONF['service:mdns'].zone_cache_size * 1024 * 1024
+        if revalidate_interval is None:
+            revalidate_interval = (
+                CONF['service:mdns'].zone_cache_revalidate_interval)
+
+        self.max_size = max_size
+        self.revalidate_interval = revalidate_interval
+        self.size = 0
+
+        self._lock = threading.Lock()
+        self._zones = collections.OrderedDict()
+        self._names = {}
+        self._too_large = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._zones)
+
+    def get(self, context, name):
+        """Fetch a valid cached zone by name, or None"""
+        zone_id = self._names.get(name)
+        if zone_id is None:
+            metrics.counter('mdns.zone_cache.miss').increment()
+            return None
+        return self.get_by_id(context, zone_id)
+
+    def get_by_id(self, context, zone_id):
+        """Fetch a valid cached zone by id, or None"""
+        zone = self._zones.get(zone_id)
+        if zone is None or not self._validate(context, zone):
+            metrics.counter('mdns.zone_cache.miss').increment()
+            return None
+
+        with self._lock:
+            if zone_id in self._zones:
+                self._zones.move_to_end(zone_id)
+
+        metrics.counter('mdns.zone_cache.hit').increment()
+        return zone
+
+    def lookup(self, context, name):
+        """Find the closest enclosing cached zone for an owner name"""
+        labels = name.rstrip('.').split('.')
+        for i in range(len(labels)):
+            zone_name = '.'.join(labels[i:]) + '.'
+            if zone_name in self._names:
+                return self.get(context, zone_name)
+
+        metrics.counter('mdns.zone_cache.miss').increment()
+        return None
+
+    def load(self, context, zone):
+        """
+        Build and cache a zone from storage, returning the CachedZone, or
+        None if it can't be built or is known not to fit in the cache.
+        """
+        if self._too_large.get(zone.id) == zone.serial:
+            metrics.counter('mdns.zone_cache.too_large').increment()
+            return None
+
+        start_time = time.time()
+        try:
+            rows = self.storage.iter_recordsets_axfr(
+                context, {'zone_id': zone.id})
+            cached = self._build(zone, rows)
+        finally:
+            metrics.timing('mdns.zone_cache.load', time.time() - start_time)
+
+        if cached.soa is None:
+            LOG.warning('Not caching %(zone)s, no SOA record was found',
+                        {'zone': zone.name})
+            return None
+
+        if cached.size > self.max_size:
+            LOG.debug('Not caching %(zone)s, it exceeds the cache size',
+                      {'zone': zone.name})
+            with self._lock:
+                self._too_large.pop(zone.id, None)
+                self._too_large[zone.id] = zone.serial
+                while len(self._too_large) > TOO_LARGE_ZONES:
+                    self._too_large.popitem(last=False)
+            metrics.counter('mdns.zone_cache.too_large').increment()
+            return cached
+
+        with self._lock:
+            self._remove(zone.id)
+            self._zones[zone.id] = cached
+            self._names[cached.name] = zone.id
+            self.size += cached.size
+            self._evict()
+
+        metrics.gauge().send('mdns.zone_cache.size', self.size)
+        return cached
+
+    def invalidate(self, zone_id):
+        with self._lock:
+            if self._remove(zone_id):
+                metrics.counter('mdns.zone_cache.invalidate').increment()
+
+    def clear(self):
+        with self._lock:
+            self._zones.clear()
+            self._names.clear()
+            self._too_large.clear()
+            self.size = 0
+
+    def _validate(self, context, zone):
+        now = time.time()
+        if now - zone.checked_at < self.revalidate_interval:
+            return True
+
+        try:
+            serial = self.storage.get_zone_serial(context, zone.id)
+        except exceptions.ZoneNotFound:
+            serial = None
+
+        if serial != zone.serial:
+            LOG.debug('Serial for cached zone %(zone)s changed from '
+                      '%(old)s to %(new)s, invalidating',
+                      {'zone': zone.name, 'old': zone.serial, 'new': serial})
+            self.invalidate(zone.id)
+            return False
+
+        zone.checked_at = now
+        return True
+
+    def _remove(self, zone_id):
+        zone = self._zones.pop(zone_id, None)
+        if zone is None:
+            return False
+        if self._names.get(zone.name) == zone_id:
+            del self._names[zone.name]
+        self.size -= zone.size
+        return True
+
+    def _evict(self):
+        while self.size > self.max_size and self._zones:
+            zone_id, zone = self._zones.popitem(last=False)
+            if self._names.get(zone.name) == zone_id:
+                del self._names[zone.name]
+            self.size -= zone.size
+            metrics.counter('mdns.zone_cache.evict').increment()
+
+    @staticmethod
+    def _build(zone, rows):
+        soa = None
+        rrsets = []
+        size = 0
+
+        def _measure(rows):
+            nonlocal size
+            for row in rows:
+                size += len(row[3]) + len(row[4]) + RR_OVERHEAD
+                yield row
+
+        for rrset in rrsets_from_rows(_measure(rows), zone.ttl):
+            if rrset.rdtype == dns.rdatatype.SOA:
+                soa = rrset
+            else:
+                rrsets.append(rrset)
+
+        return CachedZone(zone, soa, rrsets, size)
+
+
+class CachedAnswer(object):
+    """The answer to a query held by the AnswerCache.
+
+    Positive answers belong to a zone, and are only valid as long as its
+    serial is the one they were read at. Refused answers have no zone, and
+    expire on their own.
+    """
+
+    __slots__ = ('zone_id', 'serial', 'rrset', 'expires_at', 'used')
+
+    def __init__(self, zone_id=None, serial=None, rrset=None,
+                 expires_at=None):
+        self.zone_id = zone_id
+        self.serial = serial
+        self.rrset = rrset
+        self.expires_at = expires_at
+        self.used = False
+
+    @property
+    def refused(self):
+        return self.zone_id is None
+
+
+class AnswerCache(object):
+    """
+    Per process cache of the answers to record queries, keyed by question
+    name, type and the scope of the TSIG key the query was signed with.
+
+    Positive answers are validated against the serial of their zone in
+    storage, at most every `answer_cache_revalidate_interval` seconds and
+    once for every answer of the zone, and dropped as soon as it differs.
+    Refused answers are kept for `answer_cache_negative_ttl` seconds.
+
+    Lookups don't take the lock. Rather than reordering entries on every
+    hit, hits mark them as used, and eviction gives used entries a second
+    chance before dropping them.
+    """
+
+    def __init__(self, storage, max_size=None, revalidate_interval=None,
+                 negative_ttl=None):
+        self.storage = storage
+
+        if max_size is None:
+            max_size = CONF['service:mdns'].answer_cache_size
+        if revalidate_interval is None:
+            revalidate_interval = (
+                CONF['service:mdns'].answer_cache_revalidate_interval)
+        if negative_ttl is None:
+            negative_ttl = CONF['service:mdns'].answer_cache_negative_ttl
+
+        self.max_size = max_size
+        self.revalidate_interval = revalidate_interval
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        self._answers = collections.OrderedDict()
+        # The serial answers of each zone were read at, when it was last
+        # checked, and the keys of those answers.
+        self._serials = {}
+        self._zone_keys = {}
+
+    def __len__(self):
+        return len(self._answers)
+
+    def get(self, context, key):
+        """Fetch a valid cached answer, or None"""
+        answer = self._answers.get(key)
+
+        if answer is None:
+            valid = False
+        elif answer.refused:
+            valid = time.time() < answer.expires_at
+        else:
+            valid = self._validate(context, answer.zone_id)
+
+        if not valid:
+            metrics.counter('mdns.answer_cache.miss').increment()
+            return None
+
+        answer.used = True
+        if answer.refused:
+            metrics.counter('mdns.answer_cache.negative_hit').increment()
+        else:
+            metrics.counter('mdns.answer_cache.hit').increment()
+        return answer
+
+    def set_answer(self, key, zone_id, serial, rrset):
+        with self._lock:
+            checked = self._serials.get(zone_id)
+            if checked is not None and checked[0] != serial:
+                self._invalidate(zone_id)
+
+            self._remove(key)
+            self._serials.setdefault(zone_id, (serial, time.time()))
+            self._zone_keys.setdefault(zone_id, set()).add(key)
+            self._answers[key] = CachedAnswer(zone_id, serial, rrset)
+            self._evict()
+
+    def set_refused(self, key):
+        if self.negative_ttl <= 0:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._answers[key] = CachedAnswer(
+                expires_at=time.time() + self.negative_ttl)
+            self._evict()
+
+    def invalidate(self, zone_id):
+        with self._lock:
+            invalidated = self._invalidate(zone_id)
+
+        if invalidated:
+            metrics.counter('mdns.answer_cache.invalidate').increment()
+
+    def clear(self):
+        with self._lock:
+            self._answers.clear()
+            self._serials.clear()
+            self._zone_keys.clear()
+
+    def _validate(self, context, zone_id):
+        checked = self._serials.get(zone_id)
+        if checked is None:
+            return False
+
+        serial, checked_at = checked
+        now = time.time()
+        if now - checked_at < self.revalidate_interval:
+            return True
+
+        try:
+            current = self.storage.get_zone_serial(context, zone_id)
+        except exceptions.ZoneNotFound:
+            current = None
+
+        if current != serial:
+            LOG.debug('Serial for zone %(zone)s changed from %(old)s to '
+                      '%(new)s, invalidating cached answers',
+                      {'zone': zone_id, 'old': serial, 'new': current})
+            self.invalidate(zone_id)
+            return False
+
+        if zone_id in self._zone_keys:
+            self._serials[zone_id] = (serial, now)
+        return True
+
+    def _evict(self):
+        while len(self._answers) > self.max_size:
+            key, answer = self._answers.popitem(last=False)
+            if answer.used:
+                answer.used = False
+                self._answers[key] = answer
+                continue
+            self._forget(key, answer)
+            metrics.counter('mdns.answer_cache.evict').increment()
+
+    def _remove(self, key):
+        answer = self._answers.pop(key, None)
+        if answer is not None:
+            self._forget(key, answer)
+
+    def _forget(self, key, answer):
+        if answer.refused:
+            return
+        keys = self._zone_keys.get(answer.zone_id)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self._zone_keys[answer.zone_id]
+            self._serials.pop(answer.zone_id, None)
+
+    def _invalidate(self, zone_id):
+        self._serials.pop(zone_id, None)
+        keys = self._zone_keys.pop(zone_id, ())
+        for key in keys:
+            self._answers.pop(key, None)
+        return bool(keys)
+
+
+class AXFRSnapshot(object):
+    """
+    The rendered, unsigned messages of an AXFR.
+
+    Every message is stored without its 12 byte header, which is written
+    per transfer along with the message ID, flags and TSIG.
+    """
+
+    def __init__(self, buf, path=None):
+        self.buf = buf
+        self.path = path
+        self.size = len(buf)
+
+        self.packets = []
+        offset = 0
+        while offset < self.size:
+            ancount, length = PACKET_HEADER.unpack_from(buf, offset)
+            offset += PACKET_HEADER.size
+            self.packets.append((offset, length, ancount))
+            offset += length
+
+    def __iter__(self):
+        for offset, length, ancount in self.packets:
+            yield self.buf[offset:offset + length], ancount
+
+    def __len__(self):
+        return len(self.packets)
+
+    @staticmethod
+    def serialize(packets):
+        return b''.join(
+            PACKET_HEADER.pack(ancount, len(body)) + body
+            for body, ancount in packets
+        )
+
+
+class AXFRSnapshotCache(object):
+    """
+    Per process LRU cache of rendered AXFRs, keyed by zone id, serial,
+    maximum message size and question name.
+
+    When a path is configured, snapshots are written to files in it and
+    memory mapped, so large zones stay in the page cache rather than the
+    heap and are shared by every mDNS process using the same path.
+    """
+
+    def __init__(self, max_size=None, path=None):
+        if max_size is None:
+            max_size = CONF['service:mdns'].axfr_snapshot_size * 1024 * 1024
+        if path is None:
+            path = CONF['service:mdns'].axfr_snapshot_path
+
+        self.max_size = max_size
+        self.path = path
+        self.size = 0
+
+        self._lock = threading.Lock()
+        self._snapshots = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def get(self, key):
+        snapshot = self._snapshots.get(key)
+
+        if snapshot is None and self.path is not None:
+            snapshot = self._open(key)
+
+        if snapshot is None:
+            metrics.counter('mdns.axfr_snapshot.miss').increment()
+            return None
+
+        with self._lock:
+            if key in self._snapshots:
+                self._snapshots.move_to_end(key)
+
+        metrics.counter('mdns.axfr_snapshot.hit').increment()
+        return snapshot
+
+    def set(self, key, packets):
+        buf = AXFRSnapshot.serialize(packets)
+        if len(buf) > self.max_size:
+            return None
+
+        if self.path is not None:
+            snapshot = self._write(key, buf)
+        else:
+            snapshot = AXFRSnapshot(buf)
+
+        self._add(key, snapshot)
+        return snapshot
+
+    def _add(self, key, snapshot):
+        zone_id, serial = key[:2]
+
+        with self._lock:
+            # Snapshots of older serials of the zone will never be used again
+            for other in list(self._snapshots):
+                if other == key:
+                    self._remove(other, unlink=False)
+                elif other[0] == zone_id and other[1] != serial:
+                    self._remove(other)
+
+            self._snapshots[key] = snapshot
+            self.size += snapshot.size
+
+            while self.size > self.max_size and self._snapshots:
+                self._remove(next(iter(self._snapshots)))
+                metrics.counter('mdns.axfr_snapshot.evict').increment()
+
+        metrics.gauge().send('mdns.axfr_snapshot.size', self.size)
+
+    def _remove(self, key, unlink=True):
+        snapshot = self._snapshots.pop(key)
+        self.size -= snapshot.size
+
+        # The mapping itself is not closed here, a transfer in progress may
+        # still be reading from it. It goes away with the last reference.
+        if unlink and snapshot.path is not None:
+            try:
+                os.unlink(snapshot.path)
+            except OSError:
+                pass
+
+    def _filename(self, key):
+        zone_id, serial = key[:2]
+        digest = hashlib.md5(repr(key[2:]).encode('utf-8')).hexdigest()
+        return os.path.join(
+            self.path, '%s-%s-%s.axfr' % (zone_id, serial, digest))
+
+    def _open(self, key):
+        filename = self._filename(key)
+        try:
+            with open(filename, 'rb') as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        snapshot = AXFRSnapshot(buf, filename)
+        self._add(key, snapshot)
+        return snapshot
+
+    def _write(self, key, buf):
+        filename = self._filename(key)
+
+        # Write to a temporary file first, so other processes never map a
+        # partially written snapshot.
+        fd, tmp_filename = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(buf)
+        os.rename(tmp_filename, filename)
+
+        # Drop snapshots of older serials, possibly left by other processes
+        prefix = '%s-' % key[0]
+        for name in os.listdir(self.path):
+            if (name.startswith(prefix) and name.endswith('.axfr') and
+                    not name.startswith('%s%s-' % (prefix, key[1]))):
+                try:
+                    os.unlink(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+        with open(filename, 'rb') as f:
+            return AXFRSnapshot(
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), filename)
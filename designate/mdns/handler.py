@@ -13,6 +13,10 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
+import contextlib
+import itertools
+
 import dns
 import dns.flags
 import dns.message
@@ -26,7 +30,9 @@ import six
 
 from designate import exceptions
 from designate.central import rpcapi as central_api
+from designate.mdns import cache
 from designate.mdns import xfr
+from designate.metrics import metrics
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
@@ -46,6 +52,18 @@ class RequestHandler(xfr.XFRMixin):
         self.storage = storage
         self.tg = tg
 
+        self.zone_cache = None
+        if CONF['service:mdns'].zone_cache_enabled:
+            self.zone_cache = cache.ZoneCache(storage)
+
+        self.axfr_snapshots = None
+        if CONF['service:mdns'].axfr_snapshot_enabled:
+            self.axfr_snapshots = cache.AXFRSnapshotCache()
+
+        self.answer_cache = None
+        if CONF['service:mdns'].answer_cache_enabled:
+            self.answer_cache = cache.AnswerCache(storage)
+
     @property
     def central_api(self):
         if not self._central_api:
@@ -67,18 +85,19 @@ class RequestHandler(xfr.XFRMixin):
                 return
 
             q_rrset = request.question[0]
-            # Handle AXFR and IXFR requests with an AXFR responses for now.
-            # It is permissible for a server to send an AXFR response when
-            # receiving an IXFR request.
-            if q_rrset.rdtype in (dns.rdatatype.AXFR, dns.rdatatype.IXFR):
-                for response in self._handle_axfr(request):
-                    yield response
-                return
-
+            if q_rrset.rdtype == dns.rdatatype.AXFR:
+                handler = self._handle_axfr
+            elif q_rrset.rdtype == dns.rdatatype.IXFR:
+                handler = self._handle_ixfr
             else:
-                for response in self._handle_record_query(request):
+                handler = self._handle_record_query
+
+            # Queries never write, so they may be answered from a read
+            # replica. Transfers check the replica isn't behind first.
+            with self.storage.replica_reads():
+                for response in handler(request):
                     yield response
-                return
+            return
 
         elif request.opcode() == dns.opcode.NOTIFY:
             for response in self._handle_notify(request):
@@ -200,9 +219,11 @@ class RequestHandler(xfr.XFRMixin):
                                           'not implemented')
         return criterion
 
-    def _handle_axfr(self, request):
+    def _find_xfr_zone(self, request):
+        """Find the zone an AXFR or IXFR asks for, or None if refused"""
         context = request.environ['context']
         q_rrset = request.question[0]
+        qtype = dns.rdatatype.to_text(q_rrset.rdtype).lower()
 
         # First check if there is an existing zone
         # TODO(vinod) once validation is separated from the api,
@@ -213,61 +234,282 @@ class RequestHandler(xfr.XFRMixin):
                 name = name.decode('utf-8')
             criterion = self._zone_criterion_from_request(
                 request, {'name': name})
-            zone = self.storage.find_zone(context, criterion)
+            return self._find_axfr_zone(context, name, criterion)
         except exceptions.ZoneNotFound:
-            LOG.warning('ZoneNotFound while handling axfr request. '
-                        'Question was %(qr)s', {'qr': q_rrset})
+            LOG.warning('ZoneNotFound while handling %(qtype)s request. '
+                        'Question was %(qr)s', {'qtype': qtype, 'qr': q_rrset})
+        except exceptions.Forbidden:
+            LOG.warning('Forbidden while handling %(qtype)s request. '
+                        'Question was %(qr)s', {'qtype': qtype, 'qr': q_rrset})
+        return None
 
-            yield self._handle_query_error(request, dns.rcode.REFUSED)
+    @contextlib.contextmanager
+    def _xfr_zone(self, request):
+        """
+        Find the zone to transfer, guarding against a lagging read replica.
+
+        Transfers usually follow a NOTIFY for a change that was just
+        committed. If the zone found doesn't have the serial of the zone in
+        the primary database, the zone is found again, and the transfer is
+        served from the primary database.
+        """
+        zone = self._find_xfr_zone(request)
+        if zone is None or not self.storage.has_read_replica:
+            yield zone
             return
-        except exceptions.Forbidden:
-            LOG.warning('Forbidden while handling axfr request. '
-                        'Question was %(qr)s', {'qr': q_rrset})
 
-            yield self._handle_query_error(request, dns.rcode.REFUSED)
+        context = request.environ['context']
+        with self.storage.primary_reads():
+            try:
+                serial = self.storage.get_zone_serial(context, zone.id)
+            except exceptions.ZoneNotFound:
+                serial = None
+
+        if serial == zone.serial:
+            yield zone
             return
 
-        # The AXFR response needs to have a SOA at the beginning and end.
-        criterion = {'zone_id': zone.id, 'type': 'SOA'}
-        soa_records = self.storage.find_recordsets_axfr(context, criterion)
+        LOG.debug('Serial %(serial)s of %(zone)s differs from the primary '
+                  'database, transferring it from the primary',
+                  {'serial': zone.serial, 'zone': zone.name})
+        metrics.counter('mdns.xfr.replica_lag').increment()
+        if self.zone_cache is not None:
+            self.zone_cache.invalidate(zone.id)
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate(zone.id)
 
-        # Get all the records other than SOA
-        criterion = {'zone_id': zone.id, 'type': '!SOA'}
-        records = self.storage.find_recordsets_axfr(context, criterion)
+        with self.storage.primary_reads():
+            yield self._find_xfr_zone(request)
+
+    def _handle_axfr(self, request):
+        with self._xfr_zone(request) as zone:
+            if zone is None:
+                yield self._handle_query_error(request, dns.rcode.REFUSED)
+                return
+
+            for response in self._send_axfr(request, zone):
+                yield response
+
+    def _handle_ixfr(self, request):
+        """
+        Answer an IXFR (RFC 1995) from the zone journal.
+
+        An AXFR response is sent instead whenever the journal can't bring
+        the client's serial up to date, which RFC 1995 permits.
+        """
+        context = request.environ['context']
+
+        with self._xfr_zone(request) as zone:
+            if zone is None:
+                yield self._handle_query_error(request, dns.rcode.REFUSED)
+                return
+
+            serial = self._get_ixfr_serial(request)
 
-        # Place the SOA RRSet at the front and end of the RRSet list
-        records.insert(0, soa_records[0])
-        records.append(soa_records[0])
+            if serial is not None and serial >= zone.serial:
+                # The client is up to date, only the current SOA is sent
+                metrics.counter('mdns.ixfr.current').increment()
+                rrsets = [self._get_xfr_soa(context, zone)]
+            else:
+                rrsets = None
+                if serial is not None:
+                    rows = self.storage.find_zone_journal(
+                        context, zone.id, serial)
+                    rrsets = self._build_ixfr_rrsets(zone, serial, rows)
+
+                if rrsets is None:
+                    LOG.debug('Answering IXFR of %(zone)s from serial '
+                              '%(serial)s with a full zone transfer',
+                              {'zone': zone.name, 'serial': serial})
+                    metrics.counter('mdns.ixfr.fallback').increment()
+                    for response in self._send_axfr(request, zone):
+                        yield response
+                    return
+
+                metrics.counter('mdns.ixfr.incremental').increment()
+
+            max_message_size = self._get_max_message_size(request.had_tsig)
+            packets = self._render_xfr(request, zone, rrsets, max_message_size)
+            for response in self._finalize_packets(request, packets):
+                yield response
+
+    @staticmethod
+    def _get_ixfr_serial(request):
+        """The client's serial, from the SOA in an IXFR's authority section"""
+        for rrset in request.authority:
+            if rrset.rdtype == dns.rdatatype.SOA and len(rrset):
+                return rrset[0].serial
+        return None
+
+    @staticmethod
+    def _build_ixfr_rrsets(zone, serial, rows):
+        """
+        Build the RRsets of an IXFR response from zone journal rows.
+
+        Every version of the zone is sent as its own difference sequence.
+        Returns None if the journal doesn't describe each version from
+        serial up to the zone's current serial.
+        """
+        versions = collections.OrderedDict()
+        for row in rows:
+            if row[1] == 'RESET':
+                return None
+            if row[0] > zone.serial:
+                # Committed after the zone was read
+                continue
+            deleted, added = versions.setdefault(row[0], ([], []))
+            (deleted if row[1] == 'DEL' else added).append(row)
+
+        rrsets = []
+        soa = None
+        for version, (deleted, added) in versions.items():
+            old_soa = [row for row in deleted if row[3] == 'SOA']
+            new_soa = [row for row in added if row[3] == 'SOA']
+            if len(old_soa) != 1 or len(new_soa) != 1:
+                return None
+
+            old_soa = RequestHandler._journal_rrsets(old_soa)[0]
+            soa = RequestHandler._journal_rrsets(new_soa)[0]
+            if old_soa[0].serial != serial or soa[0].serial != version:
+                return None
+
+            rrsets.append(old_soa)
+            rrsets.extend(RequestHandler._journal_rrsets(
+                row for row in deleted if row[3] != 'SOA'))
+            rrsets.append(soa)
+            rrsets.extend(RequestHandler._journal_rrsets(
+                row for row in added if row[3] != 'SOA'))
+
+            serial = version
+
+        if soa is None or serial != zone.serial:
+            return None
+
+        # The IXFR response starts and ends with the current SOA
+        return [soa] + rrsets + [soa]
+
+    @staticmethod
+    def _journal_rrsets(rows):
+        rdata = collections.OrderedDict()
+        for row in rows:
+            rdata.setdefault((row[2], row[3], row[4]), []).append(row[5])
+
+        return [
+            dns.rrset.from_text_list(
+                name, ttl, dns.rdataclass.IN, rdtype, data)
+            for (name, rdtype, ttl), data in rdata.items()
+        ]
+
+    def _send_axfr(self, request, zone):
+        context = request.environ['context']
+        q_rrset = request.question[0]
+
+        name = q_rrset.name.to_text()
+        if six.PY3 and isinstance(name, bytes):
+            name = name.decode('utf-8')
+
+        max_message_size = self._get_max_message_size(request.had_tsig)
 
+        packets = None
+        if self.axfr_snapshots is not None:
+            # The rendered messages include the question, so IXFRs answered
+            # with a full transfer get snapshots of their own.
+            key = (zone.id, zone.serial, max_message_size, name,
+                   q_rrset.rdtype)
+            packets = self.axfr_snapshots.get(key)
+
+        if packets is None:
+            if (self.zone_cache is not None and
+                    not isinstance(zone, cache.CachedZone)):
+                # Every record is read for the transfer anyway, so this is
+                # when zones are cached. Queries only use cached zones.
+                zone = self.zone_cache.load(context, zone) or zone
+
+            if isinstance(zone, cache.CachedZone):
+                # The AXFR response needs to have a SOA at the beginning and
+                # end.
+                rrsets = [zone.soa] + zone.rrsets + [zone.soa]
+            else:
+                rrsets = self._get_axfr_rrsets(context, zone)
+
+            packets = self._render_xfr(
+                request, zone, rrsets, max_message_size)
+
+            if self.axfr_snapshots is not None:
+                packets = list(packets)
+                if None not in packets:
+                    self.axfr_snapshots.set(key, packets)
+
+        for response in self._finalize_packets(request, packets):
+            yield response
+
+    def _finalize_packets(self, request, packets):
+        """Turn the unsigned messages of a transfer into responses"""
         # Handle multi message response with tsig
         multi_messages = False
         multi_messages_context = None
 
-        # Render the results, yielding a packet after each TooBig exception.
-        renderer = None
-        while records:
-            record = records.pop(0)
+        # Hold back each packet until we know whether another one follows,
+        # as that decides how it has to be signed.
+        previous = None
+        for packet in packets:
+            if previous is not None:
+                multi_messages = True
+                renderer, multi_messages_context = self._finalize_packet(
+                    self._build_axfr_renderer(request, previous), request,
+                    multi_messages, multi_messages_context)
+                yield renderer
+
+            if packet is None:
+                yield self._handle_query_error(request, dns.rcode.SERVFAIL)
+                return
 
-            rrname = str(record[3])
-            ttl = int(record[2]) if record[2] is not None else zone.ttl
-            rrtype = str(record[1])
-            rdata = [str(record[4])]
+            previous = packet
 
-            rrset = dns.rrset.from_text_list(
-                rrname, ttl, dns.rdataclass.IN, rrtype, rdata,
-            )
+        if previous is not None:
+            renderer, multi_messages_context = self._finalize_packet(
+                self._build_axfr_renderer(request, previous), request,
+                multi_messages, multi_messages_context)
+            yield renderer
+        return
+
+    def _render_xfr(self, request, zone, rrsets, max_message_size):
+        """
+        Render the RRsets of an AXFR or IXFR into unsigned messages.
+
+        Yields a (body, answer count) tuple for each message, where the body
+        is the wire format message without its header, or None if the
+        transfer had to be aborted.
+        """
+        renderer = None
+        rrsets = iter(rrsets)
+        pending = []
+        while True:
+            rrset = pending.pop(0) if pending else next(rrsets, None)
+            if rrset is None:
+                break
 
             while True:
                 try:
                     if not renderer:
-                        renderer = self._create_axfr_renderer(request)
+                        renderer = self._create_axfr_renderer(
+                            request, max_message_size)
                     renderer.add_rrset(dns.renderer.ANSWER, rrset)
                     break
                 except dns.exception.TooBig:
                     # The response will span multiple messages since one
                     # message is not enough
-                    multi_messages = True
-                    if renderer.counts[dns.renderer.ANSWER] == 0:
+                    if (renderer.counts[dns.renderer.ANSWER] == 0 and
+                            len(rrset) > 1):
+                        # The RRSet doesn't fit in an empty message, send
+                        # its RRs one at a time instead.
+                        pending = [
+                            dns.rrset.from_rdata_list(
+                                rrset.name, rrset.ttl, [rdata])
+                            for rdata in rrset
+                        ]
+                        break
+                    elif renderer.counts[dns.renderer.ANSWER] == 0:
                         # We've received a TooBig from the first attempted
                         # RRSet in this packet. Log a warning and abort the
                         # AXFR.
@@ -277,38 +519,83 @@ class RequestHandler(xfr.XFRMixin):
                             'exceeded the max message size.',
                             {
                                 'zone': zone.name,
-                                'rrset_type': rrtype,
-                                'rrset_name': rrname,
+                                'rrset_type': dns.rdatatype.to_text(
+                                    rrset.rdtype),
+                                'rrset_name': rrset.name.to_text(),
                             }
                         )
 
-                        yield self._handle_query_error(
-                            request, dns.rcode.SERVFAIL
-                        )
+                        yield None
                         return
 
-                    renderer, multi_messages_context = self._finalize_packet(
-                        renderer, request, multi_messages,
-                        multi_messages_context)
-                    yield renderer
+                    yield (renderer.output.getvalue()[12:],
+                           renderer.counts[dns.renderer.ANSWER])
                     renderer = None
 
         if renderer:
-            renderer, multi_messages_context = self._finalize_packet(
-                renderer, request, multi_messages, multi_messages_context)
-            yield renderer
-        return
+            yield (renderer.output.getvalue()[12:],
+                   renderer.counts[dns.renderer.ANSWER])
+
+    def _find_axfr_zone(self, context, name, criterion):
+        """Find the zone to transfer, preferring the zone cache"""
+        if self.zone_cache is None:
+            return self.storage.find_zone(context, criterion)
+
+        zone = self.zone_cache.get(context, name)
+        if zone is not None:
+            if not zone.matches(criterion):
+                raise exceptions.ZoneNotFound()
+            return zone
+
+        return self.storage.find_zone(context, criterion)
+
+    def _get_xfr_soa(self, context, zone):
+        if isinstance(zone, cache.CachedZone):
+            return zone.soa
+
+        criterion = {'zone_id': zone.id, 'type': 'SOA'}
+        rows = self.storage.find_recordsets_axfr(context, criterion)[:1]
+        return next(cache.rrsets_from_rows(rows, zone.ttl))
+
+    def _get_axfr_rrsets(self, context, zone):
+        # The AXFR response needs to have a SOA at the beginning and end.
+        soa = self._get_xfr_soa(context, zone)
+
+        # Stream all the records other than SOA, rather than loading the
+        # whole zone into memory, and build a single RRset from each
+        # recordset's rows.
+        criterion = {'zone_id': zone.id, 'type': '!SOA'}
+        rows = self.storage.iter_recordsets_axfr(context, criterion)
+
+        return itertools.chain(
+            (soa,), cache.rrsets_from_rows(rows, zone.ttl), (soa,))
 
     def _handle_record_query(self, request):
         """Handle a DNS QUERY request for a record"""
         context = request.environ['context']
         response = dns.message.make_response(request)
 
+        q_rrset = request.question[0]
+        name = q_rrset.name.to_text()
+        if six.PY3 and isinstance(name, bytes):
+            name = name.decode('utf-8')
+
+        if self.answer_cache is not None:
+            answer = self.answer_cache.get(
+                context, self._answer_cache_key(request))
+            if answer is not None:
+                yield self._handle_cached_answer(request, answer)
+                return
+
+        if self.zone_cache is not None:
+            cached = self._find_cached_rrset(context, name, q_rrset)
+            if cached is not None:
+                for response in self._handle_cached_record_query(
+                        request, *cached):
+                    yield response
+                return
+
         try:
-            q_rrset = request.question[0]
-            name = q_rrset.name.to_text()
-            if six.PY3 and isinstance(name, bytes):
-                name = name.decode('utf-8')
             # TODO(vinod) once validation is separated from the api,
             # validate the parameters
             criterion = {
@@ -337,13 +624,13 @@ class RequestHandler(xfr.XFRMixin):
             # If zone transfers needs different errors, we could revisit this.
             LOG.info('NotFound, refusing. Question was %(qr)s',
                      {'qr': q_rrset})
-            yield self._handle_query_error(request, dns.rcode.REFUSED)
+            yield self._refuse_record_query(request)
             return
 
         except exceptions.Forbidden:
             LOG.info('Forbidden, refusing. Question was %(qr)s',
                      {'qr': q_rrset})
-            yield self._handle_query_error(request, dns.rcode.REFUSED)
+            yield self._refuse_record_query(request)
             return
 
         try:
@@ -354,30 +641,124 @@ class RequestHandler(xfr.XFRMixin):
         except exceptions.ZoneNotFound:
             LOG.warning('ZoneNotFound while handling query request. '
                         'Question was %(qr)s', {'qr': q_rrset})
-            yield self._handle_query_error(request, dns.rcode.REFUSED)
+            yield self._refuse_record_query(request)
             return
 
         except exceptions.Forbidden:
             LOG.warning('Forbidden while handling query request. '
                         'Question was %(qr)s', {'qr': q_rrset})
-            yield self._handle_query_error(request, dns.rcode.REFUSED)
+            yield self._refuse_record_query(request)
             return
 
+        if self.answer_cache is not None:
+            # The recordset was read before its zone, and may predate the
+            # serial the answer is validated against. Read it again, so the
+            # cached answer is at least as new as that serial.
+            try:
+                recordset = self.storage.get_recordset(context, recordset.id)
+            except exceptions.RecordSetNotFound:
+                yield self._refuse_record_query(request)
+                return
+
         r_rrset = self._convert_to_rrset(zone, recordset)
+        if self.answer_cache is not None:
+            self.answer_cache.set_answer(
+                self._answer_cache_key(request), zone.id, zone.serial,
+                r_rrset)
+
         response.answer = [r_rrset] if r_rrset else []
         response.set_rcode(dns.rcode.NOERROR)
         # For all the data stored in designate mdns is Authoritative
         response.flags |= dns.flags.AA
         yield response
 
-    def _create_axfr_renderer(self, request):
+    def _find_cached_rrset(self, context, name, q_rrset):
+        """Look up the answer to a query in the zone cache.
+
+        Only positive answers are served from the cache, anything else falls
+        back to storage so the error handling stays in one place.
+        """
+        zone = self.zone_cache.lookup(context, name)
+        if zone is None:
+            return None
+
+        rrset = zone.get_rrset(name, q_rrset.rdtype)
+        if rrset is None:
+            return None
+
+        return zone, rrset
+
+    def _handle_cached_record_query(self, request, zone, rrset):
+        q_rrset = request.question[0]
+
+        try:
+            criterion = self._zone_criterion_from_request(
+                request, {'id': zone.id})
+        except exceptions.Forbidden:
+            LOG.info('Forbidden, refusing. Question was %(qr)s',
+                     {'qr': q_rrset})
+            yield self._refuse_record_query(request)
+            return
+
+        if not zone.matches(criterion):
+            LOG.warning('ZoneNotFound while handling query request. '
+                        'Question was %(qr)s', {'qr': q_rrset})
+            yield self._refuse_record_query(request)
+            return
+
+        if self.answer_cache is not None:
+            self.answer_cache.set_answer(
+                self._answer_cache_key(request), zone.id, zone.serial, rrset)
+
+        response = dns.message.make_response(request)
+        response.answer = [rrset]
+        response.set_rcode(dns.rcode.NOERROR)
+        # For all the data stored in designate mdns is Authoritative
+        response.flags |= dns.flags.AA
+        yield response
+
+    @staticmethod
+    def _answer_cache_key(request):
+        """Key a query by its question, and the scope of its TSIG key,
+        which decides what zones it may be answered from.
+        """
+        q_rrset = request.question[0]
+        name = q_rrset.name.to_text()
+        if six.PY3 and isinstance(name, bytes):
+            name = name.decode('utf-8')
+
+        scope = None
+        tsigkey = request.environ.get('tsigkey')
+        if tsigkey is not None:
+            scope = (tsigkey.scope, tsigkey.resource_id)
+
+        return name, q_rrset.rdtype, scope
+
+    def _handle_cached_answer(self, request, answer):
+        if answer.refused:
+            return self._handle_query_error(request, dns.rcode.REFUSED)
+
+        response = dns.message.make_response(request)
+        response.answer = [answer.rrset] if answer.rrset else []
+        response.set_rcode(dns.rcode.NOERROR)
+        # For all the data stored in designate mdns is Authoritative
+        response.flags |= dns.flags.AA
+        return response
+
+    def _refuse_record_query(self, request):
+        if self.answer_cache is not None:
+            self.answer_cache.set_refused(self._answer_cache_key(request))
+        return self._handle_query_error(request, dns.rcode.REFUSED)
+
+    def _create_axfr_renderer(self, request, max_message_size=None):
         # Build up a dummy response, we're stealing it's logic for building
         # the Flags.
         response = dns.message.make_response(request)
         response.flags |= dns.flags.AA
         response.set_rcode(dns.rcode.NOERROR)
 
-        max_message_size = self._get_max_message_size(request.had_tsig)
+        if max_message_size is None:
+            max_message_size = self._get_max_message_size(request.had_tsig)
 
         renderer = dns.renderer.Renderer(
             response.id, response.flags, max_message_size)
@@ -385,6 +766,18 @@ class RequestHandler(xfr.XFRMixin):
             renderer.add_question(q.name, q.rdtype, q.rdclass)
         return renderer
 
+    def _build_axfr_renderer(self, request, packet):
+        """Rebuild a renderer for this request from an unsigned message"""
+        body, ancount = packet
+
+        renderer = self._create_axfr_renderer(request)
+        renderer.output.seek(12)
+        renderer.output.truncate()
+        renderer.output.write(body)
+        renderer.counts[dns.renderer.ANSWER] = ancount
+        renderer.section = dns.renderer.ANSWER
+        return renderer
+
     @staticmethod
     def _convert_to_rrset(zone, recordset):
         # Fetch the zone or the config ttl if the recordset ttl is null
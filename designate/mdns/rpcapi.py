@@ -44,9 +44,13 @@ class MdnsAPI(object):
 
     XFR API version history:
         1.0 - Added perform_zone_xfr.
+
+    TSIG key API version history:
+        1.0 - Added invalidate_tsigkeys.
     """
     RPC_NOTIFY_API_VERSION = '2.0'
     RPC_XFR_API_VERSION = '1.0'
+    RPC_TSIGKEY_API_VERSION = '1.0'
 
     def __init__(self, topic=None):
         self.topic = topic if topic else cfg.CONF['service:mdns'].topic
@@ -61,6 +65,12 @@ class MdnsAPI(object):
                                       version=self.RPC_XFR_API_VERSION)
         self.xfr_client = rpc.get_client(xfr_target, version_cap='1.0')
 
+        tsigkey_target = messaging.Target(
+            topic=self.topic, namespace='tsigkey',
+            version=self.RPC_TSIGKEY_API_VERSION)
+        self.tsigkey_client = rpc.get_client(
+            tsigkey_target, version_cap='1.0')
+
     @classmethod
     def get_instance(cls):
         """
@@ -140,3 +150,10 @@ class MdnsAPI(object):
         LOG.info("perform_zone_xfr: Calling mdns for zone %(zone)s",
                  {"zone": zone.name})
         return self.xfr_client.cast(context, 'perform_zone_xfr', zone=zone)
+
+    def invalidate_tsigkeys(self, context, names):
+        LOG.debug("invalidate_tsigkeys: Calling every mdns for TSIG keys "
+                  "%(names)s", {'names': names})
+        # Every mdns process caches TSIG keys, so they are all told
+        cctxt = self.tsigkey_client.prepare(fanout=True)
+        return cctxt.cast(context, 'invalidate_tsigkeys', names=names)
@@ -22,6 +22,7 @@ from designate import storage
 from designate import utils
 from designate.mdns import handler
 from designate.mdns import notify
+from designate.mdns import tsigkey
 from designate.mdns import xfr
 from designate.utils import DEFAULT_MDNS_PORT
 
@@ -34,13 +35,15 @@ class Service(service.RPCService):
 
     def __init__(self):
         self._storage = None
+        self._tsigkey_cache = None
 
         super(Service, self).__init__(
             self.service_name, cfg.CONF['service:mdns'].topic,
             threads=cfg.CONF['service:mdns'].threads,
         )
         self.override_endpoints(
-            [notify.NotifyEndpoint(self.tg), xfr.XfrEndpoint(self.tg)]
+            [notify.NotifyEndpoint(self.tg), xfr.XfrEndpoint(self.tg),
+             tsigkey.TsigKeyEndpoint(self.tg, self.tsigkey_cache)]
         )
 
         self.dns_service = service.DNSService(
@@ -48,6 +51,10 @@ class Service(service.RPCService):
             cfg.CONF['service:mdns'].listen,
             cfg.CONF['service:mdns'].tcp_backlog,
             cfg.CONF['service:mdns'].tcp_recv_timeout,
+            udp_handler_threads=cfg.CONF['service:mdns'].udp_handler_threads,
+            udp_queue_size=cfg.CONF['service:mdns'].udp_queue_size,
+            udp_overload_action=cfg.CONF['service:mdns'].udp_overload_action,
+            tcp_max_pipelined=cfg.CONF['service:mdns'].tcp_max_pipelined,
         )
 
     def start(self):
@@ -66,6 +73,12 @@ class Service(service.RPCService):
             )
         return self._storage
 
+    @property
+    def tsigkey_cache(self):
+        if self._tsigkey_cache is None:
+            self._tsigkey_cache = dnsutils.TsigKeyCache(self.storage)
+        return self._tsigkey_cache
+
     @property
     def service_name(self):
         return 'mdns'
@@ -76,9 +89,12 @@ class Service(service.RPCService):
         # Create an instance of the RequestHandler class and wrap with
         # necessary middleware.
         application = handler.RequestHandler(self.storage, self.tg)
-        application = dnsutils.TsigInfoMiddleware(application, self.storage)
+        application = dnsutils.TsigInfoMiddleware(
+            application, self.storage, self.tsigkey_cache
+        )
         application = dnsutils.SerializationMiddleware(
-            application, dnsutils.TsigKeyring(self.storage)
+            application,
+            dnsutils.TsigKeyring(self.storage, self.tsigkey_cache)
         )
 
         return application
@@ -151,8 +151,15 @@ class APIv2Adapter(base.DesignateAdapter):
     @classmethod
     def _get_next_href(cls, request, items):
         # Prepare the extra params
-        extra_params = {
-            'marker': items[-1]['id']
-        }
+        if 'cursor' in request.GET and getattr(items, 'next_cursor', None):
+            # Keyset pagination was asked for, continue from the cursor
+            # storage created for the last item
+            extra_params = {
+                'cursor': items.next_cursor
+            }
+        else:
+            extra_params = {
+                'marker': items[-1]['id']
+            }
 
         return cls._get_collection_href(request, extra_params)
@@ -60,6 +60,9 @@ class ZoneExportAPIv2Adapter(base.APIv2Adapter):
             obj['links']['export'] = \
                 '%s/%s' % \
                 (base_uri, obj['location'].split('://')[1])
+        elif obj['location']:
+            # Exports in the export store are downloaded through the API too
+            obj['links']['export'] = '%s/export' % obj['links']['self']
 
         return obj
 
@@ -28,6 +28,8 @@ class ZoneImportAPIv2Adapter(base.APIv2Adapter):
             "status": {},
             "message": {},
             "zone_id": {},
+            "records_processed": {},
+            "records_per_second": {},
             "project_id": {
                 'rename': 'tenant_id'
             },
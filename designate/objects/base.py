@@ -481,7 +481,8 @@ class PagedListObjectMixin(object):
     This adds fields that would populate API metadata for collections.
     """
     fields = {
-        'total_count': fields.IntegerFields(nullable=True)
+        'total_count': fields.IntegerFields(nullable=True),
+        'next_cursor': fields.StringFields(nullable=True),
     }
 
 
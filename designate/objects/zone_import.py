@@ -30,7 +30,9 @@ class ZoneImport(base.DictObjectMixin, base.PersistentObjectMixin,
         ),
         'tenant_id': fields.StringFields(nullable=True),
         'message': fields.StringFields(nullable=True, maxLength=160),
-        'zone_id': fields.UUIDFields(nullable=True)
+        'zone_id': fields.UUIDFields(nullable=True),
+        'records_processed': fields.IntegerFields(nullable=True),
+        'records_per_second': fields.IntegerFields(nullable=True),
     }
 
 
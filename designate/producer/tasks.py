@@ -83,7 +83,8 @@ class PeriodicTask(plugin.ExtensionPlugin):
     def _iter_zones(self, ctxt, criterion=None):
         criterion = criterion or {}
         criterion.update(self._filter_between('shard'))
-        return self._iter(self.central_api.find_zones, ctxt, criterion)
+        return self._iter(self.central_api.find_zones, ctxt, criterion,
+                          count=False)
 
 
 class DeletedZonePurgeTask(PeriodicTask):
@@ -126,6 +127,38 @@ class DeletedZonePurgeTask(PeriodicTask):
         )
 
 
+class ZoneJournalPurgeTask(PeriodicTask):
+    """Purge zone journal entries that are older than the time threshold.
+    The journal is only used to answer IXFRs, a secondary at a serial that
+    is no longer journaled will get a full zone transfer instead.
+    """
+    __plugin_name__ = 'zone_journal_purge'
+
+    def __init__(self):
+        super(ZoneJournalPurgeTask, self).__init__()
+
+    def __call__(self):
+        pstart, pend = self._my_range()
+        LOG.info(
+            "Performing zone journal purging for %(start)s to %(end)s",
+            {
+                "start": pstart,
+                "end": pend
+            })
+
+        delta = datetime.timedelta(seconds=CONF[self.name].time_threshold)
+        time_threshold = timeutils.utcnow() - delta
+        LOG.debug("Filtering zone journal entries before %s", time_threshold)
+
+        criterion = self._filter_between('zone_shard')
+        criterion['created_at'] = "<=%s" % time_threshold
+
+        ctxt = context.DesignateContext.get_admin_context()
+        ctxt.all_tenants = True
+
+        self.central_api.purge_zone_journal(ctxt, criterion)
+
+
 class PeriodicExistsTask(PeriodicTask):
     __plugin_name__ = 'periodic_exists'
 
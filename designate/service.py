@@ -18,11 +18,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import errno
+import os
 import socket
 import struct
 import threading
 
+import dns.flags
+import dns.rcode
 import eventlet.debug
+import eventlet.greenpool
+import eventlet.hubs
+import eventlet.queue
+import eventlet.semaphore
 from oslo_log import log as logging
 import oslo_messaging as messaging
 from oslo_service import service
@@ -138,14 +145,22 @@ class WSGIService(Service):
 
 class DNSService(object):
     _TCP_RECV_MAX_SIZE = 65535
+    # Datagrams read from a UDP socket before the handlers get to run
+    _UDP_BATCH_SIZE = 64
 
-    def __init__(self, app, tg, listen, tcp_backlog, tcp_recv_timeout):
+    def __init__(self, app, tg, listen, tcp_backlog, tcp_recv_timeout,
+                 udp_handler_threads=0, udp_queue_size=1000,
+                 udp_overload_action='drop', tcp_max_pipelined=1):
         self._running = threading.Event()
         self.app = app
         self.tg = tg
         self.tcp_backlog = tcp_backlog
         self.tcp_recv_timeout = tcp_recv_timeout
         self.listen = listen
+        self.udp_handler_threads = udp_handler_threads
+        self.udp_queue_size = udp_queue_size
+        self.udp_overload_action = udp_overload_action
+        self.tcp_max_pipelined = tcp_max_pipelined
         metrics.init()
 
         # Eventet will complain loudly about our use of multiple greentheads
@@ -154,6 +169,7 @@ class DNSService(object):
 
         self._dns_socks_tcp = []
         self._dns_socks_udp = []
+        self._udp_queues = []
 
     def start(self):
         self._running.set()
@@ -173,15 +189,32 @@ class DNSService(object):
         sock_udp = utils.bind_udp(
             host, port)
 
+        LOG.info('Listening for DNS queries on %(host)s:%(port)d in '
+                 'process %(pid)d',
+                 {'host': host, 'port': port, 'pid': os.getpid()})
+
         self._dns_socks_tcp.append(sock_tcp)
         self._dns_socks_udp.append(sock_udp)
 
         self.tg.add_thread(self._dns_handle_tcp, sock_tcp)
-        self.tg.add_thread(self._dns_handle_udp, sock_udp)
+        if self.udp_handler_threads:
+            queue = eventlet.queue.LightQueue(self.udp_queue_size)
+            self._udp_queues.append(queue)
+            self.tg.add_thread(self._dns_handle_udp_batched, sock_udp, queue)
+        else:
+            self.tg.add_thread(self._dns_handle_udp, sock_udp)
 
     def stop(self):
         self._running.clear()
 
+        for queue in self._udp_queues:
+            # Drop the queries still waiting, and wake every handler blocked
+            # on the queue so the thread group can stop gracefully.
+            while not queue.empty():
+                queue.get_nowait()
+            for i in range(self.udp_handler_threads):
+                queue.put(None)
+
         for sock_tcp in self._dns_socks_tcp:
             sock_tcp.close()
 
@@ -230,9 +263,10 @@ class DNSService(object):
     def _dns_handle_tcp_conn(self, addr, client):
         """
         Handle a DNS Query over TCP. Multiple queries can be pipelined
-        through the same TCP connection but they will be processed
-        sequentially.
-        See https://tools.ietf.org/html/draft-ietf-dnsop-5966bis-03
+        through the same TCP connection. Up to `tcp_max_pipelined` of them
+        are processed concurrently, and each response is sent as soon as it
+        is ready, so responses may be sent out of order.
+        See https://tools.ietf.org/html/rfc7766#section-6.2.1.1
         Raises no exception: it's to be run in an eventlet green thread
 
         :param addr: Tuple of the client's (IPv4 addr, Port) or
@@ -243,6 +277,8 @@ class DNSService(object):
         :raises: None
         """
         host, port = addr[:2]
+        pool = eventlet.greenpool.GreenPool(self.tcp_max_pipelined)
+        send_lock = eventlet.semaphore.Semaphore()
         try:
             # The whole loop lives in a try/except block. On exceptions, the
             # connection is closed: there would be little chance to save
@@ -267,18 +303,10 @@ class DNSService(object):
 
                 query = buf
 
-                # Call into the DNS Application itself with payload and addr
-                for response in self.app(
-                        {'payload': query, 'addr': addr}):
-
-                    # Send back a response only if present
-                    if response is None:
-                        continue
-
-                    # Handle TCP Responses
-                    msg_length = len(response)
-                    tcp_response = struct.pack("!H", msg_length) + response
-                    client.sendall(tcp_response)
+                # Waits for a query in progress to finish if there are
+                # already tcp_max_pipelined of them.
+                pool.spawn_n(self._dns_handle_tcp_query, addr, client,
+                             send_lock, query)
 
         except socket.timeout:
             LOG.info('TCP Timeout from: %(host)s:%(port)d',
@@ -296,9 +324,50 @@ class DNSService(object):
             LOG.exception('Unknown exception handling TCP request from: '
                           "%(host)s:%(port)d", {'host': host, 'port': port})
         finally:
+            # Let the queries in progress send their responses
+            pool.waitall()
             if client:
                 client.close()
 
+    def _dns_handle_tcp_query(self, addr, client, send_lock, query):
+        """
+        Handle one of the queries received over a TCP connection
+
+        :param addr: Tuple of the client's address
+        :type addr: tuple
+        :param client: Client socket
+        :type client: socket
+        :param send_lock: Held while sending a response, so responses to
+                          concurrent queries are not mixed up
+        :type send_lock: eventlet.semaphore.Semaphore
+        :param query: Raw DNS query payload
+        :type query: bytes
+        :raises: None
+        """
+        host, port = addr[:2]
+        try:
+            # Call into the DNS Application itself with payload and addr
+            for response in self.app(
+                    {'payload': query, 'addr': addr}):
+
+                # Send back a response only if present
+                if response is None:
+                    continue
+
+                # Handle TCP Responses
+                msg_length = len(response)
+                tcp_response = struct.pack("!H", msg_length) + response
+                with send_lock:
+                    client.sendall(tcp_response)
+
+        except socket.error as e:
+            errname = errno.errorcode.get(e.args[0], e.args[0])
+            LOG.warning('Socket error %(err)s from: %(host)s:%(port)d',
+                        {'host': host, 'port': port, 'err': errname})
+        except Exception:
+            LOG.exception('Unknown exception handling TCP request from: '
+                          "%(host)s:%(port)d", {'host': host, 'port': port})
+
     def _dns_handle_udp(self, sock_udp):
         """Handle a DNS Query over UDP in a dedicated thread
 
@@ -331,6 +400,122 @@ class DNSService(object):
                               '%(host)s:%(port)d',
                               {'host': addr[0], 'port': addr[1]})
 
+    def _dns_handle_udp_batched(self, sock_udp, queue):
+        """Handle DNS Queries over UDP with a fixed pool of threads
+
+        Datagrams are read from the socket in batches, without blocking, and
+        handed to `udp_handler_threads` threads through a queue of at most
+        `udp_queue_size` queries. Queries that don't fit in the queue are
+        dropped, or answered with REFUSED.
+
+        :param sock_udp: UDP socket
+        :type sock_udp: socket
+        :param queue: Queue of the queries waiting for a handler
+        :type queue: eventlet.queue.LightQueue
+        :raises: None
+        """
+        LOG.info('_handle_udp thread started with %d handler threads',
+                 self.udp_handler_threads)
+
+        for i in range(self.udp_handler_threads):
+            self.tg.add_thread(self._dns_handle_udp_queue, sock_udp, queue)
+
+        while self._running.is_set():
+            try:
+                # Wait for the socket to be readable once per batch, rather
+                # than once per datagram. This also lets the handlers run.
+                # Closing the socket doesn't wake us up, so time out like
+                # recvfrom would to check whether we were stopped.
+                eventlet.hubs.trampoline(
+                    sock_udp, read=True, timeout=sock_udp.gettimeout(),
+                    timeout_exc=socket.timeout)
+                self._dns_drain_udp(sock_udp, queue)
+            except socket.timeout:
+                pass
+            except socket.error as e:
+                if not self._running.is_set():
+                    break
+                LOG.warning('Socket error %s reading UDP requests', e)
+            except Exception:
+                LOG.exception('Unknown exception reading UDP requests')
+
+    def _dns_drain_udp(self, sock_udp, queue):
+        """Queue up to a batch of the datagrams waiting on a socket
+
+        :returns: The number of datagrams read
+        """
+        # The underlying socket is non-blocking, so reading from it directly
+        # skips the green socket's wait for every datagram.
+        sock = sock_udp.fd
+
+        received = 0
+        overloaded = 0
+        while received < self._UDP_BATCH_SIZE:
+            try:
+                payload, addr = sock.recvfrom(8192)
+            except (BlockingIOError, InterruptedError):
+                break
+
+            received += 1
+            try:
+                queue.put_nowait((payload, addr))
+            except eventlet.queue.Full:
+                overloaded += 1
+                self._dns_handle_udp_overload(sock, addr, payload)
+
+        if overloaded:
+            LOG.debug('Queue of UDP requests is full, %(action)s %(count)d',
+                      {'action': self.udp_overload_action,
+                       'count': overloaded})
+            metrics.counter(
+                'dns_service.udp.%s' % self.udp_overload_action
+            ).increment(overloaded)
+        metrics.gauge().send('dns_service.udp.queue_depth', queue.qsize())
+
+        return received
+
+    def _dns_handle_udp_overload(self, sock, addr, payload):
+        if self.udp_overload_action != 'refuse':
+            return
+
+        response = self._refused_response(payload)
+        if response is None:
+            return
+
+        try:
+            sock.sendto(response, addr)
+        except (BlockingIOError, InterruptedError):
+            # Dropped after all, the send buffer is full too
+            pass
+
+    @staticmethod
+    def _refused_response(payload):
+        """
+        Build a REFUSED response from just the header of a query, which is
+        much cheaper than parsing it.
+        """
+        if len(payload) < 12:
+            return None
+
+        msg_id, flags = struct.unpack('!HH', payload[:4])
+        if flags & dns.flags.QR:
+            # Never answer a response
+            return None
+
+        # Keep the opcode and RD, set QR and the rcode
+        flags = ((flags & (0x7800 | dns.flags.RD)) | dns.flags.QR |
+                 dns.rcode.REFUSED)
+        return struct.pack('!HHHHHH', msg_id, flags, 0, 0, 0, 0)
+
+    def _dns_handle_udp_queue(self, sock, queue):
+        while True:
+            item = queue.get()
+            if item is None:
+                # Put on the queue by stop()
+                break
+            payload, addr = item
+            self._dns_handle_udp_query(sock, addr, payload)
+
     def _dns_handle_udp_query(self, sock, addr, payload):
         """
         Handle a DNS Query over UDP
@@ -14,11 +14,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import collections
+import contextlib
 import operator
 import threading
 
 import six
 from oslo_db.sqlalchemy import utils as oslodb_utils
+from oslo_config import cfg
 from oslo_db import exception as oslo_db_exception
 from oslo_log import log as logging
 from oslo_utils import timeutils
@@ -28,6 +31,8 @@ from designate import exceptions
 from designate import objects
 from designate.sqlalchemy import session
 from designate.sqlalchemy import utils
+from designate.utils import encode_cursor
+from designate.utils import generate_uuid
 
 
 LOG = logging.getLogger(__name__)
@@ -48,6 +53,20 @@ def _set_object_from_model(obj, model, **extra):
     return obj
 
 
+def _set_next_cursor(obj, limit, sort_key):
+    """
+    Set the cursor for the page after a full page of a paged list object.
+    This is done here, as the values of the last item may lose precision
+    once serialized, e.g. the microseconds of timestamps.
+    """
+    if (isinstance(obj, objects.base.PagedListObjectMixin) and
+            limit is not None and len(obj) == int(limit)):
+        obj.next_cursor = encode_cursor(
+            sort_key, obj[-1][sort_key], obj[-1].id)
+
+    return obj
+
+
 def _set_listobject_from_models(obj, models, map_=None):
     for model in models:
         extra = {}
@@ -89,6 +108,57 @@ class SQLAlchemy(object):
 
         return self.local_store.session
 
+    @property
+    def has_read_replica(self):
+        return bool(cfg.CONF[self.get_name()].slave_connection)
+
+    @property
+    def read_session(self):
+        """
+        The session for read only queries. When a slave_connection is
+        configured, queries made in a replica_reads() block are sent to the
+        read replica, unless they are made in a transaction or primary reads
+        were asked for.
+        """
+        if (not self.has_read_replica or
+                not getattr(self.local_store, 'replica_reads', 0) or
+                getattr(self.local_store, 'primary_reads', 0) or
+                self.session.transaction is not None):
+            return self.session
+
+        if not hasattr(self.local_store, 'replica_session'):
+            self.local_store.replica_session = session.get_session(
+                self.get_name(), use_slave=True)
+
+        return self.local_store.replica_session
+
+    @contextlib.contextmanager
+    def replica_reads(self):
+        """
+        Let reads in the block be served by the read replica. Only callers
+        that never write what they read should ask for this, as the replica
+        can lag behind the primary database.
+        """
+        self.local_store.replica_reads = getattr(
+            self.local_store, 'replica_reads', 0) + 1
+        try:
+            yield
+        finally:
+            self.local_store.replica_reads -= 1
+
+    @contextlib.contextmanager
+    def primary_reads(self):
+        """
+        Serve every read in the block from the primary database, even
+        within a replica_reads() block
+        """
+        self.local_store.primary_reads = getattr(
+            self.local_store, 'primary_reads', 0) + 1
+        try:
+            yield
+        finally:
+            self.local_store.primary_reads -= 1
+
     def begin(self):
         self.session.begin(subtransactions=True)
 
@@ -220,6 +290,62 @@ class SQLAlchemy(object):
 
         return _set_object_from_model(obj, resultproxy.fetchone())
 
+    def _create_bulk(self, table, objs, exc_dup, skip_values=None,
+                     extra_values=None, chunk_size=1000):
+        """
+        Insert many objects using executemany, rather than a statement per
+        object, and update each object with its stored row.
+
+        :param extra_values: Callable returning a dict of extra column values
+                             for an object.
+        """
+        rows = []
+        for obj in objs:
+            values = obj.obj_get_changes()
+
+            if skip_values is not None:
+                for skip_value in skip_values:
+                    values.pop(skip_value, None)
+
+            if extra_values is not None:
+                values.update(extra_values(obj))
+
+            # The ids are needed to refetch the rows, so don't leave them
+            # to the column default.
+            if values.get('id') is None:
+                values['id'] = generate_uuid()
+
+            rows.append(values)
+
+        # Every row of an executemany must set the same columns
+        groups = collections.OrderedDict()
+        for values in rows:
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+
+        query = table.insert()
+
+        try:
+            for group in groups.values():
+                for i in range(0, len(group), chunk_size):
+                    self.session.execute(query, group[i:i + chunk_size])
+        except oslo_db_exception.DBDuplicateEntry:
+            msg = "Duplicate %s" % objs[0].obj_name()
+            raise exc_dup(msg)
+
+        # Refetch the rows, for generated columns etc
+        ids = [values['id'] for values in rows]
+        models = {}
+        for i in range(0, len(ids), chunk_size):
+            query = select([table]).where(
+                table.c.id.in_(ids[i:i + chunk_size]))
+            for model in self.session.execute(query):
+                models[model.id] = model
+
+        for obj, obj_id in zip(objs, ids):
+            _set_object_from_model(obj, models[obj_id])
+
+        return objs
+
     def _find(self, context, table, cls, list_cls, exc_notfound, criterion,
               one=False, marker=None, limit=None, sort_key=None,
               sort_dir=None, query=None, apply_tenant_criteria=True):
@@ -242,7 +368,7 @@ class SQLAlchemy(object):
             #              a NotFound. Limiting to 2 allows us to determine
             #              when we need to raise, while selecting the minimal
             #              number of rows.
-            resultproxy = self.session.execute(query.limit(2))
+            resultproxy = self.read_session.execute(query.limit(2))
             results = resultproxy.fetchall()
 
             if len(results) != 1:
@@ -251,19 +377,22 @@ class SQLAlchemy(object):
             else:
                 return _set_object_from_model(cls(), results[0])
         else:
-            if marker is not None:
-                marker = utils.check_marker(table, marker, self.session)
-
             try:
+                if marker is not None:
+                    marker = utils.get_marker(
+                        table, marker, sort_key, self.read_session)
+
                 query = utils.paginate_query(
                     query, table, limit,
                     [sort_key, 'id'], marker=marker,
                     sort_dir=sort_dir)
 
-                resultproxy = self.session.execute(query)
+                resultproxy = self.read_session.execute(query)
                 results = resultproxy.fetchall()
 
-                return _set_listobject_from_models(list_cls(), results)
+                return _set_next_cursor(
+                    _set_listobject_from_models(list_cls(), results),
+                    limit, sort_key)
             except oslodb_utils.InvalidSortKey as sort_key_error:
                 raise exceptions.InvalidSortKey(six.text_type(sort_key_error))
             # Any ValueErrors are propagated back to the user as is.
@@ -311,11 +440,11 @@ class SQLAlchemy(object):
             inner_q = inner_q.with_hint(recordsets_table, index_hint,
                                         dialect_name='mysql')
 
-        if marker is not None:
-            marker = utils.check_marker(recordsets_table, marker,
-                                        self.session)
-
         try:
+            if marker is not None:
+                marker = utils.get_marker(recordsets_table, marker,
+                                          sort_key, self.read_session)
+
             inner_q = utils.paginate_query(
                 inner_q, recordsets_table, limit,
                 [sort_key, 'id'], marker=marker,
@@ -358,7 +487,7 @@ class SQLAlchemy(object):
         # This is a separate call due to
         # http://dev.mysql.com/doc/mysql-reslimits-excerpt/5.6/en/subquery-restrictions.html  # noqa
 
-        inner_rproxy = self.session.execute(inner_q)
+        inner_rproxy = self.read_session.execute(inner_q)
         rows = inner_rproxy.fetchall()
         if len(rows) == 0:
             return 0, objects.RecordSetList()
@@ -372,7 +501,7 @@ class SQLAlchemy(object):
         if context.hide_counts:
             total_count = None
         else:
-            resultproxy = self.session.execute(count_q)
+            resultproxy = self.read_session.execute(count_q)
             result = resultproxy.fetchone()
             total_count = 0 if result is None else result[0]
 
@@ -463,7 +592,7 @@ class SQLAlchemy(object):
                                             sort_dir=sort_dir)
 
         try:
-            resultproxy = self.session.execute(query)
+            resultproxy = self.read_session.execute(query)
             raw_rows = resultproxy.fetchall()
 
         # Any ValueErrors are propagated back to the user as is.
@@ -521,7 +650,7 @@ class SQLAlchemy(object):
             if current_rrset is not None:
                 rrsets.append(current_rrset)
 
-        return total_count, rrsets
+        return total_count, _set_next_cursor(rrsets, limit, sort_key)
 
     def _update(self, context, table, obj, exc_dup, exc_notfound,
                 skip_values=None):
@@ -615,10 +744,38 @@ class SQLAlchemy(object):
         query = self._apply_deleted_criteria(context, table, query)
 
         try:
-            resultproxy = self.session.execute(query)
+            resultproxy = self.read_session.execute(query)
             return resultproxy.fetchall()
         # Any ValueErrors are propagated back to the user as is.
         # If however central or storage is called directly, invalid values
         # show up as ValueError
         except ValueError as value_error:
             raise exceptions.ValueError(six.text_type(value_error))
+
+    def _iter_select_raw(self, context, table, criterion, query=None,
+                         chunk_size=1000):
+        # Build the query
+        if query is None:
+            query = select([table])
+
+        query = self._apply_criterion(table, query, criterion)
+        query = self._apply_deleted_criteria(context, table, query)
+
+        # Ask for a server side cursor, where the driver supports one, so the
+        # rows are fetched from the database in chunks as they are consumed.
+        query = query.execution_options(stream_results=True)
+
+        try:
+            resultproxy = self.read_session.execute(query)
+        except ValueError as value_error:
+            raise exceptions.ValueError(six.text_type(value_error))
+
+        try:
+            while True:
+                rows = resultproxy.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            resultproxy.close()
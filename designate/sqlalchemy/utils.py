@@ -24,6 +24,7 @@ from oslo_db.sqlalchemy import utils
 from oslo_db import exception as oslo_db_exception
 from oslo_db.sqlalchemy.migration_cli import manager
 from oslo_log import log
+from oslo_utils import timeutils
 
 from designate.i18n import _
 from designate import exceptions
@@ -151,6 +152,41 @@ def check_marker(table, marker, session):
     return marker
 
 
+def cursor_marker(table, cursor, sort_key):
+    """
+    Build the marker for paginate_query from a decoded pagination cursor,
+    which holds the sort key and id of the last row of the previous page,
+    so no query is needed to look the marker row up.
+    """
+    if cursor.get('sort_key') != sort_key:
+        raise exceptions.InvalidMarker(
+            'The cursor was not created for sort key %s' % sort_key)
+
+    try:
+        column = getattr(table.c, sort_key)
+    except AttributeError:
+        raise utils.InvalidSortKey()
+
+    value = cursor.get('value')
+    if value is not None and isinstance(column.type, sqlalchemy.DateTime):
+        try:
+            value = timeutils.normalize_time(timeutils.parse_isotime(value))
+        except ValueError:
+            raise exceptions.InvalidMarker()
+
+    return {sort_key: value, 'id': cursor.get('id')}
+
+
+def get_marker(table, marker, sort_key, session):
+    """
+    Get the marker for paginate_query from either a resource id or a decoded
+    pagination cursor.
+    """
+    if isinstance(marker, dict):
+        return cursor_marker(table, marker, sort_key)
+    return check_marker(table, marker, session)
+
+
 def get_rrset_index(sort_key):
     rrset_index_hint = None
     index = RRSET_FILTERING_INDEX.get(sort_key)
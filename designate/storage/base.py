@@ -14,6 +14,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import contextlib
 
 import six
 
@@ -27,6 +28,10 @@ class Storage(DriverPlugin):
     __plugin_ns__ = 'designate.storage'
     __plugin_type__ = 'storage'
 
+    # Whether reads made in a replica_reads() block may be served by a read
+    # replica, which can lag behind the primary database.
+    has_read_replica = False
+
     @abc.abstractmethod
     def create_quota(self, context, quota):
         """
@@ -246,7 +251,7 @@ class Storage(DriverPlugin):
 
     @abc.abstractmethod
     def find_zones(self, context, criterion=None, marker=None,
-                   limit=None, sort_key=None, sort_dir=None):
+                   limit=None, sort_key=None, sort_dir=None, count=True):
         """
         Find zones
 
@@ -258,6 +263,7 @@ class Storage(DriverPlugin):
                       marker
         :param sort_key: Key from which to sort after.
         :param sort_dir: Direction to sort after using sort_key.
+        :param count: Whether to set the total_count of the returned list.
         """
 
     @abc.abstractmethod
@@ -269,6 +275,27 @@ class Storage(DriverPlugin):
         :param criterion: Criteria to filter by.
         """
 
+    @abc.abstractmethod
+    def find_ancestor_zone(self, context, zone_name, criterion=None):
+        """
+        Find the nearest existing ancestor of a zone name, with one query.
+
+        :param context: RPC Context.
+        :param zone_name: Name of the zone, which need not exist.
+        :param criterion: Criteria the ancestor must match as well.
+        :raises: ZoneNotFound if the zone name has no ancestor.
+        """
+
+    @abc.abstractmethod
+    def find_descendant_zones(self, context, zone_name, criterion=None):
+        """
+        Find every existing zone below a zone name, at any depth.
+
+        :param context: RPC Context.
+        :param zone_name: Name of the zone, which need not exist.
+        :param criterion: Criteria the descendants must match as well.
+        """
+
     @abc.abstractmethod
     def update_zone(self, context, zone):
         """
@@ -287,6 +314,20 @@ class Storage(DriverPlugin):
         :param zone_id: Zone ID to delete.
         """
 
+    @abc.abstractmethod
+    def bulk_update_zone_status(self, context, zone_ids, status, serial):
+        """
+        Apply the status a nameserver pool reported for some zones to their
+        status and action, the same way central applies it to a zone. Zones
+        that become DELETED are deleted.
+
+        :param context: RPC Context.
+        :param zone_ids: List of Zone IDs to update.
+        :param status: The status, 'SUCCESS', 'ERROR' or 'NO_ZONE'.
+        :param serial: The consensus serial number for the zones.
+        :returns: The number of zones updated.
+        """
+
     @abc.abstractmethod
     def purge_zone(self, context, zone):
         """
@@ -305,6 +346,15 @@ class Storage(DriverPlugin):
         :param criterion: Criteria to filter by.
         """
 
+    @abc.abstractmethod
+    def get_zone_serial(self, context, zone_id):
+        """
+        Get the current serial of a Zone, without loading the Zone.
+
+        :param context: RPC Context.
+        :param zone_id: Zone ID to get the serial of.
+        """
+
     @abc.abstractmethod
     def create_recordset(self, context, zone_id, recordset):
         """
@@ -315,6 +365,16 @@ class Storage(DriverPlugin):
         :param recordset: RecordSet object with the values to be created.
         """
 
+    @abc.abstractmethod
+    def create_recordsets_bulk(self, context, zone_id, recordsets):
+        """
+        Create many RecordSets, and their Records, at once.
+
+        :param context: RPC Context.
+        :param zone_id: Zone ID to create the recordsets in.
+        :param recordsets: RecordSet objects with the values to be created.
+        """
+
     @abc.abstractmethod
     def get_recordset(self, context, recordset_id):
         """
@@ -349,6 +409,30 @@ class Storage(DriverPlugin):
         :param criterion: Criteria to filter by.
         """
 
+    @abc.abstractmethod
+    def iter_recordsets_axfr(self, context, criterion=None):
+        """
+        Find RecordSets, yielding the rows as they are read rather than
+        loading them all.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        """
+
+    @abc.abstractmethod
+    def iter_recordsets_export(self, context, criterion=None, marker=None,
+                               limit=None):
+        """
+        Find the records of RecordSets to export, yielding the rows as they
+        are read. The last three columns of a row form the marker to
+        continue the export after that row.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        :param marker: Marker of the row after which to start.
+        :param limit: Integer limit of rows.
+        """
+
     @abc.abstractmethod
     def find_recordset(self, context, criterion):
         """
@@ -457,6 +541,63 @@ class Storage(DriverPlugin):
         :param criterion: Criteria to filter by.
         """
 
+    @abc.abstractmethod
+    def bulk_update_record_status(self, context, zone_id, status, serial):
+        """
+        Apply the status a nameserver pool reported for a zone to the status
+        and action of all its records, the same way central applies it to
+        the zone.
+
+        :param context: RPC Context.
+        :param zone_id: Zone ID the records belong to, or a list of them.
+        :param status: The status, 'SUCCESS', 'ERROR' or 'NO_ZONE'.
+        :param serial: The consensus serial number for the zone.
+        :returns: The number of records updated.
+        """
+
+    @abc.abstractmethod
+    def purge_deleted_records(self, context, zone_id):
+        """
+        Remove the records of a zone with the DELETED status, along with the
+        recordsets left without records.
+
+        :param context: RPC Context.
+        :param zone_id: Zone ID the records belong to, or a list of them.
+        :returns: The number of records removed.
+        """
+
+    @abc.abstractmethod
+    def create_zone_journal(self, context, zone_id, serial, entries):
+        """
+        Record changes to a Zone in its journal.
+
+        :param context: RPC Context.
+        :param zone_id: Zone ID the changes were made to.
+        :param serial: The Zone serial the changes belong to.
+        :param entries: (action, name, type, ttl, data) tuples, where action
+                        is one of 'ADD', 'DEL' or 'RESET'.
+        """
+
+    @abc.abstractmethod
+    def find_zone_journal(self, context, zone_id, serial):
+        """
+        Find the journal entries of a Zone newer than a serial, as
+        (serial, action, name, type, ttl, data) rows ordered by serial.
+
+        :param context: RPC Context.
+        :param zone_id: Zone ID to find the journal of.
+        :param serial: Only entries for serials greater than this are found.
+        """
+
+    @abc.abstractmethod
+    def purge_zone_journal(self, context, criterion):
+        """
+        Purge zone journal entries.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        """
+
     @abc.abstractmethod
     def create_blacklist(self, context, blacklist):
         """
@@ -761,6 +902,16 @@ class Storage(DriverPlugin):
         :param zone_export_id: Delete a Zone Export via ID
         """
 
+    @contextlib.contextmanager
+    def replica_reads(self):
+        """Let reads in the block be served by a read replica"""
+        yield
+
+    @contextlib.contextmanager
+    def primary_reads(self):
+        """Serve every read in the block from the primary database"""
+        yield
+
     def ping(self, context):
         """Ping the Storage connection"""
         return {
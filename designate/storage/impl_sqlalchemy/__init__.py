@@ -13,11 +13,14 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
 import time
 import hashlib
 
 from oslo_log import log as logging
-from sqlalchemy import select, distinct, func
+from oslo_utils import timeutils
+import six
+from sqlalchemy import and_, cast, exists, select, distinct, func, String
 from sqlalchemy.sql.expression import or_
 
 from designate import exceptions
@@ -170,7 +173,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_deleted_criteria(context, tables.zones, query)
         query = query.group_by(tables.zones.c.tenant_id)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         results = resultproxy.fetchall()
 
         tenant_list = objects.TenantList(
@@ -188,7 +191,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_deleted_criteria(context, tables.zones, query)
         query = query.where(tables.zones.c.tenant_id == tenant_id)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         results = resultproxy.fetchall()
 
         return objects.Tenant(
@@ -203,7 +206,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.zones, query)
         query = self._apply_deleted_criteria(context, tables.zones, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -215,7 +218,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     # Zone Methods
     ##
     def _find_zones(self, context, criterion, one=False, marker=None,
-                    limit=None, sort_key=None, sort_dir=None):
+                    limit=None, sort_key=None, sort_dir=None, count=True):
         # Check to see if the criterion can use the reverse_name column
         criterion = self._rname_check(criterion)
 
@@ -224,34 +227,51 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
             exceptions.ZoneNotFound, criterion, one, marker, limit,
             sort_key, sort_dir)
 
-        def _load_relations(zone):
-            if zone.type == 'SECONDARY':
-                zone.masters = self._find_zone_masters(
-                    context, {'zone_id': zone.id})
-            else:
-                # This avoids an extra DB call per primary zone. This will
-                # always have 0 results for a PRIMARY zone.
-                zone.masters = objects.ZoneMasterList()
-
-            zone.attributes = self._find_zone_attributes(
-                context, {'zone_id': zone.id, "key": "!master"})
-
-            zone.obj_reset_changes(['masters', 'attributes'])
-
-        # TODO(Federico) refactor part of _find_zones into _find_zone, move
-        # _load_relations out
-
         if one:
-            _load_relations(zones)
+            self._load_zone_relations(context, [zones])
+            LOG.debug("Fetched zone %s", zones)
         else:
-            zones.total_count = self.count_zones(context, criterion)
-            for d in zones:
-                _load_relations(d)
+            # Counting does not scale well for large numbers of zones, don't
+            # do it if the caller asked for counts to be hidden.
+            if count and not context.hide_counts:
+                zones.total_count = self.count_zones(context, criterion)
+            self._load_zone_relations(context, zones)
 
-        if one:
-            LOG.debug("Fetched zone %s", zones)
         return zones
 
+    def _load_zone_relations(self, context, zones):
+        """
+        Load the masters and attributes of a page of zones, using a single
+        query for each rather than one per zone.
+        """
+        if not zones:
+            return
+
+        masters = collections.defaultdict(list)
+        # This avoids querying for masters of PRIMARY zones, which will
+        # always have 0 results.
+        secondary_ids = [zone.id for zone in zones
+                         if zone.type == 'SECONDARY']
+        if secondary_ids:
+            for master in self._find_zone_masters(
+                    context, {'zone_id': secondary_ids}):
+                masters[master.zone_id].append(master)
+
+        attributes = collections.defaultdict(list)
+        for attribute in self._find_zone_attributes(
+                context, {'zone_id': [zone.id for zone in zones],
+                          'key': '!master'}):
+            attributes[attribute.zone_id].append(attribute)
+
+        for zone in zones:
+            zone.masters = objects.ZoneMasterList(
+                objects=masters[zone.id])
+            zone.attributes = objects.ZoneAttributeList(
+                objects=attributes[zone.id])
+            zone.masters.obj_reset_changes()
+            zone.attributes.obj_reset_changes()
+            zone.obj_reset_changes(['masters', 'attributes'])
+
     def create_zone(self, context, zone):
         # Patch in the reverse_name column
         extra_values = {"reverse_name": zone.name[::-1]}
@@ -281,16 +301,50 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         return zone
 
     def find_zones(self, context, criterion=None, marker=None, limit=None,
-                   sort_key=None, sort_dir=None):
+                   sort_key=None, sort_dir=None, count=True):
         zones = self._find_zones(context, criterion, marker=marker,
                                  limit=limit, sort_key=sort_key,
-                                 sort_dir=sort_dir)
+                                 sort_dir=sort_dir, count=count)
         return zones
 
     def find_zone(self, context, criterion):
         zone = self._find_zones(context, criterion, one=True)
         return zone
 
+    def find_ancestor_zone(self, context, zone_name, criterion=None):
+        labels = zone_name.split('.')
+        names = [name for name in ('.'.join(labels[i:])
+                                   for i in range(1, len(labels))) if name]
+        if not names:
+            raise exceptions.ZoneNotFound()
+
+        criterion = dict(criterion or {})
+        criterion['name'] = names
+
+        zones = self._find(
+            context, tables.zones, objects.Zone, objects.ZoneList,
+            exceptions.ZoneNotFound, criterion)
+        if not zones:
+            raise exceptions.ZoneNotFound()
+
+        # The longest name is the nearest ancestor
+        zone = max(zones, key=lambda zone: len(zone.name))
+        self._load_zone_relations(context, [zone])
+
+        return zone
+
+    def find_descendant_zones(self, context, zone_name, criterion=None):
+        # Descendants are exactly the zones whose reverse_name starts with
+        # the reversed zone name followed by a dot. As a range rather than a
+        # LIKE, this doesn't need escaping and can always use the index.
+        prefix = zone_name[::-1] + '.'
+
+        criterion = dict(criterion or {})
+        criterion['reverse_name'] = 'BETWEEN %s,%s' % (
+            prefix, prefix[:-1] + '/')
+
+        return self._find_zones(context, criterion, count=False)
+
     def update_zone(self, context, zone):
         tenant_id_changed = False
         if 'tenant_id' in zone.obj_what_changed():
@@ -383,14 +437,16 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                 attr.zone_id = zone.id
                 self.create_zone_master(context, zone.id, attr)
 
-        if zone.obj_attr_is_set('recordsets'):
+        if zone.obj_attr_is_set('recordsets') and zone.type == 'SECONDARY':
+            self._sync_recordsets(context, zone)
+
+        elif zone.obj_attr_is_set('recordsets'):
             existing = self.find_recordsets(context, {'zone_id': zone.id})
 
             data = {}
             for rrset in existing:
                 data[rrset.name, rrset.type] = rrset
 
-            keep = set()
             for rrset in zone.recordsets:
                 current = data.get((rrset.name, rrset.type))
 
@@ -398,15 +454,8 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                     current.update(rrset)
                     current.records = rrset.records
                     self.update_recordset(context, current)
-                    keep.add(current.id)
                 else:
                     self.create_recordset(context, zone.id, rrset)
-                    keep.add(rrset.id)
-
-            if zone.type == 'SECONDARY':
-                # Purge anything that shouldn't be there :P
-                for i in set([i.id for i in data.values()]) - keep:
-                    self.delete_recordset(context, i)
 
         if tenant_id_changed:
             recordsets_query = tables.recordsets.update().\
@@ -422,6 +471,112 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return updated_zone
 
+    def _sync_recordsets(self, context, zone, chunk_size=1000):
+        """
+        Make the recordsets stored for a zone match zone.recordsets,
+        purging any others, as done when transferring a secondary zone.
+
+        The recordsets are compared by a fingerprint of their TTL and sorted
+        record data, and statements are only issued for the ones that
+        differ.
+        """
+        recordsets = tables.recordsets
+        records = tables.records
+
+        rjoin = recordsets.outerjoin(
+            records, records.c.recordset_id == recordsets.c.id)
+        query = select([recordsets.c.id, recordsets.c.name,
+                        recordsets.c.type, recordsets.c.ttl,
+                        records.c.id.label('record_id'), records.c.data]).\
+            select_from(rjoin)
+        query = self._apply_tenant_criteria(context, recordsets, query)
+
+        # (name, type) -> (recordset id, ttl, {record data: record id})
+        existing = {}
+        for row in self._select_raw(
+                context, recordsets, {'zone_id': zone.id}, query):
+            recordset = existing.setdefault(
+                (row.name, row.type), (row.id, row.ttl, {}))
+            if row.record_id is not None:
+                recordset[2][row.data] = row.record_id
+
+        create_recordsets = []
+        create_records = []
+        delete_records = []
+        update_ttls = collections.defaultdict(list)
+        keep = set()
+
+        for rrset in zone.recordsets:
+            current = existing.get((rrset.name, rrset.type))
+            if current is None:
+                create_recordsets.append(rrset)
+                continue
+
+            recordset_id, ttl, current_records = current
+            keep.add(recordset_id)
+
+            new_records = {}
+            if rrset.obj_attr_is_set('records'):
+                new_records = {record.data: record
+                               for record in rrset.records}
+
+            new_ttl = getattr(rrset, 'ttl', None)
+            if ((ttl, tuple(sorted(current_records))) ==
+                    (new_ttl, tuple(sorted(new_records)))):
+                continue
+
+            update_ttls[new_ttl].append(recordset_id)
+
+            for data, record_id in current_records.items():
+                if data not in new_records:
+                    delete_records.append(record_id)
+
+            for data, record in new_records.items():
+                if data not in current_records:
+                    record.tenant_id = zone.tenant_id
+                    record.zone_id = zone.id
+                    record.recordset_id = recordset_id
+                    record.hash = self._recalculate_record_hash(record)
+                    create_records.append(record)
+
+        def _chunks(ids):
+            for i in range(0, len(ids), chunk_size):
+                yield ids[i:i + chunk_size]
+
+        for ttl, recordset_ids in update_ttls.items():
+            for chunk in _chunks(recordset_ids):
+                query = recordsets.update().\
+                    where(recordsets.c.id.in_(chunk)).values(ttl=ttl)
+                query = self._apply_version_increment(
+                    context, recordsets, query)
+                self.session.execute(query)
+
+        for chunk in _chunks(delete_records):
+            self.session.execute(
+                records.delete().where(records.c.id.in_(chunk)))
+
+        # Purge anything that shouldn't be there :P
+        purge = [recordset_id for recordset_id, _, _ in existing.values()
+                 if recordset_id not in keep]
+        for chunk in _chunks(purge):
+            self.session.execute(
+                records.delete().where(records.c.recordset_id.in_(chunk)))
+            self.session.execute(
+                recordsets.delete().where(recordsets.c.id.in_(chunk)))
+
+        if create_records:
+            self._create_bulk(
+                records, create_records, exceptions.DuplicateRecord)
+
+        if create_recordsets:
+            self.create_recordsets_bulk(context, zone.id, create_recordsets)
+
+        LOG.debug('Synced the recordsets of zone %(zone)s: %(created)d '
+                  'created, %(updated)d updated, %(purged)d purged',
+                  {'zone': zone.id, 'created': len(create_recordsets),
+                   'updated': sum(len(ids) for ids in update_ttls.values()),
+                   'purged': len(purge)})
+
     def delete_zone(self, context, zone_id):
         """
         """
@@ -430,6 +585,27 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         return self._delete(context, tables.zones, zone,
                             exceptions.ZoneNotFound)
 
+    def bulk_update_zone_status(self, context, zone_ids, status, serial):
+        zones = tables.zones
+
+        count = 0
+        for where, values in self._status_transitions(
+                zones, zones.c.id.in_(zone_ids), status, serial):
+            if values['status'] == 'DELETED':
+                # Soft delete the zones, as delete_zone does
+                values = dict(
+                    values, deleted_at=timeutils.utcnow(),
+                    deleted=func.replace(cast(zones.c.id, String), '-', ''))
+
+            query = zones.update().where(where).values(**values)
+            query = self._apply_tenant_criteria(context, zones, query)
+            query = self._apply_deleted_criteria(context, zones, query)
+            query = self._apply_version_increment(context, zones, query)
+
+            count += self.session.execute(query).rowcount
+
+        return count
+
     def purge_zone(self, context, zone):
         """Effectively remove a zone database record.
         """
@@ -495,7 +671,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.zones, query)
         query = self._apply_deleted_criteria(context, tables.zones, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -503,6 +679,20 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return result[0]
 
+    def get_zone_serial(self, context, zone_id):
+        query = select([tables.zones.c.serial]).\
+            where(tables.zones.c.id == zone_id)
+        query = self._apply_tenant_criteria(context, tables.zones, query)
+        query = self._apply_deleted_criteria(context, tables.zones, query)
+
+        resultproxy = self.read_session.execute(query)
+        result = resultproxy.fetchone()
+
+        if result is None:
+            raise exceptions.ZoneNotFound("Could not find Zone")
+
+        return result[0]
+
     # Zone attribute methods
     def _find_zone_attributes(self, context, criterion, one=False,
                               marker=None, limit=None, sort_key=None,
@@ -632,12 +822,8 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return recordsets
 
-    def find_recordsets_axfr(self, context, criterion=None):
-        query = None
-
-        # Check to see if the criterion can use the reverse_name column
-        criterion = self._rname_check(criterion)
-
+    @staticmethod
+    def _recordsets_axfr_query():
         rjoin = tables.records.join(
             tables.recordsets,
             tables.records.c.recordset_id == tables.recordsets.c.id)
@@ -647,13 +833,26 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                         tables.records.c.data, tables.records.c.action]).\
             select_from(rjoin).where(tables.records.c.action != 'DELETE')
 
-        query = query.order_by(tables.recordsets.c.id)
+        return query.order_by(tables.recordsets.c.id)
+
+    def find_recordsets_axfr(self, context, criterion=None):
+        # Check to see if the criterion can use the reverse_name column
+        criterion = self._rname_check(criterion)
 
         raw_rows = self._select_raw(
-            context, tables.recordsets, criterion, query)
+            context, tables.recordsets, criterion,
+            self._recordsets_axfr_query())
 
         return raw_rows
 
+    def iter_recordsets_axfr(self, context, criterion=None):
+        # Check to see if the criterion can use the reverse_name column
+        criterion = self._rname_check(criterion)
+
+        return self._iter_select_raw(
+            context, tables.recordsets, criterion,
+            self._recordsets_axfr_query())
+
     def create_recordset(self, context, zone_id, recordset):
         # Fetch the zone as we need the tenant_id
         zone = self._find_zones(context, {'id': zone_id}, one=True)
@@ -681,23 +880,78 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return recordset
 
-    def find_recordsets_export(self, context, criterion=None):
-        query = None
+    def create_recordsets_bulk(self, context, zone_id, recordsets):
+        # Fetch the zone as we need the tenant_id
+        zone = self._find_zones(context, {'id': zone_id}, one=True)
+
+        for recordset in recordsets:
+            recordset.tenant_id = zone.tenant_id
+            recordset.zone_id = zone_id
+
+        self._create_bulk(
+            tables.recordsets, recordsets, exceptions.DuplicateRecordSet,
+            ['records'],
+            extra_values=lambda rs: {"reverse_name": rs.name[::-1]})
+
+        records = []
+        for recordset in recordsets:
+            if not recordset.obj_attr_is_set('records'):
+                recordset.records = objects.RecordList()
+
+            for record in recordset.records:
+                record.tenant_id = zone.tenant_id
+                record.zone_id = zone_id
+                record.recordset_id = recordset.id
+                record.hash = self._recalculate_record_hash(record)
+                records.append(record)
+
+            recordset.obj_reset_changes(['records'])
+
+        if records:
+            # NOTE: The records are updated in place, on the input
+            #       "recordset.records" lists.
+            self._create_bulk(
+                tables.records, records, exceptions.DuplicateRecord)
+
+        return recordsets
 
+    def iter_recordsets_export(self, context, criterion=None, marker=None,
+                               limit=None):
         rjoin = tables.records.join(
             tables.recordsets,
             tables.records.c.recordset_id == tables.recordsets.c.id)
 
         query = select([tables.recordsets.c.name, tables.recordsets.c.ttl,
-                        tables.recordsets.c.type, tables.records.c.data]).\
+                        tables.recordsets.c.type, tables.records.c.data,
+                        tables.recordsets.c.created_at,
+                        tables.recordsets.c.id,
+                        tables.records.c.id.label('record_id')]).\
             select_from(rjoin)
 
-        query = query.order_by(tables.recordsets.c.created_at)
+        # The export can be continued from the last row read, by the
+        # created_at and id of its recordset and the id of its record.
+        if marker is not None:
+            created_at, recordset_id, record_id = marker
+            if isinstance(created_at, six.string_types):
+                created_at = timeutils.normalize_time(
+                    timeutils.parse_isotime(created_at))
 
-        raw_rows = self._select_raw(
-            context, tables.recordsets, criterion, query)
+            query = query.where(or_(
+                tables.recordsets.c.created_at > created_at,
+                and_(tables.recordsets.c.created_at == created_at,
+                     or_(tables.recordsets.c.id > recordset_id,
+                         and_(tables.recordsets.c.id == recordset_id,
+                              tables.records.c.id > record_id)))))
 
-        return raw_rows
+        query = query.order_by(tables.recordsets.c.created_at,
+                               tables.recordsets.c.id,
+                               tables.records.c.id)
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        return self._iter_select_raw(
+            context, tables.recordsets, criterion, query)
 
     def get_recordset(self, context, recordset_id):
         return self._find_recordsets(context, {'id': recordset_id}, one=True)
@@ -779,7 +1033,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.recordsets, query)
         query = self._apply_deleted_criteria(context, tables.recordsets, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -857,7 +1111,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.records, query)
         query = self._apply_deleted_criteria(context, tables.records, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -865,6 +1119,127 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return result[0]
 
+    @staticmethod
+    def _status_transitions(table, rows, status, serial):
+        """
+        The UPDATEs applying a status a nameserver pool reported to the zones
+        or records selected by `rows`, as (where, values) tuples.
+
+        Each transition of _update_zone_or_record_status in central is a
+        single UPDATE statement.
+        """
+        if status == 'SUCCESS':
+            reported = and_(rows,
+                            table.c.status.in_(['PENDING', 'ERROR']),
+                            table.c.serial <= serial)
+            return [
+                (and_(reported, table.c.action.in_(['CREATE', 'UPDATE'])),
+                 {'action': 'NONE', 'status': 'ACTIVE'}),
+                (and_(reported, table.c.action == 'DELETE'),
+                 {'action': 'NONE', 'status': 'DELETED'}),
+            ]
+
+        elif status == 'ERROR':
+            reported = and_(rows, table.c.status == 'PENDING')
+            if serial != 0:
+                reported = and_(reported, table.c.serial <= serial)
+            return [
+                (reported, {'status': 'ERROR'}),
+            ]
+
+        elif status == 'NO_ZONE':
+            return [
+                (and_(rows, table.c.action.in_(['CREATE', 'UPDATE'])),
+                 {'action': 'CREATE', 'status': 'ERROR'}),
+                (and_(rows, table.c.action == 'DELETE'),
+                 {'action': 'NONE', 'status': 'DELETED'}),
+            ]
+
+        return []
+
+    def bulk_update_record_status(self, context, zone_id, status, serial):
+        records = tables.records
+        if isinstance(zone_id, list):
+            zone_records = records.c.zone_id.in_(zone_id)
+        else:
+            zone_records = records.c.zone_id == zone_id
+
+        count = 0
+        for where, values in self._status_transitions(
+                records, zone_records, status, serial):
+            query = records.update().where(where).values(**values)
+            query = self._apply_tenant_criteria(context, records, query)
+            query = self._apply_version_increment(context, records, query)
+
+            count += self.session.execute(query).rowcount
+
+        return count
+
+    def purge_deleted_records(self, context, zone_id):
+        records = tables.records
+        recordsets = tables.recordsets
+        if isinstance(zone_id, list):
+            deleted = records.c.zone_id.in_(zone_id)
+        else:
+            deleted = records.c.zone_id == zone_id
+        deleted = and_(deleted, records.c.status == 'DELETED')
+
+        query = select([distinct(records.c.recordset_id)]).where(deleted)
+        query = self._apply_tenant_criteria(context, records, query)
+        recordset_ids = [row[0] for row in self.session.execute(query)]
+
+        if not recordset_ids:
+            return 0
+
+        query = records.delete().where(deleted)
+        query = self._apply_tenant_criteria(context, records, query)
+        count = self.session.execute(query).rowcount
+
+        # Remove the recordsets of the purged records that are now empty
+        query = recordsets.delete().\
+            where(recordsets.c.id.in_(recordset_ids)).\
+            where(~exists().where(records.c.recordset_id == recordsets.c.id))
+        query = self._apply_tenant_criteria(context, recordsets, query)
+        self.session.execute(query)
+
+        return count
+
+    # Zone journal methods
+    def create_zone_journal(self, context, zone_id, serial, entries):
+        values = [
+            {
+                'zone_id': zone_id,
+                'serial': serial,
+                'action': action,
+                'name': name,
+                'type': type_,
+                'ttl': ttl,
+                'data': data,
+            }
+            for action, name, type_, ttl, data in entries
+        ]
+        if values:
+            self.session.execute(tables.zone_journal.insert(), values)
+
+    def find_zone_journal(self, context, zone_id, serial):
+        table = tables.zone_journal
+        query = select([table.c.serial, table.c.action, table.c.name,
+                        table.c.type, table.c.ttl, table.c.data]).\
+            where(table.c.zone_id == zone_id).\
+            where(table.c.serial > serial).\
+            order_by(table.c.serial)
+
+        resultproxy = self.read_session.execute(query)
+        return resultproxy.fetchall()
+
+    def purge_zone_journal(self, context, criterion):
+        query = tables.zone_journal.delete()
+        query = self._apply_criterion(tables.zone_journal, query, criterion)
+
+        resultproxy = self.session.execute(query)
+        LOG.debug('Purged %d zone journal entries', resultproxy.rowcount)
+        return resultproxy.rowcount
+
     # Blacklist Methods
     def _find_blacklists(self, context, criterion, one=False, marker=None,
                          limit=None, sort_key=None, sort_dir=None):
@@ -1571,7 +1946,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_deleted_criteria(context,
                     tables.zone_transfer_accepts, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -1741,7 +2116,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.zone_tasks, query)
         query = self._apply_deleted_criteria(context, tables.zone_tasks, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
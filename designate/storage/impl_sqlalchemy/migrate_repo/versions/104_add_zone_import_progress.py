@@ -0,0 +1,31 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Add the progress of zone imports to the zone_tasks table"""
+
+from oslo_log import log as logging
+from sqlalchemy import Integer
+from sqlalchemy.schema import Column, MetaData, Table
+
+LOG = logging.getLogger(__name__)
+meta = MetaData()
+
+
+def upgrade(migrate_engine):
+    LOG.info("Adding zone import progress columns to table 'zone_tasks'")
+    meta.bind = migrate_engine
+    zone_tasks_table = Table('zone_tasks', meta, autoload=True)
+
+    Column('records_processed', Integer, nullable=True).create(
+        zone_tasks_table)
+    Column('records_per_second', Integer, nullable=True).create(
+        zone_tasks_table)
@@ -38,6 +38,8 @@ TSIG_SCOPES = ['POOL', 'ZONE']
 POOL_PROVISIONERS = ['UNMANAGED']
 ACTIONS = ['CREATE', 'DELETE', 'UPDATE', 'NONE']
 
+ZONE_JOURNAL_ACTIONS = ['ADD', 'DEL', 'RESET']
+
 ZONE_TYPES = ('PRIMARY', 'SECONDARY',)
 ZONE_TASK_TYPES = ['IMPORT', 'EXPORT']
 
@@ -245,6 +247,27 @@ records = Table('records', metadata,
     mysql_charset='utf8',
 )
 
+zone_journal = Table('zone_journal', metadata,
+    Column('id', UUID, default=utils.generate_uuid, primary_key=True),
+    Column('created_at', DateTime, default=lambda: timeutils.utcnow()),
+    Column('zone_shard', SmallInteger, nullable=False,
+           default=lambda ctxt: default_shard(ctxt, 'zone_id')),
+
+    Column('zone_id', UUID, nullable=False),
+    Column('serial', Integer, nullable=False),
+    Column('action', Enum(name='zone_journal_actions', *ZONE_JOURNAL_ACTIONS),
+           nullable=False),
+    Column('name', String(255), nullable=True),
+    Column('type', String(10), nullable=True),
+    Column('ttl', Integer, nullable=True),
+    Column('data', Text, nullable=True),
+
+    ForeignKeyConstraint(['zone_id'], ['zones.id'], ondelete='CASCADE'),
+
+    mysql_engine='InnoDB',
+    mysql_charset='utf8',
+)
+
 tsigkeys = Table('tsigkeys', metadata,
     Column('id', UUID, default=utils.generate_uuid, primary_key=True),
     Column('version', Integer, default=1, nullable=False),
@@ -474,6 +497,8 @@ zone_tasks = Table('zone_tasks', metadata,
            nullable=False, server_default='ACTIVE',
            default='ACTIVE'),
     Column('location', String(160), nullable=True),
+    Column('records_processed', Integer, nullable=True),
+    Column('records_per_second', Integer, nullable=True),
 
     mysql_engine='InnoDB',
     mysql_charset='utf8')
@@ -11,14 +11,20 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import gzip
 import unittest
 
 from dns import zone as dnszone
+import fixtures
 from webtest import TestApp
 from oslo_config import cfg
 
 from designate.api import admin as admin_api
 from designate.api import middleware
+from designate import exceptions
+from designate.export_store import base as export_store_base
+from designate.export_store import impl_filesystem
+from designate import objects
 from designate.tests.test_api.test_v2 import ApiV2TestCase
 
 
@@ -131,6 +137,92 @@ class APIV2ZoneImportExportTest(ApiV2TestCase):
         exported.delete_rdataset(exported.origin, 'NS')
         self.assertEqual(imported, exported)
 
+    def test_import_export_chunked(self):
+        self.config(zone_export_chunk_size=2, group='service:api')
+
+        self.test_import_export()
+
+    def _create_stored_export(self, name, data):
+        path = self.useFixture(fixtures.TempDir()).path
+        self.config(path=path, group='export_store:filesystem')
+        self.useFixture(fixtures.MockPatchObject(
+            export_store_base.ExportStore, 'get_driver',
+            return_value=impl_filesystem.FilesystemExportStore))
+
+        zone = self.create_zone()
+        location = impl_filesystem.FilesystemExportStore().write(
+            name, [data])
+
+        return self.central_service.storage.create_zone_export(
+            self.admin_context, objects.ZoneExport(
+                status='COMPLETE', task_type='EXPORT', location=location,
+                zone_id=zone.id, tenant_id=self.admin_context.project_id))
+
+    def test_get_stored_export(self):
+        data = b''.join(b'host%d 3600 IN A 192.0.2.1\n' % i
+                        for i in range(1000))
+        export = self._create_stored_export('1.zone', data)
+
+        response = self.client.get('/zones/tasks/exports/%s' % export.id)
+        self.assertEqual(
+            'http://localhost/v2/zones/tasks/exports/%s/export' % export.id,
+            response.json['links']['export'])
+
+        url = '/zones/tasks/exports/%s/export' % export.id
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual('text/dns', response.content_type)
+        self.assertEqual('bytes', response.headers['Accept-Ranges'])
+        self.assertEqual(data, response.body)
+
+        response = self.client.get(url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual(206, response.status_int)
+        self.assertEqual('bytes 100-199/%d' % len(data),
+                         response.headers['Content-Range'])
+        self.assertEqual(data[100:200], response.body)
+
+        response = self.client.get(
+            url, headers={'Range': 'bytes=%d-' % len(data)}, status=416)
+        self.assertEqual('bytes */%d' % len(data),
+                         response.headers['Content-Range'])
+
+    def test_get_stored_export_compressed(self):
+        data = b'host 3600 IN A 192.0.2.1\n'
+        export = self._create_stored_export('1.zone.gz', gzip.compress(data))
+
+        response = self.client.get(
+            '/zones/tasks/exports/%s/export' % export.id)
+
+        # The export is sent with a gzip Content-Encoding, which the test
+        # client decodes
+        self.assertEqual(data, response.body)
+
+    def test_get_stored_export_missing(self):
+        export = self._create_stored_export('1.zone', b'')
+        impl_filesystem.FilesystemExportStore().delete(export.location)
+
+        self.client.get(
+            '/zones/tasks/exports/%s/export' % export.id, status=404)
+
+    def test_delete_stored_export(self):
+        export = self._create_stored_export('1.zone', b'data')
+
+        self.client.delete('/zones/tasks/exports/%s' % export.id,
+                           status=204)
+
+        # The export is removed from the store too
+        self.assertRaises(exceptions.ZoneExportNotFound,
+                          impl_filesystem.FilesystemExportStore().get_size,
+                          export.location)
+
+    def test_delete_stored_export_missing(self):
+        export = self._create_stored_export('1.zone', b'')
+        impl_filesystem.FilesystemExportStore().delete(export.location)
+
+        self.client.delete('/zones/tasks/exports/%s' % export.id,
+                           status=204)
+        self.client.get('/zones/tasks/exports/%s' % export.id, status=404)
+
     # Metadata tests
     def test_metadata_exists_imports(self):
         response = self.client.get('/zones/tasks/imports')
@@ -18,6 +18,7 @@ from unittest import mock
 
 from oslo_config import cfg
 import oslo_messaging as messaging
+from six.moves.urllib import parse
 
 from designate import exceptions
 from designate import objects
@@ -273,6 +274,33 @@ class ApiV2ZonesTest(ApiV2TestCase):
 
         self._assert_invalid_paging(data, '/zones', key='zones')
 
+    def test_get_zones_cursor(self):
+        data = [self.create_zone(name='x-%s.com.' % i) for i in 'abcde']
+
+        for sort_key in ('created_at', 'name'):
+            response = self.client.get('/zones/', {
+                'cursor': '', 'limit': 2, 'sort_key': sort_key})
+
+            ids = []
+            for _ in range(len(data)):
+                ids.extend(zone['id'] for zone in response.json['zones'])
+                # Counts are not computed for keyset pagination
+                self.assertNotIn('total_count', response.json['metadata'])
+
+                if 'next' not in response.json['links']:
+                    break
+                next_url = response.json['links']['next']
+                self.assertIn('cursor=', next_url)
+                self.assertNotIn('marker=', next_url)
+                response = self.client.get(
+                    '/zones/?%s' % parse.urlparse(next_url).query)
+
+            self.assertEqual([zone.id for zone in data], ids)
+
+        self._assert_exception(
+            'invalid_marker', 400, self.client.get, '/zones/',
+            {'cursor': 'invalid'})
+
     @patch.object(central_service.Service, 'find_zones',
                   side_effect=messaging.MessagingTimeout())
     def test_get_zones_timeout(self, _):
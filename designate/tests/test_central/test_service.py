@@ -17,7 +17,10 @@
 
 import datetime
 import copy
+import os
 import random
+import shutil
+import tempfile
 from collections import namedtuple
 from unittest import mock
 
@@ -33,6 +36,7 @@ from oslo_messaging.rpc import dispatcher as rpc_dispatcher
 from designate import exceptions
 from designate import objects
 from designate.mdns import rpcapi as mdns_api
+from designate.sqlalchemy import session
 from designate.tests import fixtures
 from designate.tests.test_central import CentralTestCase
 from designate.storage.impl_sqlalchemy import tables
@@ -85,6 +89,20 @@ class CentralServiceTest(CentralTestCase):
             with testtools.ExpectedException(exceptions.InvalidZoneName):
                 self.central_service._is_valid_zone_name(context, 'biz.')
 
+    def test_is_valid_zone_name_tld_changes(self):
+        context = self.get_context()
+
+        # Without any TLDs, any TLD is valid
+        self.central_service._is_valid_zone_name(context, 'example.org.')
+
+        tld = self.create_tld(name='com')
+        self.central_service._is_valid_zone_name(context, 'example.com.')
+        with testtools.ExpectedException(exceptions.InvalidZoneName):
+            self.central_service._is_valid_zone_name(context, 'example.org.')
+
+        self.central_service.delete_tld(self.admin_context, tld.id)
+        self.central_service._is_valid_zone_name(context, 'example.org.')
+
     def test_is_valid_recordset_name(self):
         self.config(max_recordset_name_len=18,
                     group='service:central')
@@ -389,7 +407,10 @@ class CentralServiceTest(CentralTestCase):
         tsigkey.name = 'test-key-updated'
 
         # Perform the update
-        self.central_service.update_tsigkey(self.admin_context, tsigkey)
+        mdns = mock.Mock()
+        with mock.patch.object(mdns_api.MdnsAPI, 'get_instance') as get_mdns:
+            get_mdns.return_value = mdns
+            self.central_service.update_tsigkey(self.admin_context, tsigkey)
 
         # Fetch the tsigkey again
         tsigkey = self.central_service.get_tsigkey(
@@ -398,12 +419,23 @@ class CentralServiceTest(CentralTestCase):
         # Ensure the new value took
         self.assertEqual('test-key-updated', tsigkey.name)
 
+        # Ensure mDNS drops the key by its old and new names
+        mdns.invalidate_tsigkeys.assert_called_once_with(
+            self.admin_context, ['test-key', 'test-key-updated'])
+
     def test_delete_tsigkey(self):
         # Create a tsigkey
         tsigkey = self.create_tsigkey()
 
         # Delete the tsigkey
-        self.central_service.delete_tsigkey(self.admin_context, tsigkey['id'])
+        mdns = mock.Mock()
+        with mock.patch.object(mdns_api.MdnsAPI, 'get_instance') as get_mdns:
+            get_mdns.return_value = mdns
+            self.central_service.delete_tsigkey(
+                self.admin_context, tsigkey['id'])
+
+        mdns.invalidate_tsigkeys.assert_called_once_with(
+            self.admin_context, [tsigkey.name])
 
         # Fetch the tsigkey again, ensuring an exception is raised
         exc = self.assertRaises(rpc_dispatcher.ExpectedException,
@@ -523,6 +555,73 @@ class CentralServiceTest(CentralTestCase):
 
         self.assertEqual(exceptions.OverQuota, exc.exc_info[0])
 
+    def _get_zone_with_recordsets(self, *recordsets, **kwargs):
+        zone = objects.Zone.from_dict(
+            self.get_zone_fixture(fixture=kwargs.get('fixture', 0)))
+        zone.tenant_id = self.admin_context.project_id
+        zone.recordsets = objects.RecordSetList(objects=[
+            objects.RecordSet(
+                name='%s.%s' % (name, zone.name), type=type_,
+                records=objects.RecordList(objects=[
+                    objects.Record(data=data) for data in datas]))
+            for name, type_, datas in recordsets
+        ])
+        return zone
+
+    def test_create_zone_with_recordsets(self):
+        zone = self._get_zone_with_recordsets(
+            ('www', 'A', ['192.0.2.1', '192.0.2.2']),
+            ('ftp', 'CNAME', ['www.example.com.']),
+        )
+
+        zone = self.central_service.create_zone(self.admin_context, zone)
+
+        recordsets = self.central_service.find_recordsets(
+            self.admin_context, {'zone_id': zone.id, 'type': '!SOA'})
+        self.assertEqual(
+            ['NS', 'A', 'CNAME'], [rs.type for rs in recordsets])
+
+        records = recordsets[1].records
+        self.assertEqual(
+            ['192.0.2.1', '192.0.2.2'], sorted(r.data for r in records))
+        for record in records:
+            self.assertEqual('CREATE', record.action)
+            self.assertEqual('PENDING', record.status)
+            self.assertEqual(zone.serial, record.serial)
+
+    def test_create_zone_with_recordsets_cname_conflict(self):
+        zone = self._get_zone_with_recordsets(
+            ('www', 'A', ['192.0.2.1']),
+            ('www', 'CNAME', ['ftp.example.com.']),
+        )
+
+        exc = self.assertRaises(rpc_dispatcher.ExpectedException,
+                                self.central_service.create_zone,
+                                self.admin_context, zone)
+
+        self.assertEqual(exceptions.InvalidRecordSetLocation,
+                         exc.exc_info[0])
+
+    def test_create_zone_with_recordsets_over_quota(self):
+        # SOA, NS recordsets exist by default.
+        self.config(quota_zone_recordsets=3)
+
+        zone = self.central_service.create_zone(
+            self.admin_context, self._get_zone_with_recordsets(
+                ('www', 'A', ['192.0.2.1'])))
+        self.assertIsNotNone(zone.id)
+
+        self.config(quota_zone_records=2)
+
+        zone = self._get_zone_with_recordsets(
+            ('www', 'A', ['192.0.2.1', '192.0.2.2']), fixture=1)
+
+        exc = self.assertRaises(rpc_dispatcher.ExpectedException,
+                                self.central_service.create_zone,
+                                self.admin_context, zone)
+
+        self.assertEqual(exceptions.OverQuota, exc.exc_info[0])
+
     def test_create_subzone(self):
         # Create the Parent Zone using fixture 0
         parent_zone = self.create_zone(fixture=0)
@@ -1659,6 +1758,85 @@ class CentralServiceTest(CentralTestCase):
         self.assertIsNotNone(recordset.records[0].id)
         self.assertIsNotNone(recordset.records[1].id)
 
+    def test_export_zone_chunk(self):
+        zone = self.create_zone()
+        records = [{"data": "10.0.0.%d" % i} for i in range(5)]
+        self.create_recordset(zone, records=records)
+
+        expected = self.central_service.export_zone(
+            self.admin_context, zone.id)
+
+        chunks = []
+        marker = None
+        while True:
+            chunk = self.central_service.export_zone_chunk(
+                self.admin_context, zone.id, marker=marker, limit=2)
+            chunks.append(chunk['data'])
+            marker = chunk['marker']
+            if marker is None:
+                break
+
+        # The SOA, NS and 5 A records, 2 at a time
+        self.assertEqual(4, len(chunks))
+        self.assertTrue(chunks[0].startswith('$ORIGIN %s\n' % zone.name))
+        self.assertNotIn('$ORIGIN', chunks[1])
+        self.assertEqual(expected, ''.join(chunks))
+
+    def _lagging_replica(self):
+        """
+        Give central a read replica holding a copy of the database as it is
+        now, which never receives later changes.
+        """
+        _, path = tempfile.mkstemp(suffix='.sqlite')
+        self.addCleanup(os.unlink, path)
+        shutil.copyfile(self.db_fixture.working_copy, path)
+        url = 'sqlite:///%s' % path
+
+        self.config(slave_connection=url, group='storage:sqlalchemy')
+        storage = self.central_service.storage
+        storage.local_store.replica_session = session.get_session(
+            storage.get_name(), connection=url, discriminator=path)
+        self.addCleanup(delattr, storage.local_store, 'replica_session')
+
+    def test_update_recordset_lagging_replica(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone)
+
+        self._lagging_replica()
+        self.central_service.touch_zone(self.admin_context, zone.id)
+        serial = self.storage.get_zone_serial(self.admin_context, zone.id)
+
+        # Reads made for the API are served by the replica
+        self.assertLess(
+            self.central_service.get_zone(self.admin_context, zone.id).serial,
+            serial)
+
+        # Updates read the zone from the primary
+        recordset.ttl = 1800
+        self.central_service.update_recordset(self.admin_context, recordset)
+
+        self.assertGreater(
+            self.storage.get_zone_serial(self.admin_context, zone.id), serial)
+
+    def test_update_zone_lagging_replica(self):
+        zone = self.create_zone()
+
+        self._lagging_replica()
+        self.central_service.touch_zone(self.admin_context, zone.id)
+        serial = self.storage.get_zone_serial(self.admin_context, zone.id)
+
+        # A zone the API read from the replica, with an older serial
+        zone = self.central_service.get_zone(self.admin_context, zone.id)
+        self.assertLess(zone.serial, serial)
+
+        zone.ttl = 1800
+        zone = self.central_service.update_zone(self.admin_context, zone)
+
+        self.assertGreater(zone.serial, serial)
+        self.assertEqual(
+            zone.serial,
+            self.storage.get_zone_serial(self.admin_context, zone.id))
+
     def test_update_recordset(self):
         # Create a zone
         zone = self.create_zone()
@@ -1965,6 +2143,147 @@ class CentralServiceTest(CentralTestCase):
 
         self.assertEqual(exceptions.Forbidden, exc.exc_info[0])
 
+    # Zone Journal Tests
+    def _find_zone_journal(self, zone_id, serial=0):
+        rows = self.central_service.storage.find_zone_journal(
+            self.admin_context, zone_id, serial)
+        return [tuple(row) for row in rows]
+
+    def test_zone_journal_disabled(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone)
+        self.create_record(zone, recordset)
+
+        self.assertEqual([], self._find_zone_journal(zone.id))
+
+    def test_zone_journal_create_zone(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+
+        zone = self.create_zone()
+
+        self.assertEqual([], self._find_zone_journal(zone.id))
+
+    def test_zone_journal_create_recordset(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+        zone = self.create_zone()
+
+        recordset = objects.RecordSet(
+            name='www.%s' % zone.name, type='A', ttl=300,
+            records=objects.RecordList(objects=[
+                objects.Record(data='192.0.2.1'),
+                objects.Record(data='192.0.2.2'),
+            ]))
+        self.central_service.create_recordset(
+            self.admin_context, zone.id, recordset)
+
+        new_zone = self.central_service.get_zone(self.admin_context, zone.id)
+        rows = self._find_zone_journal(zone.id)
+
+        # The SOA change comes with the new records
+        self.assertEqual(
+            set([new_zone.serial]), set(row[0] for row in rows))
+        self.assertEqual([
+            ('ADD', 'www.%s' % zone.name, 'A', 300, '192.0.2.1'),
+            ('ADD', 'www.%s' % zone.name, 'A', 300, '192.0.2.2'),
+        ], sorted(row[1:] for row in rows if row[3] == 'A'))
+
+        soa = sorted(row[1:] for row in rows if row[3] == 'SOA')
+        self.assertEqual(['ADD', 'DEL'], [row[0] for row in soa])
+        self.assertIn(' %d ' % new_zone.serial, soa[0][4])
+        self.assertIn(' %d ' % zone.serial, soa[1][4])
+
+    def test_zone_journal_update_recordset(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone)
+        self.create_record(zone, recordset)
+
+        serial = self.central_service.get_zone(
+            self.admin_context, zone.id).serial
+
+        recordset = self.central_service.get_recordset(
+            self.admin_context, zone.id, recordset.id)
+        recordset.ttl = 1800
+        self.central_service.update_recordset(self.admin_context, recordset)
+
+        rows = self._find_zone_journal(zone.id, serial)
+
+        # A TTL change replaces every RR of the recordset
+        self.assertEqual([
+            ('ADD', recordset.name, 'A', 1800, '192.0.2.1'),
+            ('DEL', recordset.name, 'A', 3600, '192.0.2.1'),
+        ], sorted(row[1:] for row in rows if row[3] == 'A'))
+
+    def test_zone_journal_delete_record(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone)
+        record = self.create_record(zone, recordset)
+
+        serial = self.central_service.get_zone(
+            self.admin_context, zone.id).serial
+
+        self.central_service.delete_record(
+            self.admin_context, zone.id, recordset.id, record.id)
+
+        rows = self._find_zone_journal(zone.id, serial)
+
+        self.assertEqual([
+            ('DEL', recordset.name, 'A', 3600, '192.0.2.1'),
+        ], [row[1:] for row in rows if row[3] == 'A'])
+
+    def test_zone_journal_delete_recordset(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone)
+        self.create_record(zone, recordset)
+
+        serial = self.central_service.get_zone(
+            self.admin_context, zone.id).serial
+
+        self.central_service.delete_recordset(
+            self.admin_context, zone.id, recordset.id)
+
+        rows = self._find_zone_journal(zone.id, serial)
+
+        self.assertEqual([
+            ('DEL', recordset.name, 'A', 3600, '192.0.2.1'),
+        ], [row[1:] for row in rows if row[3] == 'A'])
+
+    def test_zone_journal_without_incrementing_serial(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone)
+
+        self.create_record(zone, recordset, increment_serial=False)
+
+        # The change can't be attributed to a serial, so transfers from
+        # any serial before the next one must be full ones.
+        self.assertEqual([(zone.serial + 1, 'RESET', None, None, None, None)],
+                         self._find_zone_journal(zone.id))
+
+    def test_zone_journal_update_zone_ttl(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+        zone = self.create_zone()
+
+        zone.ttl = 1800
+        zone = self.central_service.update_zone(self.admin_context, zone)
+
+        self.assertIn((zone.serial, 'RESET', None, None, None, None),
+                      self._find_zone_journal(zone.id))
+
+    def test_purge_zone_journal(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+        zone = self.create_zone()
+        self.central_service.touch_zone(self.admin_context, zone.id)
+        self.assertEqual(2, len(self._find_zone_journal(zone.id)))
+
+        purged = self.central_service.purge_zone_journal(
+            self.admin_context, {'zone_id': zone.id})
+
+        self.assertEqual(2, purged)
+        self.assertEqual([], self._find_zone_journal(zone.id))
+
     # Record Tests
     def test_create_record(self):
         zone = self.create_zone()
@@ -3160,6 +3479,112 @@ class CentralServiceTest(CentralTestCase):
 
         self.assertEqual(exceptions.RecordSetNotFound, exc.exc_info[0])
 
+    def test_update_statuses(self):
+        zone = self.create_zone()
+        other = self.create_zone(fixture=1)
+
+        # Delete the second zone (flag it for purging)
+        self.central_service.delete_zone(self.admin_context, other['id'])
+
+        self.central_service.update_statuses(self.admin_context, [
+            (zone['id'], 'SUCCESS', zone['serial']),
+            # A zone that was purged in the meantime is skipped
+            ('8d7f3c2e-0d7a-4b8e-9c55-3fd6b1d5e9a1', 'SUCCESS', 1),
+            (other['id'], 'SUCCESS', other['serial'] + 1),
+        ])
+
+        zone = self.central_service.get_zone(self.admin_context, zone['id'])
+        self.assertEqual('ACTIVE', zone.status)
+        self.assertEqual('NONE', zone.action)
+
+        exc = self.assertRaises(rpc_dispatcher.ExpectedException,
+                                self.central_service.get_zone,
+                                self.admin_context, other['id'])
+        self.assertEqual(exceptions.ZoneNotFound, exc.exc_info[0])
+
+    @mock.patch.object(notifier.Notifier, "info")
+    def test_update_statuses_grouped(self, mock_notifier):
+        zones = [self.create_zone(fixture=i) for i in range(3)]
+        serial = max(zone.serial for zone in zones)
+        mock_notifier.reset_mock()
+
+        storage = self.central_service.storage
+        with mock.patch.object(storage, 'bulk_update_zone_status',
+                               wraps=storage.bulk_update_zone_status) as bulk:
+            self.central_service.update_statuses(self.admin_context, [
+                (zones[0].id, 'SUCCESS', serial),
+                (zones[2].id, 'ERROR', 0),
+                (zones[1].id, 'SUCCESS', serial),
+                (zones[2].id, 'SUCCESS', serial),
+            ])
+
+        # Updates with the same status and serial are applied together, and
+        # the updates to a zone in order
+        self.assertEqual([
+            mock.call(mock.ANY, [zones[0].id, zones[1].id], 'SUCCESS',
+                      serial),
+            mock.call(mock.ANY, [zones[2].id], 'ERROR', 0),
+            mock.call(mock.ANY, [zones[2].id], 'SUCCESS', serial),
+        ], bulk.call_args_list)
+
+        for zone in zones:
+            zone = self.central_service.get_zone(self.admin_context, zone.id)
+            self.assertEqual('ACTIVE', zone.status)
+            self.assertEqual('NONE', zone.action)
+
+            # The records are updated too
+            records = self.central_service.find_records(
+                self.admin_context, {'zone_id': zone.id})
+            self.assertEqual({'ACTIVE'}, {r.status for r in records})
+
+        # Each zone is notified of once, with its new status
+        notified = [call[0][1:] for call in mock_notifier.call_args_list]
+        self.assertEqual(6, len(notified))
+        self.assertEqual({'ACTIVE'}, {zone.status for _, zone in notified})
+        self.assertEqual(
+            {zone.id for zone in zones},
+            {zone.id for type_, zone in notified
+             if type_ == 'dns.zone.update'})
+
+    def test_update_statuses_locks_zones(self):
+        zones = [self.create_zone(fixture=i) for i in range(3)]
+        coordination = self.central_service.coordination
+        locked = []
+
+        def get_lock(name):
+            locked.append(name)
+            return mock.MagicMock()
+
+        with mock.patch.object(coordination, 'get_lock',
+                               side_effect=get_lock):
+            self.central_service.update_statuses(self.admin_context, [
+                (zone.id, 'SUCCESS', zone.serial)
+                for zone in reversed(zones)
+            ])
+
+        # Each zone is locked once, in order
+        self.assertEqual(
+            sorted('zone-%s' % zone.id for zone in zones), locked)
+
+    def test_update_statuses_fallback(self):
+        zone = self.create_zone()
+        other = self.create_zone(fixture=1)
+
+        # The updates are applied one at a time when the batch fails
+        storage = self.central_service.storage
+        with mock.patch.object(storage, 'bulk_update_zone_status',
+                               side_effect=exceptions.DesignateException):
+            self.central_service.update_statuses(self.admin_context, [
+                (zone.id, 'SUCCESS', zone.serial),
+                ('8d7f3c2e-0d7a-4b8e-9c55-3fd6b1d5e9a1', 'SUCCESS', 1),
+                (other.id, 'SUCCESS', other.serial),
+            ])
+
+        for zone_id in (zone.id, other.id):
+            zone = self.central_service.get_zone(self.admin_context, zone_id)
+            self.assertEqual('ACTIVE', zone.status)
+            self.assertEqual('NONE', zone.action)
+
     @mock.patch.object(notifier.Notifier, "info")
     def test_update_status_send_notification(self, mock_notifier):
 
@@ -3547,6 +3972,101 @@ class CentralServiceTest(CentralTestCase):
 
         self.wait_for_import(zone_import.id)
 
+    def test_create_zone_import_batches(self):
+        # SQLite doesn't allow concurrent transactions
+        self.config(zone_import_batch_size=1, zone_import_workers=1,
+                    group='service:central')
+        context = self.get_context()
+        request_body = self.get_zonefile_fixture() + (
+            'ipv4.example.com.       300 IN A        192.0.0.6\n')
+
+        zone_import = self.central_service.create_zone_import(
+            context, request_body)
+        self.wait_for_import(zone_import.id)
+
+        zone_import = self.central_service.get_zone_import(
+            context, zone_import.id)
+        self.assertEqual('COMPLETE', zone_import.status)
+        # Every record but the SOA and the apex NS records
+        self.assertEqual(11, zone_import.records_processed)
+        self.assertIsNotNone(zone_import.records_per_second)
+
+        # The records of ipv4.example.com. were read in two batches
+        recordset = self.central_service.find_recordset(
+            context, criterion={'zone_id': zone_import.zone_id,
+                                'name': 'ipv4.example.com.',
+                                'type': 'A'})
+        self.assertEqual(
+            ['192.0.0.1', '192.0.0.6'],
+            sorted(record.data for record in recordset.records))
+
+    def _import_batch_error(self, records):
+        # SQLite doesn't allow concurrent transactions
+        self.config(zone_import_batch_size=1, zone_import_workers=1,
+                    group='service:central')
+        context = self.get_context()
+        request_body = self.get_zonefile_fixture() + records
+
+        zone_import = self.central_service.create_zone_import(
+            context, request_body)
+        self.wait_for_import(zone_import.id, errorok=True)
+
+        zone_import = self.central_service.get_zone_import(
+            context, zone_import.id)
+        self.assertEqual('ERROR', zone_import.status)
+        self.assertIsNone(zone_import.zone_id)
+
+        # The zone created from the first batch is removed again
+        zones = self.central_service.find_zones(
+            self.admin_context, criterion={'name': 'example.com.'})
+        self.assertEqual(0, len(zones))
+
+        return zone_import.message
+
+    def test_create_zone_import_batch_error(self):
+        message = self._import_batch_error(
+            'ipv4.example.com.       300 IN CNAME    example.com.\n')
+
+        self.assertEqual(
+            'CNAME recordsets may not share a name with any other records',
+            message)
+
+    def test_create_zone_import_batch_bad_request(self):
+        # dnspython keeps only the last rdata of a CNAME in a zonefile
+        error = exceptions.BadRequest(
+            'CNAME recordsets may not have more than 1 record')
+        with mock.patch.object(self.central_service,
+                               '_is_valid_recordset_records',
+                               side_effect=[None, error]):
+            message = self._import_batch_error('')
+
+        self.assertEqual(
+            'CNAME recordsets may not have more than 1 record', message)
+
+    def test_create_zone_import_batches_over_quota(self):
+        # Fewer recordsets than the zonefile has
+        self.config(quota_zone_recordsets=8)
+        self.config(zone_import_batch_size=1, zone_import_workers=2,
+                    group='service:central')
+        context = self.get_context()
+
+        # Batches being written are not committed yet, so storage doesn't
+        # count them.
+        with mock.patch.object(self.central_service, '_import_recordsets'):
+            zone_import = self.central_service.create_zone_import(
+                context, self.get_zonefile_fixture())
+            self.wait_for_import(zone_import.id, errorok=True)
+
+        zone_import = self.central_service.get_zone_import(
+            context, zone_import.id)
+        self.assertEqual('ERROR', zone_import.status)
+        self.assertEqual('The zone exceeds the quota of its tenant.',
+                         zone_import.message)
+
+        zones = self.central_service.find_zones(
+            self.admin_context, criterion={'name': 'example.com.'})
+        self.assertEqual(0, len(zones))
+
     def test_find_zone_imports(self):
         context = self.get_context()
 
@@ -564,7 +564,9 @@ class MdnsRequestHandlerTest(MdnsTestCase):
         with mock.patch.object(self.storage, 'find_zone',
                                return_value=zone):
             with mock.patch.object(self.storage, 'find_recordsets_axfr',
-                                   side_effect=_find_recordsets_axfr):
+                                   side_effect=_find_recordsets_axfr), \
+                    mock.patch.object(self.storage, 'iter_recordsets_axfr',
+                                      side_effect=_find_recordsets_axfr):
                 request = dns.message.from_wire(binascii.a2b_hex(payload))
                 request.environ = {'addr': self.addr, 'context': self.context}
 
@@ -626,7 +628,9 @@ class MdnsRequestHandlerTest(MdnsTestCase):
         with mock.patch.object(self.storage, 'find_zone',
                                return_value=zone):
             with mock.patch.object(self.storage, 'find_recordsets_axfr',
-                                   side_effect=_find_recordsets_axfr):
+                                   side_effect=_find_recordsets_axfr), \
+                    mock.patch.object(self.storage, 'iter_recordsets_axfr',
+                                      side_effect=_find_recordsets_axfr):
                 request = dns.message.from_wire(binascii.a2b_hex(payload))
                 request.environ = {'addr': self.addr, 'context': self.context}
 
@@ -698,7 +702,9 @@ class MdnsRequestHandlerTest(MdnsTestCase):
         with mock.patch.object(self.storage, 'find_zone',
                                return_value=zone):
             with mock.patch.object(self.storage, 'find_recordsets_axfr',
-                                   side_effect=_find_recordsets_axfr):
+                                   side_effect=_find_recordsets_axfr), \
+                    mock.patch.object(self.storage, 'iter_recordsets_axfr',
+                                      side_effect=_find_recordsets_axfr):
                 request = dns.message.from_wire(binascii.a2b_hex(payload))
                 request.environ = {'addr': self.addr, 'context': self.context}
                 request.keyring = {request.keyname: ''}
@@ -782,7 +788,9 @@ class MdnsRequestHandlerTest(MdnsTestCase):
         with mock.patch.object(self.storage, 'find_zone',
                                return_value=zone):
             with mock.patch.object(self.storage, 'find_recordsets_axfr',
-                                   side_effect=_find_recordsets_axfr):
+                                   side_effect=_find_recordsets_axfr), \
+                    mock.patch.object(self.storage, 'iter_recordsets_axfr',
+                                      side_effect=_find_recordsets_axfr):
                 request = dns.message.from_wire(binascii.a2b_hex(payload))
                 request.environ = {'addr': self.addr, 'context': self.context}
 
@@ -858,7 +866,9 @@ class MdnsRequestHandlerTest(MdnsTestCase):
         with mock.patch.object(self.storage, 'find_zone',
                                return_value=zone):
             with mock.patch.object(self.storage, 'find_recordsets_axfr',
-                                   side_effect=_find_recordsets_axfr):
+                                   side_effect=_find_recordsets_axfr), \
+                    mock.patch.object(self.storage, 'iter_recordsets_axfr',
+                                      side_effect=_find_recordsets_axfr):
                 request = dns.message.from_wire(binascii.a2b_hex(payload))
                 request.environ = {'addr': self.addr, 'context': self.context}
 
@@ -1056,3 +1066,288 @@ class MdnsRequestHandlerTest(MdnsTestCase):
 
         response = next(self.handler(request)).to_wire()
         self.assertEqual(expected_response, binascii.b2a_hex(response))
+
+    def _axfr(self, zone_name):
+        request = dns.message.make_query(zone_name, dns.rdatatype.AXFR)
+        request.environ = {'addr': self.addr, 'context': self.context}
+        # Strip the random message ID, so responses can be compared
+        return [r.get_wire()[2:] for r in self.handler(request)]
+
+    def test_dispatch_opcode_query_AXFR_zone_cache(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, 'A')
+        self.create_record(zone, recordset)
+
+        expected = self._axfr(zone.name)
+
+        self.config(zone_cache_enabled=True, group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        # The first AXFR fills the cache, the second is served from it.
+        self.assertEqual(expected, self._axfr(zone.name))
+        with mock.patch.object(self.storage, 'iter_recordsets_axfr') as axfr:
+            self.assertEqual(expected, self._axfr(zone.name))
+            axfr.assert_not_called()
+
+    def test_dispatch_opcode_query_zone_cache_serial_change(self):
+        self.config(zone_cache_enabled=True, group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        zone = self.create_zone()
+
+        request = dns.message.make_query(zone.name, dns.rdatatype.SOA)
+        request.environ = {'addr': self.addr, 'context': self.context}
+
+        # Queries don't build the zone, transfers do
+        response = next(self.handler(request))
+        self.assertEqual(zone.serial, response.answer[0][0].serial)
+        self.assertEqual(0, len(self.handler.zone_cache))
+
+        self._axfr(zone.name)
+        self.assertEqual(1, len(self.handler.zone_cache))
+
+        # Served from the cache
+        with mock.patch.object(self.storage, 'find_recordset') as find:
+            response = next(self.handler(request))
+            find.assert_not_called()
+        self.assertEqual(zone.serial, response.answer[0][0].serial)
+
+        # A serial bump invalidates the cached zone
+        serial = zone.serial
+        self.central_service.touch_zone(self.admin_context, zone.id)
+        zone = self.storage.get_zone(self.admin_context, zone.id)
+        self.assertNotEqual(serial, zone.serial)
+
+        response = next(self.handler(request))
+        self.assertEqual(zone.serial, response.answer[0][0].serial)
+
+    def test_dispatch_opcode_query_zone_cache_tsig_scope(self):
+        self.config(zone_cache_enabled=True, group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        zone = self.create_zone()
+        self.handler.zone_cache.load(self.context, zone)
+
+        request = dns.message.make_query(zone.name, dns.rdatatype.SOA)
+        request.environ = {
+            'addr': self.addr,
+            'context': self.context,
+            'tsigkey': self.tsigkey_pool_unknown,
+        }
+
+        response = next(self.handler(request))
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+
+        request.environ['tsigkey'] = self.tsigkey_pool_default
+
+        response = next(self.handler(request))
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+
+    def test_dispatch_opcode_query_answer_cache(self):
+        self.config(answer_cache_enabled=True, group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        zone = self.create_zone()
+
+        request = dns.message.make_query(zone.name, dns.rdatatype.SOA)
+        request.environ = {'addr': self.addr, 'context': self.context}
+
+        response = next(self.handler(request))
+        self.assertEqual(zone.serial, response.answer[0][0].serial)
+        self.assertEqual(1, len(self.handler.answer_cache))
+
+        # Served from the cache
+        with mock.patch.object(self.storage, 'find_recordset') as find:
+            response = next(self.handler(request))
+            find.assert_not_called()
+        self.assertEqual(zone.serial, response.answer[0][0].serial)
+        self.assertTrue(response.flags & dns.flags.AA)
+
+        # A serial bump invalidates the cached answer
+        serial = zone.serial
+        self.central_service.touch_zone(self.admin_context, zone.id)
+        zone = self.storage.get_zone(self.admin_context, zone.id)
+        self.assertNotEqual(serial, zone.serial)
+
+        response = next(self.handler(request))
+        self.assertEqual(zone.serial, response.answer[0][0].serial)
+
+    def test_dispatch_opcode_query_answer_cache_refused(self):
+        self.config(answer_cache_enabled=True, group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        request = dns.message.make_query('example.com.', dns.rdatatype.SOA)
+        request.environ = {'addr': self.addr, 'context': self.context}
+
+        response = next(self.handler(request))
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+
+        with mock.patch.object(self.storage, 'find_recordset') as find:
+            response = next(self.handler(request))
+            find.assert_not_called()
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+
+    def test_dispatch_opcode_query_answer_cache_tsig_scope(self):
+        self.config(answer_cache_enabled=True, group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        zone = self.create_zone()
+
+        request = dns.message.make_query(zone.name, dns.rdatatype.SOA)
+        request.environ = {
+            'addr': self.addr,
+            'context': self.context,
+            'tsigkey': self.tsigkey_pool_unknown,
+        }
+
+        response = next(self.handler(request))
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+
+        # A refused answer for one key doesn't apply to another
+        request.environ['tsigkey'] = self.tsigkey_pool_default
+
+        response = next(self.handler(request))
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertEqual(2, len(self.handler.answer_cache))
+
+    def test_dispatch_opcode_query_AXFR_snapshot(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, 'A')
+        self.create_record(zone, recordset)
+
+        expected = self._axfr(zone.name)
+
+        self.config(axfr_snapshot_enabled=True, group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        # The first AXFR is rendered and stored, the second is replayed.
+        self.assertEqual(expected, self._axfr(zone.name))
+        self.assertEqual(1, len(self.handler.axfr_snapshots))
+        with mock.patch.object(self.storage, 'iter_recordsets_axfr') as axfr:
+            self.assertEqual(expected, self._axfr(zone.name))
+            axfr.assert_not_called()
+
+    def test_dispatch_opcode_query_AXFR_snapshot_tsig(self):
+        self.config(axfr_snapshot_enabled=True, max_message_size=400,
+                    group='service:mdns')
+        self.handler = handler.RequestHandler(self.storage, self.mock_tg)
+
+        zone = self.create_zone()
+        for fixture in range(2):
+            recordset = self.create_recordset(zone, 'A', fixture=fixture)
+            self.create_record(zone, recordset)
+
+        keyname = dns.name.from_text('test-key-one')
+        keyring = {keyname: b'SomeSecretKey'}
+
+        query = dns.message.make_query(zone.name, dns.rdatatype.AXFR)
+        query.use_tsig(keyring, keyname)
+        wire = query.to_wire()
+
+        for _ in range(2):
+            request = dns.message.from_wire(wire, keyring=keyring)
+            request.environ = {'addr': self.addr, 'context': self.context}
+
+            responses = [r.get_wire() for r in self.handler(request)]
+            self.assertGreater(len(responses), 1)
+
+            # Every message is signed as part of one multi message response
+            tsig_ctx = None
+            for i, response in enumerate(responses):
+                message = dns.message.from_wire(
+                    response, keyring=keyring, request_mac=query.mac,
+                    xfr=True, tsig_ctx=tsig_ctx, multi=True, first=(i == 0))
+                self.assertEqual(query.id, message.id)
+                tsig_ctx = message.tsig_ctx
+
+    def _ixfr(self, zone_name, serial):
+        request = dns.message.make_query(zone_name, dns.rdatatype.IXFR)
+        request.authority.append(dns.rrset.from_text(
+            zone_name, 0, 'IN', 'SOA',
+            'ns1.example.org. hostmaster.example.org. %d 1 1 1 1' % serial))
+        request.environ = {'addr': self.addr, 'context': self.context}
+
+        answer = []
+        for response in self.handler(request):
+            message = dns.message.from_wire(
+                response.get_wire(), one_rr_per_rrset=True)
+            self.assertEqual(dns.rcode.NOERROR, message.rcode())
+            for rrset in message.answer:
+                answer.append((dns.rdatatype.to_text(rrset.rdtype),
+                               rrset[0]))
+        return answer
+
+    def test_dispatch_opcode_query_IXFR(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, 'A')
+        self.create_record(zone, recordset)
+        new_zone = self.storage.get_zone(self.admin_context, zone.id)
+
+        answer = self._ixfr(zone.name, zone.serial)
+
+        self.assertEqual(['SOA', 'SOA', 'SOA', 'A', 'SOA'],
+                         [rdtype for rdtype, _ in answer])
+        self.assertEqual(
+            [new_zone.serial, zone.serial, new_zone.serial, new_zone.serial],
+            [rdata.serial for rdtype, rdata in answer if rdtype == 'SOA'])
+        self.assertEqual('192.0.2.1', answer[3][1].to_text())
+
+    def test_dispatch_opcode_query_IXFR_up_to_date(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+
+        zone = self.create_zone()
+
+        answer = self._ixfr(zone.name, zone.serial)
+
+        self.assertEqual(1, len(answer))
+        self.assertEqual(zone.serial, answer[0][1].serial)
+
+    def test_dispatch_opcode_query_IXFR_not_journaled(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, 'A')
+        self.create_record(zone, recordset)
+
+        answer = self._ixfr(zone.name, zone.serial)
+
+        # Answered with a full zone transfer
+        rdtypes = [rdtype for rdtype, _ in answer]
+        self.assertEqual(['SOA', 'SOA'], [rdtypes[0], rdtypes[-1]])
+        self.assertEqual(['A', 'NS'], sorted(rdtypes[1:-1]))
+
+    def test_dispatch_opcode_query_IXFR_multiple_versions(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+
+        zone = self.create_zone()
+        for fixture in range(2):
+            recordset = self.create_recordset(zone, 'A', fixture=fixture)
+            self.create_record(zone, recordset)
+        new_zone = self.storage.get_zone(self.admin_context, zone.id)
+
+        answer = self._ixfr(zone.name, zone.serial)
+
+        # One difference sequence per version
+        self.assertEqual(
+            ['SOA', 'SOA', 'SOA', 'A', 'SOA', 'SOA', 'A', 'SOA'],
+            [rdtype for rdtype, _ in answer])
+        serials = [rdata.serial for rdtype, rdata in answer
+                   if rdtype == 'SOA']
+        self.assertEqual(zone.serial, serials[1])
+        self.assertEqual(serials[2], serials[3])
+        self.assertEqual([new_zone.serial] * 3,
+                         [serials[0], serials[4], serials[5]])
+
+    def test_dispatch_opcode_query_IXFR_reset(self):
+        self.config(zone_journal_enabled=True, group='service:central')
+
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, 'A')
+        self.create_record(zone, recordset, increment_serial=False)
+        self.central_service.touch_zone(self.admin_context, zone.id)
+
+        answer = self._ixfr(zone.name, zone.serial)
+
+        # The unversioned change forces a full zone transfer
+        self.assertEqual(['A', 'NS'],
+                         sorted(rdtype for rdtype, _ in answer[1:-1]))
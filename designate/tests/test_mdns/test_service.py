@@ -22,9 +22,15 @@ from unittest import mock
 
 import dns
 import dns.message
+import eventlet
+import eventlet.event
+import eventlet.queue
 from oslo_log import log as logging
+from oslo_service import threadgroup
 
+from designate import service
 from designate.tests.test_mdns import MdnsTestCase
+from designate import utils
 
 LOG = logging.getLogger(__name__)
 
@@ -176,3 +182,111 @@ class MdnsServiceTest(MdnsTestCase):
         self.assertEqual(11, mock_socket.recv.call_count)
         self.assertEqual(4, mock_socket.sendall.call_count)
         self.assertEqual(1, mock_socket.close.call_count)
+
+    def test__dns_handle_tcp_conn_out_of_order(self):
+        done = eventlet.event.Event()
+
+        def app(request):
+            # The first query is only answered once the second one is
+            if request['payload'] == b'first':
+                done.wait()
+            else:
+                done.send()
+            yield request['payload']
+
+        dns_service = service.DNSService(
+            app, mock.Mock(), [], 100, 0.5, tcp_max_pipelined=2)
+        mock_socket = mock.Mock()
+        mock_socket.recv.side_effect = [
+            struct.pack("!H", 5), b'first',
+            struct.pack("!H", 6), b'second',
+            b'',
+        ]
+
+        dns_service._dns_handle_tcp_conn(('1.2.3.4', 42), mock_socket)
+
+        self.assertEqual(
+            [mock.call(b'\x00\x06second'), mock.call(b'\x00\x05first')],
+            mock_socket.sendall.call_args_list)
+        self.assertEqual(1, mock_socket.close.call_count)
+
+    def test_refused_response(self):
+        self.assertEqual(
+            binascii.a2b_hex(b"271289050000000000000000"),
+            self.dns_service._refused_response(self.query_payload))
+
+    def test_refused_response_not_a_query(self):
+        self.assertIsNone(
+            self.dns_service._refused_response(self.expected_response))
+        self.assertIsNone(self.dns_service._refused_response(b'\x27\x12'))
+
+    def _udp_client(self, sock_udp):
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(client.close)
+        client.settimeout(5)
+        client.connect(sock_udp.getsockname())
+        return client
+
+    def test_dns_drain_udp(self):
+        sock_udp = utils.bind_udp('127.0.0.1', 0)
+        self.addCleanup(sock_udp.close)
+        client = self._udp_client(sock_udp)
+        for _ in range(3):
+            client.send(self.query_payload)
+
+        self.dns_service.udp_overload_action = 'refuse'
+        queue = eventlet.queue.LightQueue(2)
+
+        self.assertEqual(3, self.dns_service._dns_drain_udp(sock_udp, queue))
+        self.assertEqual(2, queue.qsize())
+        self.assertEqual(0, self.dns_service._dns_drain_udp(sock_udp, queue))
+
+        # The query that did not fit in the queue was refused
+        self.assertEqual(binascii.a2b_hex(b"271289050000000000000000"),
+                         client.recv(512))
+
+    def test_dns_drain_udp_drop(self):
+        sock_udp = utils.bind_udp('127.0.0.1', 0)
+        self.addCleanup(sock_udp.close)
+        client = self._udp_client(sock_udp)
+        client.settimeout(0.1)
+        for _ in range(2):
+            client.send(self.query_payload)
+
+        queue = eventlet.queue.LightQueue(1)
+
+        self.assertEqual(2, self.dns_service._dns_drain_udp(sock_udp, queue))
+        self.assertEqual(1, queue.qsize())
+        self.assertRaises(socket.timeout, client.recv, 512)
+
+    def test_dns_handle_udp_batched(self):
+        tg = threadgroup.ThreadGroup()
+        self.addCleanup(tg.stop)
+        dns_service = service.DNSService(
+            self.dns_service.app, tg, ['127.0.0.1:0'], 100, 0.5,
+            udp_handler_threads=2)
+        dns_service.start()
+        self.addCleanup(dns_service.stop)
+
+        client = self._udp_client(dns_service._dns_socks_udp[0])
+        for _ in range(3):
+            client.send(self.query_payload)
+
+        for _ in range(3):
+            self.assertEqual(self.expected_response, client.recv(512))
+
+    def test_dns_handle_udp_batched_graceful_stop(self):
+        tg = threadgroup.ThreadGroup()
+        self.addCleanup(tg.stop)
+        dns_service = service.DNSService(
+            self.dns_service.app, tg, ['127.0.0.1:0'], 100, 0.5,
+            udp_handler_threads=4, udp_queue_size=2)
+        dns_service.start()
+
+        # Let the handler threads block on the queue
+        eventlet.sleep(0)
+        dns_service.stop()
+
+        with eventlet.Timeout(5):
+            tg.stop(graceful=True)
+        self.assertEqual(0, len(tg.threads))
@@ -151,3 +151,46 @@ class PeriodicGenerateDelayedNotifyTaskTest(TestCase):
                 remaining, len(zones),
                 message='Remaining zones: %s' % zones
             )
+
+
+class ZoneJournalPurgeTest(TestCase):
+    time_threshold = 24 * 60 * 60
+
+    def setUp(self):
+        super(ZoneJournalPurgeTest, self).setUp()
+        self.config(
+            time_threshold=self.time_threshold,
+            group="producer_task:zone_journal_purge"
+        )
+        self.purge_task_fixture = self.useFixture(
+            fixtures.ZoneManagerTaskFixture(tasks.ZoneJournalPurgeTask)
+        )
+
+    def _fetch_journal(self):
+        query = tables.zone_journal.select()
+        return self.central_service.storage.session.execute(query).fetchall()
+
+    def test_purge_zone_journal(self):
+        zone = self.create_zone()
+        storage = self.central_service.storage
+
+        storage.create_zone_journal(
+            self.admin_context, zone.id, zone.serial + 1,
+            [('RESET', None, None, None, None)])
+        storage.create_zone_journal(
+            self.admin_context, zone.id, zone.serial + 2,
+            [('RESET', None, None, None, None)])
+
+        # Age one of the entries past the threshold
+        created_at = timeutils.utcnow() - datetime.timedelta(
+            seconds=self.time_threshold * 2)
+        query = tables.zone_journal.update().\
+            where(tables.zone_journal.c.serial == zone.serial + 1).\
+            values(created_at=created_at)
+        storage.session.execute(query)
+
+        self.purge_task_fixture.task()
+
+        journal = self._fetch_journal()
+        self.assertEqual(1, len(journal))
+        self.assertEqual(zone.serial + 2, journal[0].serial)
@@ -23,6 +23,8 @@ from oslo_messaging.rpc import dispatcher as rpc_dispatcher
 
 from designate import exceptions
 from designate import objects
+from designate import utils
+from designate.sqlalchemy import utils as sqlalchemy_utils
 from designate.utils import generate_uuid
 from designate.storage.base import Storage as StorageBase
 from designate.utils import DEFAULT_MDNS_PORT
@@ -631,6 +633,40 @@ class StorageTestCase(object):
         # Ensure we can page through the results.
         self._ensure_paging(created, self.storage.find_zones)
 
+    def test_find_zones_paging_cursor(self):
+        # Create 5 zones
+        created = [self.create_zone(name='example-%d.org.' % i)
+                   for i in range(5)]
+
+        for sort_key in ('created_at', 'name'):
+            results = []
+            marker = None
+            with mock.patch.object(sqlalchemy_utils, 'check_marker') as check:
+                while True:
+                    page = self.storage.find_zones(
+                        self.admin_context, limit=2, marker=marker,
+                        sort_key=sort_key)
+                    if not page:
+                        break
+                    results.extend(page)
+                    if page.next_cursor is None:
+                        break
+                    marker = utils.decode_cursor(page.next_cursor)
+
+            # The position is taken from the cursor, not looked up
+            check.assert_not_called()
+            self.assertEqual(
+                [zone.id for zone in created], [zone.id for zone in results])
+
+    def test_find_zones_paging_cursor_sort_key_mismatch(self):
+        zone = self.create_zone()
+        marker = utils.decode_cursor(
+            utils.encode_cursor('name', zone.name, zone.id))
+
+        self.assertRaises(
+            exceptions.InvalidMarker, self.storage.find_zones,
+            self.admin_context, marker=marker, sort_key='created_at')
+
     def test_find_zones_criterion(self):
         zone_one = self.create_zone()
         zone_two = self.create_zone(fixture=1)
@@ -659,6 +695,51 @@ class StorageTestCase(object):
         self.assertEqual(zone_two['email'], results[0]['email'])
         self.assertIn('status', zone_two)
 
+    def test_find_zones_relations(self):
+        primary = self.create_zone(fixture=0)
+        secondaries = []
+        for i in range(1, 3):
+            fixture = self.get_zone_fixture('SECONDARY', i)
+            fixture['email'] = 'root@example.com'
+            fixture['masters'] = [
+                {'host': '192.0.2.%d' % i, 'port': 53},
+                {'host': '192.0.2.%d' % (i + 10), 'port': 5353},
+            ]
+            secondaries.append(self.create_zone(**fixture))
+
+        with mock.patch.object(self.storage, '_find_zone_masters',
+                               wraps=self.storage._find_zone_masters) as m:
+            results = self.storage.find_zones(self.admin_context)
+
+        # The masters of every zone in the page are loaded at once
+        self.assertEqual(1, m.call_count)
+        self.assertEqual(3, len(results))
+
+        zones = {zone.id: zone for zone in results}
+        self.assertEqual(0, len(zones[primary.id].masters))
+        for i, secondary in enumerate(secondaries, 1):
+            masters = zones[secondary.id].masters
+            self.assertEqual(
+                {'192.0.2.%d:53' % i, '192.0.2.%d:5353' % (i + 10)},
+                {master.to_data() for master in masters})
+            self.assertEqual(set(), zones[secondary.id].obj_what_changed())
+
+    def test_find_zones_count(self):
+        self.create_zone(fixture=0)
+        self.create_zone(fixture=1)
+
+        results = self.storage.find_zones(self.admin_context, limit=1)
+        self.assertEqual(1, len(results))
+        self.assertEqual(2, results.total_count)
+
+        with mock.patch.object(self.storage, 'count_zones') as count_zones:
+            results = self.storage.find_zones(
+                self.admin_context, limit=1, count=False)
+
+        self.assertEqual(1, len(results))
+        self.assertIsNone(results.total_count)
+        count_zones.assert_not_called()
+
     def test_find_zones_all_tenants(self):
         # Create two contexts with different tenant_id's
         one_context = self.get_admin_context()
@@ -705,6 +786,18 @@ class StorageTestCase(object):
             uuid = 'caf771fc-6b05-4891-bee1-c2a48621f57b'
             self.storage.get_zone(self.admin_context, uuid)
 
+    def test_get_zone_serial(self):
+        zone = self.create_zone()
+
+        serial = self.storage.get_zone_serial(self.admin_context, zone['id'])
+
+        self.assertEqual(zone['serial'], serial)
+
+    def test_get_zone_serial_missing(self):
+        with testtools.ExpectedException(exceptions.ZoneNotFound):
+            uuid = 'caf771fc-6b05-4891-bee1-c2a48621f57b'
+            self.storage.get_zone_serial(self.admin_context, uuid)
+
     def test_get_deleted_zone(self):
         context = self.get_admin_context()
         context.show_deleted = True
@@ -749,6 +842,45 @@ class StorageTestCase(object):
         with testtools.ExpectedException(exceptions.ZoneNotFound):
             self.storage.find_zone(self.admin_context, criterion)
 
+    def test_find_ancestor_zone(self):
+        zone = self.create_zone(name='example.com.')
+        subzone = self.create_zone(name='a.example.com.')
+
+        result = self.storage.find_ancestor_zone(
+            self.admin_context, 'www.b.a.example.com.')
+        self.assertEqual(subzone.id, result.id)
+
+        result = self.storage.find_ancestor_zone(
+            self.admin_context, 'a.example.com.',
+            {'pool_id': zone.pool_id})
+        self.assertEqual(zone.id, result.id)
+
+        with testtools.ExpectedException(exceptions.ZoneNotFound):
+            self.storage.find_ancestor_zone(
+                self.admin_context, 'example.com.')
+
+        with testtools.ExpectedException(exceptions.ZoneNotFound):
+            self.storage.find_ancestor_zone(
+                self.admin_context, 'www.example.com.',
+                {'pool_id': '4b4aeb1d-2ad3-4c9e-b0f2-a6a7d9c3b3c2'})
+
+    def test_find_descendant_zones(self):
+        self.create_zone(name='example.com.')
+        subzone = self.create_zone(name='a.example.com.')
+        subsubzone = self.create_zone(name='b.a.example.com.')
+        # Not below example.com., even though its name ends with it
+        self.create_zone(name='anexample.com.')
+
+        result = self.storage.find_descendant_zones(
+            self.admin_context, 'example.com.')
+        self.assertEqual(
+            sorted([subzone.id, subsubzone.id]),
+            sorted(zone.id for zone in result))
+
+        result = self.storage.find_descendant_zones(
+            self.admin_context, 'b.a.example.com.')
+        self.assertEqual(0, len(result))
+
     def test_find_zone_criterion_lessthan(self):
         zone = self.create_zone()
 
@@ -809,6 +941,77 @@ class StorageTestCase(object):
         # Ensure the version column was incremented
         self.assertEqual(2, zone.version)
 
+    def _sync_secondary_zone(self, zone, recordsets):
+        zone.recordsets = objects.RecordSetList(objects=[
+            objects.RecordSet(
+                name='%s.%s' % (name, zone.name), type=type_, ttl=ttl,
+                records=objects.RecordList(objects=[
+                    objects.Record(data=data) for data in datas]))
+            for name, type_, ttl, datas in recordsets
+        ])
+        self.storage.update_zone(self.admin_context, zone)
+
+        recordsets = self.storage.find_recordsets(
+            self.admin_context, {'zone_id': zone.id})
+        return {(rs.name, rs.type): rs for rs in recordsets}
+
+    def test_update_zone_secondary_recordsets(self):
+        fixture = self.get_zone_fixture('SECONDARY', 0)
+        fixture['email'] = 'root@example.com'
+        fixture['masters'] = [{'host': '192.0.2.10', 'port': 53}]
+        zone = self.create_zone(**fixture)
+        zone = self.storage.get_zone(self.admin_context, zone.id)
+
+        initial = self._sync_secondary_zone(zone, [
+            ('www', 'A', 300, ['192.0.2.1', '192.0.2.2']),
+            ('mail', 'MX', 300, ['10 mail.example.org.']),
+        ])
+        self.assertEqual(
+            {('www.example.com.', 'A'), ('mail.example.com.', 'MX')},
+            set(initial))
+        self.assertEqual(
+            {'192.0.2.1', '192.0.2.2'},
+            {r.data for r in initial['www.example.com.', 'A'].records})
+
+        # Syncing the same content writes nothing
+        with mock.patch.object(self.storage, '_create_bulk') as create_bulk:
+            unchanged = self._sync_secondary_zone(zone, [
+                ('www', 'A', 300, ['192.0.2.2', '192.0.2.1']),
+                ('mail', 'MX', 300, ['10 mail.example.org.']),
+            ])
+        create_bulk.assert_not_called()
+        for key, recordset in initial.items():
+            self.assertEqual(recordset.version, unchanged[key].version)
+            self.assertEqual(
+                {r.id for r in recordset.records},
+                {r.id for r in unchanged[key].records})
+
+        changed = self._sync_secondary_zone(zone, [
+            ('www', 'A', 600, ['192.0.2.2', '192.0.2.3']),
+            ('txt', 'TXT', 300, ['"foo"']),
+        ])
+        self.assertEqual(
+            {('www.example.com.', 'A'), ('txt.example.com.', 'TXT')},
+            set(changed))
+
+        www = changed['www.example.com.', 'A']
+        self.assertEqual(600, www.ttl)
+        self.assertEqual(initial['www.example.com.', 'A'].id, www.id)
+        self.assertGreater(
+            www.version, initial['www.example.com.', 'A'].version)
+        self.assertEqual(
+            {'192.0.2.2', '192.0.2.3'}, {r.data for r in www.records})
+
+        # The record which did not change is kept as it was
+        kept = [r for r in initial['www.example.com.', 'A'].records
+                if r.data == '192.0.2.2']
+        self.assertIn(kept[0].id, {r.id for r in www.records})
+
+        # The records of the purged recordset are removed too
+        self.assertEqual(0, self.storage.count_records(
+            self.admin_context,
+            {'recordset_id': initial['mail.example.com.', 'MX'].id}))
+
     def test_update_zone_duplicate(self):
         # Create two zones
         zone_one = self.create_zone(fixture=0)
@@ -838,6 +1041,67 @@ class StorageTestCase(object):
             uuid = 'caf771fc-6b05-4891-bee1-c2a48621f57b'
             self.storage.delete_zone(self.admin_context, uuid)
 
+    def _create_status_zones(self, states):
+        zones = []
+        for i, (action, status, serial) in enumerate(states):
+            zone = self.create_zone(fixture=i)
+            zone.action = action
+            zone.status = status
+            zone.serial = serial
+            zones.append(self.storage.update_zone(self.admin_context, zone))
+        return zones
+
+    def _get_zone_states(self, zones):
+        context = self.admin_context.elevated(show_deleted=True)
+        states = []
+        for zone in zones:
+            zone = self.storage.get_zone(context, zone.id)
+            states.append((zone.action, zone.status))
+        return states
+
+    def test_bulk_update_zone_status_success(self):
+        zones = self._create_status_zones([
+            ('CREATE', 'PENDING', 10),
+            ('DELETE', 'ERROR', 10),
+            ('UPDATE', 'PENDING', 11),
+        ])
+
+        count = self.storage.bulk_update_zone_status(
+            self.admin_context, [zone.id for zone in zones], 'SUCCESS', 10)
+
+        self.assertEqual(2, count)
+        self.assertEqual([
+            ('NONE', 'ACTIVE'),
+            ('NONE', 'DELETED'),
+            ('UPDATE', 'PENDING'),
+        ], self._get_zone_states(zones))
+
+        # The zone is deleted the same way delete_zone does
+        with testtools.ExpectedException(exceptions.ZoneNotFound):
+            self.storage.get_zone(self.admin_context, zones[1].id)
+        deleted = self.storage.get_zone(
+            self.admin_context.elevated(show_deleted=True), zones[1].id)
+        self.assertEqual(zones[1].id.replace('-', ''), deleted.deleted)
+        self.assertIsNotNone(deleted.deleted_at)
+
+    def test_bulk_update_zone_status_error(self):
+        zones = self._create_status_zones([
+            ('CREATE', 'PENDING', 10),
+            ('UPDATE', 'PENDING', 11),
+            ('CREATE', 'PENDING', 10),
+        ])
+
+        # Only the zones in the list are updated
+        count = self.storage.bulk_update_zone_status(
+            self.admin_context, [zones[0].id, zones[1].id], 'ERROR', 10)
+
+        self.assertEqual(1, count)
+        self.assertEqual([
+            ('CREATE', 'ERROR'),
+            ('UPDATE', 'PENDING'),
+            ('CREATE', 'PENDING'),
+        ], self._get_zone_states(zones))
+
     def test_count_zones(self):
         # in the beginning, there should be nothing
         zones = self.storage.count_zones(self.admin_context)
@@ -919,6 +1183,89 @@ class StorageTestCase(object):
         self.assertIsNotNone(recordset.records[0].id)
         self.assertIsNotNone(recordset.records[1].id)
 
+    def test_create_recordsets_bulk(self):
+        zone = self.create_zone()
+
+        recordsets = objects.RecordSetList(objects=[
+            objects.RecordSet(
+                name='www.%s' % zone['name'], type='A',
+                records=objects.RecordList(objects=[
+                    objects.Record(data='192.0.2.1'),
+                    objects.Record(data='192.0.2.2', description='two'),
+                ])),
+            objects.RecordSet(
+                name='mail.%s' % zone['name'], type='MX', ttl=600,
+                records=objects.RecordList(objects=[
+                    objects.Record(data='10 mail.example.org.'),
+                ])),
+            objects.RecordSet(name='empty.%s' % zone['name'], type='TXT'),
+        ])
+
+        result = self.storage.create_recordsets_bulk(
+            self.admin_context, zone['id'], recordsets)
+
+        self.assertEqual(3, len(result))
+        self.assertEqual(0, len(result[2].records))
+
+        for recordset in result:
+            self.assertIsNotNone(recordset.id)
+            self.assertIsNotNone(recordset.created_at)
+            self.assertEqual(zone['tenant_id'], recordset.tenant_id)
+
+            actual = self.storage.get_recordset(
+                self.admin_context, recordset.id)
+            self.assertEqual(recordset.name, actual.name)
+            self.assertEqual(recordset.ttl, actual.ttl)
+            self.assertEqual(
+                sorted(r.data for r in recordset.records),
+                sorted(r.data for r in actual.records))
+
+            for record in recordset.records:
+                self.assertIsNotNone(record.id)
+                self.assertEqual(recordset.id, record.recordset_id)
+                self.assertEqual(zone['id'], record.zone_id)
+                self.assertEqual(
+                    self.storage._recalculate_record_hash(record),
+                    record.hash)
+
+        self.assertEqual('two', result[0].records[1].description)
+
+        # The reverse_name column is set
+        found = self.storage.find_recordsets(
+            self.admin_context,
+            {'zone_id': zone['id'], 'reverse_name': '.moc.elpmaxe.%'})
+        self.assertEqual(3, len(found))
+
+    def test_create_recordsets_bulk_duplicate(self):
+        zone = self.create_zone()
+        self.create_recordset(zone)
+
+        recordsets = objects.RecordSetList(objects=[
+            objects.RecordSet(name='mail.%s' % zone['name'], type='A'),
+        ])
+
+        self.assertRaises(
+            exceptions.DuplicateRecordSet,
+            self.storage.create_recordsets_bulk,
+            self.admin_context, zone['id'], recordsets)
+
+    def test_create_recordsets_bulk_duplicate_record(self):
+        zone = self.create_zone()
+
+        recordsets = objects.RecordSetList(objects=[
+            objects.RecordSet(
+                name='www.%s' % zone['name'], type='A',
+                records=objects.RecordList(objects=[
+                    objects.Record(data='192.0.2.1'),
+                    objects.Record(data='192.0.2.1'),
+                ])),
+        ])
+
+        self.assertRaises(
+            exceptions.DuplicateRecord,
+            self.storage.create_recordsets_bulk,
+            self.admin_context, zone['id'], recordsets)
+
     def test_find_recordsets(self):
         zone = self.create_zone()
 
@@ -1034,6 +1381,50 @@ class StorageTestCase(object):
             self.assertNotIn(record, records)
             records.append(record)
 
+    def test_iter_recordsets_axfr(self):
+        zone = self.create_zone()
+
+        records = [{"data": "10.0.0.%d" % i} for i in range(5)]
+        self.create_recordset(zone, records=records)
+
+        criterion = {'zone_id': zone.id}
+        expected = self.storage.find_recordsets_axfr(
+            self.admin_context, criterion)
+
+        actual = self.storage.iter_recordsets_axfr(
+            self.admin_context, criterion)
+
+        # Rows are yielded lazily, in the same order as the full query
+        self.assertNotIsInstance(actual, list)
+        self.assertEqual([tuple(row) for row in expected],
+                         [tuple(row) for row in actual])
+        self.assertEqual(7, len(expected))
+
+    def test_iter_recordsets_export(self):
+        zone = self.create_zone()
+
+        records = [{"data": "10.0.0.%d" % i} for i in range(5)]
+        self.create_recordset(zone, records=records)
+
+        criterion = {'zone_id': zone.id}
+        expected = [tuple(row) for row in self.storage.iter_recordsets_export(
+            self.admin_context, criterion)]
+        self.assertEqual(7, len(expected))
+
+        # Continue from the marker of the last row of each page
+        actual = []
+        marker = None
+        while True:
+            rows = [tuple(row) for row in self.storage.iter_recordsets_export(
+                self.admin_context, criterion, marker=marker, limit=2)]
+            actual.extend(rows)
+            if len(rows) < 2:
+                break
+            created_at, recordset_id, record_id = rows[-1][-3:]
+            marker = [created_at.isoformat(), recordset_id, record_id]
+
+        self.assertEqual(expected, actual)
+
     def test_get_recordset(self):
         zone = self.create_zone()
         expected = self.create_recordset(zone)
@@ -1579,6 +1970,166 @@ class StorageTestCase(object):
             records = self.storage.count_records(self.admin_context)
             self.assertEqual(0, records)
 
+    def _create_status_records(self, zone, recordset, states):
+        return [
+            self.storage.create_record(
+                self.admin_context, zone.id, recordset.id,
+                objects.Record.from_dict({
+                    'data': '192.0.2.%d' % i, 'action': action,
+                    'status': status, 'serial': serial,
+                }))
+            for i, (action, status, serial) in enumerate(states)
+        ]
+
+    def _get_record_states(self, records):
+        states = []
+        for record in records:
+            record = self.storage.get_record(self.admin_context, record.id)
+            states.append((record.action, record.status))
+        return states
+
+    def test_bulk_update_record_status_success(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, records=[])
+        records = self._create_status_records(zone, recordset, [
+            ('CREATE', 'PENDING', 10),
+            ('UPDATE', 'ERROR', 10),
+            ('DELETE', 'PENDING', 10),
+            ('CREATE', 'PENDING', 11),
+            ('NONE', 'ACTIVE', 5),
+        ])
+
+        count = self.storage.bulk_update_record_status(
+            self.admin_context, zone.id, 'SUCCESS', 10)
+
+        self.assertEqual(3, count)
+        self.assertEqual([
+            ('NONE', 'ACTIVE'),
+            ('NONE', 'ACTIVE'),
+            ('NONE', 'DELETED'),
+            ('CREATE', 'PENDING'),
+            ('NONE', 'ACTIVE'),
+        ], self._get_record_states(records))
+
+    def test_bulk_update_record_status_error(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, records=[])
+        records = self._create_status_records(zone, recordset, [
+            ('CREATE', 'PENDING', 10),
+            ('CREATE', 'PENDING', 11),
+            ('NONE', 'ACTIVE', 5),
+        ])
+
+        count = self.storage.bulk_update_record_status(
+            self.admin_context, zone.id, 'ERROR', 10)
+
+        self.assertEqual(1, count)
+        self.assertEqual([
+            ('CREATE', 'ERROR'),
+            ('CREATE', 'PENDING'),
+            ('NONE', 'ACTIVE'),
+        ], self._get_record_states(records))
+
+        # A serial of 0 applies to every pending record, including the
+        # zone's SOA and NS records
+        count = self.storage.bulk_update_record_status(
+            self.admin_context, zone.id, 'ERROR', 0)
+
+        self.assertEqual(3, count)
+        self.assertEqual(('CREATE', 'ERROR'),
+                         self._get_record_states(records)[1])
+
+    def test_bulk_update_record_status_no_zone(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, records=[])
+        records = self._create_status_records(zone, recordset, [
+            ('UPDATE', 'ACTIVE', 10),
+            ('DELETE', 'PENDING', 10),
+        ])
+
+        self.storage.bulk_update_record_status(
+            self.admin_context, zone.id, 'NO_ZONE', 10)
+
+        self.assertEqual([
+            ('CREATE', 'ERROR'),
+            ('NONE', 'DELETED'),
+        ], self._get_record_states(records))
+
+    def test_purge_deleted_records(self):
+        zone = self.create_zone()
+        recordset = self.create_recordset(zone, records=[])
+        other = self.create_recordset(zone, fixture=1, records=[])
+        self._create_status_records(zone, recordset, [
+            ('NONE', 'DELETED', 10),
+            ('NONE', 'DELETED', 10),
+        ])
+        active = self._create_status_records(zone, other, [
+            ('NONE', 'ACTIVE', 10),
+            ('NONE', 'DELETED', 10),
+        ])[0]
+
+        count = self.storage.purge_deleted_records(
+            self.admin_context, zone.id)
+
+        self.assertEqual(3, count)
+
+        # The recordset left without records is removed too
+        self.assertRaises(exceptions.RecordSetNotFound,
+                          self.storage.get_recordset,
+                          self.admin_context, recordset.id)
+
+        other = self.storage.get_recordset(self.admin_context, other.id)
+        self.assertEqual([active.id], [r.id for r in other.records])
+
+        self.assertEqual(0, self.storage.purge_deleted_records(
+            self.admin_context, zone.id))
+
+    # Zone Journal Tests
+    def test_create_zone_journal(self):
+        zone = self.create_zone()
+
+        self.storage.create_zone_journal(
+            self.admin_context, zone.id, zone.serial + 1, [
+                ('DEL', 'www.%s' % zone.name, 'A', 3600, '192.0.2.1'),
+                ('ADD', 'www.%s' % zone.name, 'A', 3600, '192.0.2.2'),
+            ])
+        self.storage.create_zone_journal(
+            self.admin_context, zone.id, zone.serial + 2,
+            [('RESET', None, None, None, None)])
+
+        rows = self.storage.find_zone_journal(
+            self.admin_context, zone.id, zone.serial)
+
+        self.assertEqual(3, len(rows))
+        self.assertEqual(
+            [zone.serial + 1, zone.serial + 1, zone.serial + 2],
+            [row[0] for row in rows])
+        self.assertEqual(
+            ('ADD', 'www.%s' % zone.name, 'A', 3600, '192.0.2.2'),
+            tuple(sorted(rows[:2])[0][1:]))
+        self.assertEqual('RESET', rows[2][1])
+
+        # Only entries newer than the serial are found
+        rows = self.storage.find_zone_journal(
+            self.admin_context, zone.id, zone.serial + 1)
+        self.assertEqual(1, len(rows))
+
+    def test_purge_zone_journal(self):
+        zone = self.create_zone()
+        self.storage.create_zone_journal(
+            self.admin_context, zone.id, zone.serial + 1,
+            [('RESET', None, None, None, None)])
+
+        purged = self.storage.purge_zone_journal(
+            self.admin_context, {'created_at': '<=2000-01-01 00:00:00'})
+        self.assertEqual(0, purged)
+
+        purged = self.storage.purge_zone_journal(
+            self.admin_context, {'zone_id': zone.id})
+        self.assertEqual(1, purged)
+        self.assertEqual([], self.storage.find_zone_journal(
+            self.admin_context, zone.id, 0))
+
     def test_ping(self):
         pong = self.storage.ping(self.admin_context)
 
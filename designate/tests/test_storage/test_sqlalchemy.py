@@ -38,6 +38,49 @@ class SqlalchemyStorageTest(StorageTestCase, TestCase):
             self.assertFalse(pong['status'])
             self.assertIsNotNone(pong['rtt'])
 
+    def test_read_session(self):
+        self.assertFalse(self.storage.has_read_replica)
+        self.assertIs(self.storage.session, self.storage.read_session)
+
+    def test_read_session_replica(self):
+        self.config(slave_connection=self.db_fixture.url,
+                    group='storage:sqlalchemy')
+        self.assertTrue(self.storage.has_read_replica)
+
+        zone = self.create_zone()
+
+        # Reads only go to the replica when asked for
+        self.assertIs(self.storage.session, self.storage.read_session)
+
+        with self.storage.replica_reads():
+            replica_session = self.storage.read_session
+            self.assertIsNot(self.storage.session, replica_session)
+
+            with mock.patch.object(replica_session, 'execute',
+                                   wraps=replica_session.execute) as execute:
+                zones = self.storage.find_zones(self.admin_context)
+                self.assertEqual([zone.id], [z.id for z in zones])
+                self.assertTrue(execute.called)
+
+                execute.reset_mock()
+                self.assertEqual(zone.serial, self.storage.get_zone_serial(
+                    self.admin_context, zone.id))
+                self.assertTrue(execute.called)
+
+            # Reads made in a transaction use the primary
+            self.storage.begin()
+            try:
+                self.assertIs(self.storage.session, self.storage.read_session)
+            finally:
+                self.storage.rollback()
+            self.assertIs(replica_session, self.storage.read_session)
+
+            with self.storage.primary_reads():
+                self.assertIs(self.storage.session, self.storage.read_session)
+            self.assertIs(replica_session, self.storage.read_session)
+
+        self.assertIs(self.storage.session, self.storage.read_session)
+
     def test_schema_table_names(self):
         table_names = [
             u'blacklists',
@@ -57,6 +100,7 @@ class SqlalchemyStorageTest(StorageTestCase, TestCase):
             u'tlds',
             u'tsigkeys',
             u'zone_attributes',
+            u'zone_journal',
             u'zone_masters',
             u'zone_tasks',
             u'zone_transfer_accepts',
@@ -93,6 +137,10 @@ class SqlalchemyStorageTest(StorageTestCase, TestCase):
                 "rrset_ttl": "CREATE INDEX rrset_ttl ON recordsets (ttl)",  # noqa
                 "rrset_tenant_id": "CREATE INDEX rrset_tenant_id ON recordsets (tenant_id)",  # noqa
             },
+            "zone_journal": {
+                "zone_journal_created_at": "CREATE INDEX zone_journal_created_at ON zone_journal (created_at)",  # noqa
+                "zone_journal_zone_id_serial": "CREATE INDEX zone_journal_zone_id_serial ON zone_journal (zone_id, serial)",  # noqa
+            },
             "zones": {
                 "delayed_notify": "CREATE INDEX delayed_notify ON zones (delayed_notify)",  # noqa
                 "reverse_name_deleted": "CREATE INDEX reverse_name_deleted ON zones (reverse_name, deleted)",  # noqa
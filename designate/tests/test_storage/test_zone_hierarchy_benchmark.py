@@ -0,0 +1,137 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Benchmarks for finding the ancestor and descendants of a zone name in a
+table of many zones.
+
+These are skipped unless DESIGNATE_BENCHMARK is set, and use 1M zones
+unless DESIGNATE_BENCHMARK_ZONES says otherwise, e.g.
+
+    DESIGNATE_BENCHMARK=1 stestr run test_zone_hierarchy_benchmark
+
+Run them against MySQL or PostgreSQL, by pointing the database fixture at
+it, for numbers that mean anything for a deployment.
+"""
+import os
+import sys
+import time
+
+import testtools
+
+from designate import exceptions
+from designate import storage
+from designate.storage.impl_sqlalchemy import tables
+from designate.tests import TestCase
+
+POOL_ID = '794ccc2c-d751-44fe-b57f-8894c9f5c842'
+BATCH_SIZE = 10000
+
+
+@testtools.skipUnless(os.environ.get('DESIGNATE_BENCHMARK'),
+                      'DESIGNATE_BENCHMARK is not set')
+class ZoneHierarchyBenchmark(TestCase):
+    def setUp(self):
+        super(ZoneHierarchyBenchmark, self).setUp()
+        self.storage = storage.get_storage('sqlalchemy')
+        self.count = int(os.environ.get('DESIGNATE_BENCHMARK_ZONES', 1000000))
+        self.context = self.admin_context.elevated(all_tenants=True)
+        self._populate()
+
+    def _populate(self):
+        """
+        Insert zones in a hierarchy four levels deep, e.g.
+        a3.a2.a1.example42.com.
+        """
+        rows = []
+        for i in range(self.count):
+            labels = ['example%d' % (i // 8), 'com']
+            for level in range(i % 4):
+                labels.insert(0, 'a%d' % level)
+            name = '.'.join(labels) + '.'
+            # Every 8 zones share their top level zone, so make names unique
+            if i % 8 >= 4:
+                name = 'b' + name
+            rows.append({
+                'name': name,
+                'reverse_name': name[::-1],
+                'email': 'hostmaster@example.com',
+                'type': 'PRIMARY',
+                'pool_id': POOL_ID,
+                'tenant_id': 'tenant',
+            })
+
+            if len(rows) == BATCH_SIZE:
+                self.storage.session.execute(tables.zones.insert(), rows)
+                rows = []
+
+        if rows:
+            self.storage.session.execute(tables.zones.insert(), rows)
+
+    def _time(self, description, f, names):
+        start_time = time.time()
+        for name in names:
+            f(name)
+        elapsed = time.time() - start_time
+
+        sys.stderr.write(
+            '\n%s in %d zones: %.2fms per lookup\n' % (
+                description, self.count, elapsed * 1000 / len(names)))
+
+    def _names(self):
+        step = max(self.count // 8 // 100, 1)
+        return ['www.a2.a1.a0.example%d.com.' % i
+                for i in range(0, self.count // 8, step)]
+
+    def test_find_ancestor_zone(self):
+        criterion = {'pool_id': POOL_ID}
+
+        def per_label(zone_name):
+            labels = zone_name.split('.')
+            for i in range(1, len(labels) - 1):
+                try:
+                    return self.storage.find_zone(
+                        self.context,
+                        dict(criterion, name='.'.join(labels[i:])))
+                except exceptions.ZoneNotFound:
+                    pass
+
+        def single_query(zone_name):
+            return self.storage.find_ancestor_zone(
+                self.context, zone_name, criterion)
+
+        names = self._names()
+        self.assertEqual(
+            per_label(names[-1]).id, single_query(names[-1]).id)
+
+        self._time('Ancestor, a query per label', per_label, names)
+        self._time('Ancestor, a single query', single_query, names)
+
+    def test_find_descendant_zones(self):
+        criterion = {'pool_id': POOL_ID}
+
+        def like(zone_name):
+            return self.storage.find_zones(
+                self.context,
+                dict(criterion, name='%%.%s' % zone_name), count=False)
+
+        def reverse_name(zone_name):
+            return self.storage.find_descendant_zones(
+                self.context, zone_name, criterion)
+
+        names = [name.split('.', 4)[-1] for name in self._names()]
+        self.assertEqual(
+            sorted(zone.id for zone in like(names[-1])),
+            sorted(zone.id for zone in reverse_name(names[-1])))
+        self.assertEqual(6, len(like(names[-1])))
+
+        self._time('Descendants, LIKE on name', like, names)
+        self._time('Descendants, range of reverse_name', reverse_name, names)
@@ -214,6 +214,7 @@ class AgentBackendTestCase(tests.TestCase):
     @mock.patch.object(agent.dns_query, 'udp')
     def test_send_dns_message_tcp(self, mock_udp, mock_tcp):
         self.CONF.set_override('all_tcp', True, 'service:mdns')
+        self.CONF.set_override('tcp_pool_size', 0, 'service:worker')
 
         mock_tcp.return_value = 'mock tcp resp'
 
@@ -223,3 +224,17 @@ class AgentBackendTestCase(tests.TestCase):
         agent.dns_query.tcp.assert_called_with('msg', 'host', port=123,
                                                timeout=1)
         self.assertEqual('mock tcp resp', out)
+
+    @mock.patch.object(agent.worker_utils, 'get_tcp_pool')
+    @mock.patch.object(agent.dns_query, 'tcp')
+    def test_send_dns_message_tcp_pool(self, mock_tcp, mock_get_tcp_pool):
+        self.CONF.set_override('all_tcp', True, 'service:mdns')
+
+        mock_get_tcp_pool.return_value.query.return_value = 'mock tcp resp'
+
+        out = self.backend._send_dns_message('msg', 'host', 123, 1)
+
+        self.assertFalse(agent.dns_query.tcp.called)
+        mock_get_tcp_pool.return_value.query.assert_called_with(
+            'msg', 'host', port=123, timeout=1)
+        self.assertEqual('mock tcp resp', out)
@@ -0,0 +1,101 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Benchmarks for rendering AXFRs of large, synthetic zones.
+
+These are skipped unless DESIGNATE_BENCHMARK is set, e.g.
+
+    DESIGNATE_BENCHMARK=1 stestr run test_axfr_benchmark
+"""
+import os
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+import dns.message
+import dns.rdatatype
+import dns.renderer
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+import oslotest.base
+import testtools
+
+from designate import objects
+from designate.mdns import handler
+
+CONF = cfg.CONF
+
+ZONE_ID = 'e2bed4dc-9d01-11e4-89d3-123b93f75cba'
+SOA_ROW = ('UUID-SOA', 'SOA', None, 'example.com.',
+           'ns1.example.org. example.example.com. 1 3600 600 86400 3600',
+           'NONE')
+
+
+def _rows(count, records_per_recordset=2):
+    """Rows as returned by find_recordsets_axfr, ordered by recordset id"""
+    for i in range(count // records_per_recordset):
+        recordset_id = 'UUID-%08d' % i
+        name = 'host-%d.example.com.' % i
+        for j in range(records_per_recordset):
+            yield (recordset_id, 'A', 300, name,
+                   '10.%d.%d.%d' % (i >> 16 & 255, i >> 8 & 255, j), 'NONE')
+
+
+@testtools.skipUnless(os.environ.get('DESIGNATE_BENCHMARK'),
+                      'DESIGNATE_BENCHMARK is not set')
+class MdnsAXFRBenchmark(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(MdnsAXFRBenchmark, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+        self.context = mock.Mock()
+        self.storage = mock.Mock()
+        self.tg = mock.Mock()
+        self.handler = handler.RequestHandler(self.storage, self.tg)
+        self.zone = objects.Zone(
+            id=ZONE_ID, name='example.com.', serial=1, ttl=3600,
+            pool_id='794ccc2c-d751-44fe-b57f-8894c9f5c842',
+        )
+
+    def _transfer(self, count):
+        self.storage.find_recordsets_axfr.return_value = [SOA_ROW]
+        self.storage.iter_recordsets_axfr.return_value = _rows(count)
+
+        request = dns.message.make_query('example.com.', dns.rdatatype.AXFR)
+        request.environ = {'context': self.context}
+
+        tracemalloc.start()
+        start_time = time.time()
+        messages = answers = 0
+        try:
+            for response in self.handler._send_axfr(request, self.zone):
+                messages += 1
+                answers += response.counts[dns.renderer.ANSWER]
+            elapsed = time.time() - start_time
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        sys.stderr.write(
+            '\nAXFR of %d records: %d messages in %.2fs '
+            '(%.0f records/sec), peak memory %.1f MiB\n' % (
+                count, messages, elapsed, count / elapsed,
+                peak / 1024.0 / 1024.0))
+
+        # Every record, plus the SOA at the start and end
+        self.assertEqual(count + 2, answers)
+
+    def test_axfr_10k(self):
+        self._transfer(10000)
+
+    def test_axfr_100k(self):
+        self._transfer(100000)
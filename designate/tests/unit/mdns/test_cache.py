@@ -0,0 +1,385 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+import time
+from unittest import mock
+
+import dns.rdatatype
+import fixtures
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+import oslotest.base
+
+from designate import exceptions
+from designate import objects
+from designate.mdns import cache
+
+CONF = cfg.CONF
+
+SOA_ROW = ['UUID1', 'SOA', None, 'example.com.',
+           'ns1.example.org. example.example.com. 1 3600 600 86400 3600',
+           'NONE']
+
+
+class MdnsZoneCacheTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(MdnsZoneCacheTest, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+        self.context = mock.Mock()
+        self.storage = mock.Mock()
+        self.storage.get_zone_serial.return_value = 1
+        self.storage.iter_recordsets_axfr.return_value = [
+            SOA_ROW,
+            ['UUID2', 'A', 300, 'www.example.com.', '192.0.2.1', 'NONE'],
+            ['UUID2', 'A', 300, 'www.example.com.', '192.0.2.2', 'NONE'],
+            ['UUID3', 'NS', None, 'example.com.', 'ns1.example.org.',
+             'NONE'],
+        ]
+        self.zone = objects.Zone(
+            id='e2bed4dc-9d01-11e4-89d3-123b93f75cba',
+            name='example.com.',
+            pool_id='794ccc2c-d751-44fe-b57f-8894c9f5c842',
+            serial=1,
+            ttl=3600,
+        )
+        self.cache = cache.ZoneCache(self.storage, max_size=1024 * 1024,
+                                     revalidate_interval=0)
+
+    def test_load(self):
+        zone = self.cache.load(self.context, self.zone)
+
+        self.assertEqual(1, len(self.cache))
+        self.assertEqual(3600, zone.soa.ttl)
+        self.assertEqual(2, len(zone.rrsets))
+
+        rrset = zone.get_rrset('www.example.com.', dns.rdatatype.A)
+        self.assertEqual(2, len(rrset))
+        self.assertEqual(300, rrset.ttl)
+
+        rrset = zone.get_rrset('example.com.', dns.rdatatype.NS)
+        self.assertEqual(3600, rrset.ttl)
+
+    def test_load_without_soa(self):
+        self.storage.iter_recordsets_axfr.return_value = []
+
+        self.assertIsNone(self.cache.load(self.context, self.zone))
+        self.assertEqual(0, len(self.cache))
+
+    def test_get(self):
+        self.cache.load(self.context, self.zone)
+
+        zone = self.cache.get(self.context, 'example.com.')
+
+        self.assertEqual(self.zone.id, zone.id)
+        self.storage.get_zone_serial.assert_called_once_with(
+            self.context, self.zone.id)
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get(self.context, 'example.com.'))
+        self.storage.get_zone_serial.assert_not_called()
+
+    def test_get_serial_changed(self):
+        self.cache.load(self.context, self.zone)
+        self.storage.get_zone_serial.return_value = 2
+
+        self.assertIsNone(self.cache.get(self.context, 'example.com.'))
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(0, self.cache.size)
+
+    def test_get_zone_deleted(self):
+        self.cache.load(self.context, self.zone)
+        self.storage.get_zone_serial.side_effect = exceptions.ZoneNotFound
+
+        self.assertIsNone(self.cache.get(self.context, 'example.com.'))
+        self.assertEqual(0, len(self.cache))
+
+    def test_get_within_revalidate_interval(self):
+        self.cache.revalidate_interval = 60
+        self.cache.load(self.context, self.zone)
+
+        self.assertIsNotNone(self.cache.get(self.context, 'example.com.'))
+        self.storage.get_zone_serial.assert_not_called()
+
+    def test_lookup(self):
+        self.cache.load(self.context, self.zone)
+
+        zone = self.cache.lookup(self.context, 'www.example.com.')
+
+        self.assertEqual(self.zone.id, zone.id)
+        self.assertIsNone(self.cache.lookup(self.context, 'example.org.'))
+
+    def test_evict_least_recently_used(self):
+        self.cache.load(self.context, self.zone)
+        self.cache.max_size = self.cache.size * 2
+
+        other = objects.Zone(
+            id='c5ab8ebd-6306-4d82-84a0-3b5ba2d3bd6c', name='example.net.',
+            pool_id=self.zone.pool_id, serial=1, ttl=3600)
+        self.cache.load(self.context, other)
+        self.assertEqual(2, len(self.cache))
+
+        # Touch example.com. so example.net. is the least recently used.
+        self.cache.get(self.context, 'example.com.')
+
+        third = objects.Zone(
+            id='0d9f4c68-5c6b-4d1b-9bde-3b0b1b6f57d1', name='example.org.',
+            pool_id=self.zone.pool_id, serial=1, ttl=3600)
+        self.cache.load(self.context, third)
+
+        self.assertEqual(2, len(self.cache))
+        self.assertIsNotNone(self.cache.get(self.context, 'example.com.'))
+        self.assertIsNone(self.cache.get(self.context, 'example.net.'))
+
+    def test_zone_larger_than_cache(self):
+        self.cache.max_size = 1
+
+        zone = self.cache.load(self.context, self.zone)
+
+        self.assertIsNotNone(zone)
+        self.assertEqual(0, len(self.cache))
+
+        # It isn't built again until its serial changes
+        self.assertIsNone(self.cache.load(self.context, self.zone))
+        self.assertEqual(1, self.storage.iter_recordsets_axfr.call_count)
+
+        self.zone.serial = 2
+        self.assertIsNotNone(self.cache.load(self.context, self.zone))
+        self.assertEqual(2, self.storage.iter_recordsets_axfr.call_count)
+
+    def test_matches(self):
+        zone = self.cache.load(self.context, self.zone)
+
+        self.assertTrue(zone.matches({'id': self.zone.id,
+                                      'pool_id': self.zone.pool_id}))
+        self.assertFalse(zone.matches({'id': self.zone.id,
+                                       'pool_id': 'other'}))
+
+
+class MdnsRRsetsFromRowsTest(oslotest.base.BaseTestCase):
+    def test_rrsets_from_rows(self):
+        rows = [
+            SOA_ROW,
+            ['UUID2', 'A', 300, 'www.example.com.', '192.0.2.1', 'NONE'],
+            ['UUID2', 'A', 300, 'www.example.com.', '192.0.2.2', 'NONE'],
+            ['UUID3', 'TXT', None, 'example.com.', '"hello world"', 'NONE'],
+            ['UUID4', 'A', None, 'foo.example.com.', '\\# 4 c0000203',
+             'NONE'],
+        ]
+
+        rrsets = list(cache.rrsets_from_rows(iter(rows), 3600))
+
+        self.assertEqual(
+            [
+                'example.com. 3600 IN SOA ns1.example.org. '
+                'example.example.com. 1 3600 600 86400 3600',
+                'www.example.com. 300 IN A 192.0.2.1\n'
+                'www.example.com. 300 IN A 192.0.2.2',
+                'example.com. 3600 IN TXT "hello world"',
+                'foo.example.com. 3600 IN A 192.0.2.3',
+            ],
+            [rrset.to_text() for rrset in rrsets]
+        )
+
+    def test_get_rdata_type(self):
+        rdtype, rdcls = cache.get_rdata_type('MX')
+
+        self.assertEqual(dns.rdatatype.MX, rdtype)
+        self.assertEqual('MX', rdcls.__name__)
+        self.assertIs(rdcls, cache.get_rdata_type('MX')[1])
+
+
+class MdnsAnswerCacheTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(MdnsAnswerCacheTest, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+        self.context = mock.Mock()
+        self.storage = mock.Mock()
+        self.storage.get_zone_serial.return_value = 1
+        self.zone_id = 'e2bed4dc-9d01-11e4-89d3-123b93f75cba'
+        self.key = ('example.com.', dns.rdatatype.SOA, None)
+        self.rrset = mock.sentinel.rrset
+        self.cache = cache.AnswerCache(self.storage, max_size=3,
+                                       revalidate_interval=0,
+                                       negative_ttl=5)
+
+    def test_set_answer_get(self):
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+
+        answer = self.cache.get(self.context, self.key)
+
+        self.assertFalse(answer.refused)
+        self.assertIs(self.rrset, answer.rrset)
+        self.storage.get_zone_serial.assert_called_once_with(
+            self.context, self.zone_id)
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get(self.context, self.key))
+
+    def test_get_serial_changed(self):
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+        self.storage.get_zone_serial.return_value = 2
+
+        self.assertIsNone(self.cache.get(self.context, self.key))
+        self.assertEqual(0, len(self.cache))
+
+    def test_get_zone_deleted(self):
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+        self.storage.get_zone_serial.side_effect = exceptions.ZoneNotFound
+
+        self.assertIsNone(self.cache.get(self.context, self.key))
+
+    def test_get_within_revalidate_interval(self):
+        self.cache.revalidate_interval = 60
+        other = ('www.example.com.', dns.rdatatype.A, None)
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+        self.cache.set_answer(other, self.zone_id, 1, self.rrset)
+        self.storage.get_zone_serial.return_value = 2
+
+        self.assertIsNotNone(self.cache.get(self.context, self.key))
+        self.assertIsNotNone(self.cache.get(self.context, other))
+        self.storage.get_zone_serial.assert_not_called()
+
+    def test_revalidate_once_per_zone(self):
+        self.cache.revalidate_interval = 60
+        self.cache._serials[self.zone_id] = (1, 0)
+        other = ('www.example.com.', dns.rdatatype.A, None)
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+        self.cache.set_answer(other, self.zone_id, 1, self.rrset)
+
+        self.cache.get(self.context, self.key)
+        self.cache.get(self.context, other)
+
+        self.storage.get_zone_serial.assert_called_once_with(
+            self.context, self.zone_id)
+
+    def test_set_answer_newer_serial(self):
+        other = ('www.example.com.', dns.rdatatype.A, None)
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+
+        # Answers read at the older serial are stale
+        self.cache.set_answer(other, self.zone_id, 2, self.rrset)
+        self.storage.get_zone_serial.return_value = 2
+
+        self.assertEqual(1, len(self.cache))
+        self.assertIsNone(self.cache.get(self.context, self.key))
+        self.assertIsNotNone(self.cache.get(self.context, other))
+
+    def test_invalidate(self):
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+        self.cache.invalidate(self.zone_id)
+
+        self.assertIsNone(self.cache.get(self.context, self.key))
+        self.storage.get_zone_serial.assert_not_called()
+
+    def test_set_refused(self):
+        self.cache.set_refused(self.key)
+
+        self.assertTrue(self.cache.get(self.context, self.key).refused)
+        self.storage.get_zone_serial.assert_not_called()
+
+    def test_set_refused_expired(self):
+        self.cache.set_refused(self.key)
+
+        with mock.patch('time.time', return_value=time.time() + 5):
+            self.assertIsNone(self.cache.get(self.context, self.key))
+
+    def test_set_refused_disabled(self):
+        self.cache.negative_ttl = 0
+        self.cache.set_refused(self.key)
+
+        self.assertEqual(0, len(self.cache))
+
+    def test_evict_unused_first(self):
+        keys = [('%d.example.com.' % i, dns.rdatatype.A, None)
+                for i in range(4)]
+        for key in keys[:3]:
+            self.cache.set_answer(key, self.zone_id, 1, self.rrset)
+
+        # The oldest answer was used, so the next one goes instead
+        self.cache.get(self.context, keys[0])
+        self.cache.set_answer(keys[3], self.zone_id, 1, self.rrset)
+
+        self.assertEqual(3, len(self.cache))
+        self.assertIsNotNone(self.cache.get(self.context, keys[0]))
+        self.assertIsNone(self.cache.get(self.context, keys[1]))
+        self.assertIsNotNone(self.cache.get(self.context, keys[3]))
+
+    def test_evict_last_answer_of_zone(self):
+        self.cache.max_size = 1
+        other = ('example.org.', dns.rdatatype.SOA, None)
+        self.cache.set_answer(self.key, self.zone_id, 1, self.rrset)
+        self.cache.set_refused(other)
+
+        self.assertEqual({}, self.cache._serials)
+        self.assertEqual({}, self.cache._zone_keys)
+
+
+class MdnsAXFRSnapshotCacheTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(MdnsAXFRSnapshotCacheTest, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+        self.packets = [(b'\x01' * 100, 3), (b'\x02' * 50, 1)]
+        self.key = ('e2bed4dc-9d01-11e4-89d3-123b93f75cba', 1, 65535,
+                    'example.com.')
+
+    def test_set_get(self):
+        snapshots = cache.AXFRSnapshotCache(max_size=1024 * 1024)
+        snapshots.set(self.key, self.packets)
+
+        self.assertEqual(self.packets, list(snapshots.get(self.key)))
+        self.assertIsNone(snapshots.get(self.key[:1] + (2,) + self.key[2:]))
+
+    def test_set_newer_serial(self):
+        snapshots = cache.AXFRSnapshotCache(max_size=1024 * 1024)
+        snapshots.set(self.key, self.packets)
+
+        key = self.key[:1] + (2,) + self.key[2:]
+        snapshots.set(key, self.packets)
+
+        self.assertEqual(1, len(snapshots))
+        self.assertIsNone(snapshots.get(self.key))
+        self.assertIsNotNone(snapshots.get(key))
+
+    def test_set_too_large(self):
+        snapshots = cache.AXFRSnapshotCache(max_size=100)
+
+        self.assertIsNone(snapshots.set(self.key, self.packets))
+        self.assertEqual(0, len(snapshots))
+
+    def test_evict_least_recently_used(self):
+        snapshots = cache.AXFRSnapshotCache(max_size=300)
+        other = ('c5ab8ebd-6306-4d82-84a0-3b5ba2d3bd6c',) + self.key[1:]
+
+        snapshots.set(self.key, self.packets)
+        snapshots.set(other, self.packets)
+        self.assertEqual(1, len(snapshots))
+        self.assertIsNone(snapshots.get(self.key))
+        self.assertIsNotNone(snapshots.get(other))
+
+    def test_path(self):
+        path = self.useFixture(fixtures.TempDir()).path
+        snapshots = cache.AXFRSnapshotCache(max_size=1024 * 1024, path=path)
+
+        snapshots.set(self.key, self.packets)
+        self.assertEqual(1, len(os.listdir(path)))
+        self.assertEqual(self.packets, list(snapshots.get(self.key)))
+
+        # Another process using the same path picks the snapshot up
+        other = cache.AXFRSnapshotCache(max_size=1024 * 1024, path=path)
+        self.assertEqual(self.packets, list(other.get(self.key)))
+
+        # A newer serial removes the old snapshot file
+        key = self.key[:1] + (2,) + self.key[2:]
+        other.set(key, self.packets)
+        self.assertEqual(1, len(os.listdir(path)))
+        self.assertIsNone(
+            cache.AXFRSnapshotCache(path=path).get(self.key))
@@ -175,6 +175,43 @@ class MdnsHandleTest(oslotest.base.BaseTestCase):
             self.stdlog.logger.output
         )
 
+    def _replica_axfr(self, replica_serial, primary_serial):
+        zone_id = 'e2bed4dc-9d01-11e4-89d3-123b93f75cba'
+        self.storage.has_read_replica = True
+        self.storage.primary_reads.return_value = mock.MagicMock()
+        self.storage.find_zone.side_effect = [
+            objects.Zone(id=zone_id, name='example.org.',
+                         serial=replica_serial),
+            objects.Zone(id=zone_id, name='example.org.',
+                         serial=primary_serial),
+        ]
+        self.storage.get_zone_serial.return_value = primary_serial
+        self.handler._send_axfr = mock.Mock(return_value=['AXFR'])
+
+        request = dns.message.make_query(
+            'example.org.', dns.rdatatype.AXFR
+        )
+        request.environ = dict(context=self.context)
+
+        self.assertEqual(['AXFR'], list(self.handler._handle_axfr(request)))
+
+        return self.handler._send_axfr.call_args[0][1]
+
+    def test_axfr_replica_current(self):
+        zone = self._replica_axfr(2, 2)
+
+        self.assertEqual(2, zone.serial)
+        self.assertEqual(1, self.storage.find_zone.call_count)
+        self.assertEqual(1, self.storage.primary_reads.call_count)
+
+    def test_axfr_replica_lag(self):
+        zone = self._replica_axfr(1, 2)
+
+        # The zone is found again, and transferred from the primary
+        self.assertEqual(2, zone.serial)
+        self.assertEqual(2, self.storage.find_zone.call_count)
+        self.assertEqual(2, self.storage.primary_reads.call_count)
+
     def test_get_max_message_size(self):
         CONF.set_override('max_message_size', 32768, 'service:mdns')
 
@@ -205,12 +242,14 @@ class MdnsHandleTest(oslotest.base.BaseTestCase):
 class TestRequestHandlerCall(oslotest.base.BaseTestCase):
     def setUp(self):
         super(TestRequestHandlerCall, self).setUp()
-        self.handler = handler.RequestHandler(mock.Mock(), mock.Mock())
+        self.storage = mock.MagicMock()
+        self.handler = handler.RequestHandler(self.storage, mock.Mock())
         self.handler._central_api = mock.Mock(name='central_api')
 
         # Use a simple handlers that doesn't require a real request
         self.handler._handle_query_error = mock.Mock(return_value='Error')
         self.handler._handle_axfr = mock.Mock(return_value=['AXFR'])
+        self.handler._handle_ixfr = mock.Mock(return_value=['IXFR'])
         self.handler._handle_record_query = mock.Mock(
             return_value=['Record Query'])
         self.handler._handle_notify = mock.Mock(return_value=['Notify'])
@@ -271,7 +310,7 @@ class TestRequestHandlerCall(oslotest.base.BaseTestCase):
             mock.Mock(rdclass=dns.rdataclass.IN, rdtype=dns.rdatatype.IXFR)
         ]
 
-        self.assertEqual(['AXFR'], list(self.handler(request)))
+        self.assertEqual(['IXFR'], list(self.handler(request)))
 
     def test__call__record_query(self):
         request = mock.Mock()
@@ -281,12 +320,14 @@ class TestRequestHandlerCall(oslotest.base.BaseTestCase):
         ]
 
         self.assertEqual(['Record Query'], list(self.handler(request)))
+        self.storage.replica_reads.assert_called_once_with()
 
     def test__call__notify(self):
         request = mock.Mock()
         request.opcode.return_value = dns.opcode.NOTIFY
 
         self.assertEqual(['Notify'], list(self.handler(request)))
+        self.storage.replica_reads.assert_not_called()
 
     def test_convert_to_rrset_no_records(self):
         zone = objects.Zone.from_dict({'ttl': 1234})
@@ -92,3 +92,16 @@ class MdnsServiceTest(oslotest.base.BaseTestCase):
         app = self.service.dns_application
 
         self.assertIsInstance(app, designate.dnsutils.DNSMiddleware)
+
+    def test_tsigkey_cache(self):
+        app = self.service.dns_application
+
+        # The keyring and the middleware looking up the key share the cache
+        self.assertIsInstance(
+            app.tsig_keyring.tsigkey_cache, designate.dnsutils.TsigKeyCache)
+        self.assertIs(app.tsig_keyring.tsigkey_cache,
+                      app.application.tsigkey_cache)
+
+        tsigkey_endpoint = self.service.endpoints[2]
+        self.assertIs(self.service.tsigkey_cache,
+                      tsigkey_endpoint.tsigkey_cache)
@@ -0,0 +1,30 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from unittest import mock
+
+import oslotest.base
+
+from designate.mdns import tsigkey
+
+
+class MdnsTsigKeyEndpointTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(MdnsTsigKeyEndpointTest, self).setUp()
+        self.tsigkey_cache = mock.Mock()
+        self.endpoint = tsigkey.TsigKeyEndpoint(
+            mock.Mock(), self.tsigkey_cache)
+
+    def test_invalidate_tsigkeys(self):
+        self.endpoint.invalidate_tsigkeys(mock.Mock(), ['key1', 'key2'])
+
+        self.tsigkey_cache.invalidate.assert_has_calls(
+            [mock.call('key1'), mock.call('key2')])
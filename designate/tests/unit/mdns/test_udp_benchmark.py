@@ -0,0 +1,180 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Benchmark of how the DNS listener scales with worker processes, under a
+local UDP flood of SOA queries.
+
+Like the mdns workers, every worker process binds its own SO_REUSEPORT
+sockets, and the kernel spreads the queries across them. The queries are
+answered by a minimal application behind the serialization middleware, so
+what is measured is the listener and the packet handling rather than
+storage.
+
+This is skipped unless DESIGNATE_BENCHMARK is set. It compares 1 worker to
+DESIGNATE_BENCHMARK_WORKERS, the number of CPUs by default. Set
+DESIGNATE_BENCHMARK_UDP_HANDLERS to use that many UDP handler threads per
+worker, rather than a thread per query, e.g.
+
+    DESIGNATE_BENCHMARK=1 stestr run test_udp_benchmark
+"""
+import os
+import signal
+import socket
+import sys
+import time
+
+import dns.flags
+import dns.message
+import dns.rrset
+import eventlet.patcher
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+from oslo_service import threadgroup
+import oslotest.base
+import testtools
+
+from designate import dnsutils
+from designate import policy
+from designate import service
+
+CONF = cfg.CONF
+
+# The load generator uses plain blocking sockets, green ones would make it
+# the bottleneck.
+original_socket = eventlet.patcher.original('socket')
+
+SOA = dns.rrset.from_text(
+    'example.com.', 3600, 'IN', 'SOA',
+    'ns1.example.org. example.example.com. 1 3600 600 86400 3600')
+
+
+def _soa_application(request):
+    response = dns.message.make_response(request)
+    response.flags |= dns.flags.AA
+    response.answer.append(SOA)
+    yield response
+
+
+@testtools.skipUnless(os.environ.get('DESIGNATE_BENCHMARK'),
+                      'DESIGNATE_BENCHMARK is not set')
+@testtools.skipUnless(hasattr(socket, 'SO_REUSEPORT'),
+                      'SO_REUSEPORT is not available')
+class DNSServiceUDPBenchmark(oslotest.base.BaseTestCase):
+    duration = 5
+    clients = 8
+    # Queries each client keeps in flight
+    window = 16
+
+    def setUp(self):
+        super(DNSServiceUDPBenchmark, self).setUp()
+        conf = self.useFixture(cfg_fixture.Config(CONF))
+        conf.conf([], project='designate')
+        policy.init()
+        self.addCleanup(policy.reset)
+
+        self.workers = int(os.environ.get(
+            'DESIGNATE_BENCHMARK_WORKERS', os.cpu_count()))
+        self.udp_handler_threads = int(os.environ.get(
+            'DESIGNATE_BENCHMARK_UDP_HANDLERS', 0))
+        self.app = dnsutils.SerializationMiddleware(_soa_application)
+
+    @staticmethod
+    def _free_port():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+        finally:
+            sock.close()
+
+    def _fork(self, f, *args):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                f(*args)
+            finally:
+                os._exit(0)
+        return pid
+
+    def _serve(self, port, ready):
+        tg = threadgroup.ThreadGroup(1000)
+        dns_service = service.DNSService(
+            self.app, tg, ['127.0.0.1:%d' % port], 100, 0.5,
+            udp_handler_threads=self.udp_handler_threads)
+        dns_service.start()
+        os.write(ready, b'.')
+        while True:
+            time.sleep(3600)
+
+    def _flood(self, port, results):
+        sock = original_socket.socket(
+            original_socket.AF_INET, original_socket.SOCK_DGRAM)
+        sock.settimeout(0.5)
+        sock.connect(('127.0.0.1', port))
+        query = dns.message.make_query('example.com.', 'SOA').to_wire()
+
+        answered = 0
+        end = time.time() + self.duration
+        while time.time() < end:
+            try:
+                sock.recv(65535)
+            except original_socket.timeout:
+                # Dropped queries, fill the window again
+                for _ in range(self.window):
+                    sock.send(query)
+                continue
+            answered += 1
+            sock.send(query)
+
+        os.write(results, b'%d\n' % answered)
+
+    def _run(self, workers):
+        port = self._free_port()
+        ready_r, ready_w = os.pipe()
+        results_r, results_w = os.pipe()
+
+        servers = [self._fork(self._serve, port, ready_w)
+                   for _ in range(workers)]
+        try:
+            started = 0
+            while started < workers:
+                started += len(os.read(ready_r, workers))
+
+            clients = [self._fork(self._flood, port, results_w)
+                       for _ in range(self.clients)]
+            for pid in clients:
+                os.waitpid(pid, 0)
+        finally:
+            for pid in servers:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+
+        os.close(results_w)
+        with os.fdopen(results_r) as f:
+            answered = sum(int(line) for line in f)
+        for fd in (ready_r, ready_w):
+            os.close(fd)
+
+        qps = answered / self.duration
+        sys.stderr.write(
+            '\n%d worker(s), %d clients: %d queries/s\n' % (
+                workers, self.clients, qps))
+        return qps
+
+    def test_soa_flood(self):
+        single = self._run(1)
+        multiple = self._run(self.workers)
+
+        self.assertGreater(single, 0)
+        sys.stderr.write(
+            '\n%d workers answered %.1fx the queries of 1\n' % (
+                self.workers, multiple / single))
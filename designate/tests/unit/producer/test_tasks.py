@@ -88,7 +88,7 @@ class PeriodicTest(oslotest.base.BaseTestCase):
         # Iterate through the items causing the "paging" to be done.
         list(map(lambda i: next(iterer), items))
         central.find_zones.assert_called_once_with(
-            ctxt, {"shard": "BETWEEN 0,9"}, limit=100)
+            ctxt, {"shard": "BETWEEN 0,9"}, count=False, limit=100)
 
         central.find_zones.reset_mock()
 
@@ -100,6 +100,7 @@ class PeriodicTest(oslotest.base.BaseTestCase):
         central.find_zones.assert_called_once_with(
             ctxt,
             {"shard": "BETWEEN 0,9"},
+            count=False,
             marker=items[-1].id,
             limit=100
         )
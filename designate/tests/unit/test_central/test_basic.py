@@ -265,6 +265,9 @@ class CentralBasic(TestCase):
         designate.central.service.storage = mock.NonCallableMock(spec_set=[
             'get_storage',
         ])
+        storage = designate.central.service.storage.get_storage.return_value
+        storage.primary_reads.return_value = mock.MagicMock()
+        storage.replica_reads.return_value = mock.MagicMock()
         designate.central.service.rpcapi = mock.Mock()
         designate.central.service.worker_rpcapi = mock.Mock()
         self.context = mock.NonCallableMock(spec_set=[
@@ -748,10 +751,12 @@ class CentralZoneTestCase(CentralBasic):
     def test_is_superzone(self):
         central_service = self.central_service
 
-        central_service.storage.find_zones = mock.Mock()
+        central_service.storage.find_descendant_zones = mock.Mock()
         central_service._is_superzone(self.context, 'example.org.', '1')
-        _, crit = self.service.storage.find_zones.call_args[0]
-        self.assertEqual({'name': '%.example.org.', 'pool_id': '1'}, crit)
+        _, name, crit = (
+            self.service.storage.find_descendant_zones.call_args[0])
+        self.assertEqual('example.org.', name)
+        self.assertEqual({'pool_id': '1'}, crit)
 
     @patch('designate.central.service.utils.increment_serial')
     def FIXME_test_increment_zone_serial(self, utils_inc_ser):
@@ -2023,16 +2028,16 @@ class IsSubzoneTestCase(CentralBasic):
     def setUp(self):
         super(IsSubzoneTestCase, self).setUp()
 
-        def find_zone(ctx, criterion):
-            LOG.debug("Calling find_zone on %r" % criterion)
-            if criterion['name'] == 'example.com.':
-                LOG.debug("Returning %r" % criterion['name'])
-                return criterion['name']
+        def find_ancestor_zone(ctx, zone_name, criterion):
+            LOG.debug("Calling find_ancestor_zone on %r" % zone_name)
+            if zone_name.endswith('.example.com.'):
+                LOG.debug("Returning 'example.com.'")
+                return 'example.com.'
 
             LOG.debug("Not found")
             raise exceptions.ZoneNotFound
 
-        self.service.storage.find_zone = find_zone
+        self.service.storage.find_ancestor_zone = find_ancestor_zone
 
     def test_is_subzone_false(self):
         r = self.service._is_subzone(self.context, 'com',
@@ -2149,7 +2154,8 @@ class CentralZoneExportTests(CentralBasic):
                 task_type='EXPORT',
                 status='PENDING',
                 message=None,
-                tenant_id='t'
+                tenant_id='t',
+                location=None
             )
         )
 
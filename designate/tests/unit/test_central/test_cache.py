@@ -0,0 +1,140 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import re
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+import oslotest.base
+
+from designate.central import cache
+from designate import objects
+
+CONF = cfg.CONF
+
+
+class TldTrieTest(oslotest.base.BaseTestCase):
+    def test_match(self):
+        tlds = cache.TldTrie(['com', 'co.uk', 'uk', 'COM'])
+
+        self.assertEqual(3, len(tlds))
+        self.assertEqual((True, False), tlds.match('example.com.'))
+        self.assertEqual((True, False), tlds.match('www.Example.CO.UK.'))
+        self.assertEqual((True, True), tlds.match('co.uk.'))
+        self.assertEqual((True, True), tlds.match('com.'))
+        self.assertEqual((False, False), tlds.match('example.org.'))
+        # Only whole labels match
+        self.assertEqual((False, False), tlds.match('example.kuk.'))
+
+
+class BlacklistMatcherTest(oslotest.base.BaseTestCase):
+    def _search(self, matcher, name):
+        return any(regex.search(name) for regex, _ in matcher.regexes)
+
+    def test_combined(self):
+        matcher = cache.BlacklistMatcher(
+            ['^example.org.$', 'com.$', '(foo|bar)'])
+
+        self.assertEqual(1, len(matcher.regexes))
+        self.assertEqual(3, len(matcher))
+        self.assertTrue(self._search(matcher, 'example.org.'))
+        self.assertTrue(self._search(matcher, 'example.com.'))
+        self.assertTrue(self._search(matcher, 'bar.net.'))
+        self.assertFalse(self._search(matcher, 'www.example.org.'))
+
+    def test_backreference(self):
+        matcher = cache.BlacklistMatcher(['(a)', r'^(b)\1\.'])
+
+        self.assertEqual(2, len(matcher.regexes))
+        self.assertTrue(self._search(matcher, 'bb.org.'))
+        self.assertFalse(self._search(matcher, 'bc.org.'))
+
+    def test_not_combinable(self):
+        matcher = cache.BlacklistMatcher(['(?i)^EXAMPLE', 'com.$'])
+
+        self.assertEqual(2, len(matcher.regexes))
+        self.assertTrue(self._search(matcher, 'example.org.'))
+
+    def test_global_flags(self):
+        matcher = cache.BlacklistMatcher(
+            ['com.$', '(?i)^EXAMPLE', 'org.$'])
+
+        # The flag doesn't apply to the patterns combined without it
+        self.assertEqual(2, len(matcher.regexes))
+        self.assertEqual(3, len(matcher))
+        self.assertTrue(self._search(matcher, 'Example.net.'))
+        self.assertTrue(self._search(matcher, 'foo.com.'))
+        self.assertFalse(self._search(matcher, 'foo.COM.'))
+        self.assertFalse(self._search(matcher, 'foo.ORG.'))
+
+    def test_invalid(self):
+        self.assertRaises(re.error, cache.BlacklistMatcher, ['(a', 'b'])
+
+
+class ZoneNameCacheTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(ZoneNameCacheTest, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+        self.context = mock.Mock()
+        self.storage = mock.Mock()
+        self.storage.primary_reads.return_value = mock.MagicMock()
+        self.storage.find_tlds.return_value = objects.TldList(
+            objects=[objects.Tld(name='com')])
+        self.cache = cache.ZoneNameCache(self.storage, ttl=60)
+
+    def test_get_tlds(self):
+        self.assertEqual(
+            (True, False), self.cache.get_tlds(self.context).match('a.com.'))
+        self.cache.get_tlds(self.context)
+
+        self.storage.find_tlds.assert_called_once_with(self.context)
+
+    def test_get_tlds_expired(self):
+        self.cache.ttl = 0
+
+        self.cache.get_tlds(self.context)
+        self.cache.get_tlds(self.context)
+
+        self.assertEqual(2, self.storage.find_tlds.call_count)
+
+    def test_invalidate(self):
+        self.cache.get_tlds(self.context)
+        self.cache.invalidate('tlds')
+        self.storage.find_tlds.return_value = objects.TldList()
+
+        self.assertEqual(0, len(self.cache.get_tlds(self.context)))
+        self.assertEqual(2, self.storage.find_tlds.call_count)
+
+    def test_invalidate_during_load(self):
+        def find_tlds(context):
+            # The TLDs change while they are read
+            self.cache.invalidate('tlds')
+            return objects.TldList()
+
+        self.storage.find_tlds.side_effect = find_tlds
+
+        self.cache.get_tlds(self.context)
+        self.cache.get_tlds(self.context)
+
+        # What was loaded is used, but not kept
+        self.assertEqual(2, self.storage.find_tlds.call_count)
+
+    def test_get_blacklists(self):
+        self.storage.find_blacklists.return_value = objects.BlacklistList(
+            objects=[objects.Blacklist(pattern='^example')])
+
+        blacklists = self.cache.get_blacklists(self.context)
+        self.cache.get_blacklists(self.context)
+
+        self.assertEqual(1, len(blacklists))
+        self.storage.find_blacklists.assert_called_once_with(self.context)
+        self.storage.find_tlds.assert_not_called()
@@ -23,10 +23,12 @@ import dns.rcode
 import dns.rdatatype
 import dns.zone
 import eventlet
+import fixtures
 import oslotest.base
 from dns import zone as dnszone
 
 import designate.tests
+from designate import context
 from designate import dnsutils
 from designate import exceptions
 from designate import objects
@@ -149,6 +151,91 @@ class TestUtils(designate.tests.TestCase):
         self.assertEqual(len(SAMPLES), len(zone.recordsets))
         self.assertEqual('example.com.', zone.name)
 
+    def test_zone_file_reader(self):
+        zone_file = self.get_zonefile_fixture()
+
+        batches = list(dnsutils.ZoneFileReader(zone_file, 2))
+
+        # The SOA is in the first batch
+        self.assertIsNotNone(
+            batches[0].get_rdataset(batches[0].origin, 'SOA'))
+        self.assertGreater(len(batches), 2)
+
+        recordsets = objects.RecordSetList()
+        for batch in batches:
+            self.assertLessEqual(len(batch.nodes), 3)
+            recordsets.extend(
+                dnsutils.dnspyrecords_to_recordsetlist(batch.nodes))
+
+        # Every name is read exactly once, as the zonefile keeps the records
+        # of each name together.
+        self.assertEqual(
+            sorted(SAMPLES), sorted((rrset.name, rrset.type)
+                                    for rrset in recordsets))
+
+    def test_zone_file_reader_split_name(self):
+        zone_file = (
+            '$ORIGIN example.com.\n'
+            '@ 600 IN SOA ns1.example.com. nsadmin.example.com. '
+            '1 7200 3600 2419200 10800\n'
+            'a 300 IN A 192.0.0.1\n'
+            'b 300 IN A 192.0.0.2\n'
+            'a 300 IN A 192.0.0.3\n'
+        )
+
+        batches = list(dnsutils.ZoneFileReader(zone_file, 1))
+
+        names = [sorted(name.to_text() for name in batch.nodes)
+                 for batch in batches]
+        self.assertEqual(
+            [['example.com.'], ['a.example.com.'], ['b.example.com.'],
+             ['a.example.com.']],
+            names)
+
+    def test_zone_file_reader_state(self):
+        zone_file = (
+            '$ORIGIN example.com.\n'
+            '@ 600 IN SOA ns1.example.com. nsadmin.example.com. (\n'
+            '    1 7200 3600 2419200\n'
+            '    10800 ) ; the minimum\n'
+            'a IN A 192.0.0.1\n'
+            '$ORIGIN sub.example.com.\n'
+            'b IN TXT "(; not a comment"\n'
+            '  IN A 192.0.0.2\n'
+            '$TTL 60\n'
+            'c IN MX (\n'
+            '5 mail.example.com. )\n'
+        )
+
+        batches = list(dnsutils.ZoneFileReader(zone_file, 1))
+
+        # Each chunk is read with the $ORIGIN and default TTL of its start
+        rdatasets = [
+            (name.to_text(), rdataset.rdtype, rdataset.ttl)
+            for batch in batches
+            for name, rdataset in batch.iterate_rdatasets()
+        ]
+        self.assertEqual([
+            ('example.com.', dns.rdatatype.SOA, 600),
+            ('a.example.com.', dns.rdatatype.A, 10800),
+            ('b.sub.example.com.', dns.rdatatype.TXT, 10800),
+            ('b.sub.example.com.', dns.rdatatype.A, 10800),
+            ('c.sub.example.com.', dns.rdatatype.MX, 60),
+        ], rdatasets)
+        self.assertEqual(4, len(batches))
+        self.assertEqual(
+            ['"(; not a comment"'],
+            [rdata.to_text() for rdata in batches[2].find_rdataset(
+                'b.sub.example.com.', 'TXT')])
+
+    def test_zone_file_reader_no_soa(self):
+        zone_file = self.get_zonefile_fixture(variant='nosoa')
+
+        self.assertRaises(
+            dnszone.NoSOA,
+            list, dnsutils.ZoneFileReader(zone_file, 1),
+        )
+
     def test_zone_lock(self):
         # Initialize a ZoneLock
         lock = dnsutils.ZoneLock(0.1)
@@ -211,6 +298,129 @@ class TestUtils(designate.tests.TestCase):
         self.assertEqual(middleware.process_request(notify), (response,))
 
 
+class TestTsigKeyCache(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(TestTsigKeyCache, self).setUp()
+        self.useFixture(fixtures.MockPatchObject(
+            context.DesignateContext, 'get_admin_context'))
+        self.storage = mock.Mock()
+        self.storage.find_tsigkey.return_value = objects.TsigKey(
+            id='7fbb6304-5e74-4691-bd80-cef3cff5eb03', name='key',
+            algorithm='hmac-sha256', secret='c2VjcmV0', scope='POOL',
+            resource_id='794ccc2c-d751-44fe-b57f-8894c9f5c842')
+        self.cache = dnsutils.TsigKeyCache(self.storage, ttl=60, max_size=2)
+
+    def test_get(self):
+        key = self.cache.get('key')
+        self.assertIs(key, self.cache.get('key'))
+
+        self.assertEqual(b'secret', key.secret)
+        self.assertEqual('POOL', key.tsigkey.scope)
+        self.assertEqual(1, self.storage.find_tsigkey.call_count)
+        self.assertEqual(
+            {'name': 'key'}, self.storage.find_tsigkey.call_args[0][1])
+
+    def test_get_not_found(self):
+        self.storage.find_tsigkey.side_effect = exceptions.TsigKeyNotFound
+
+        self.assertRaises(exceptions.TsigKeyNotFound, self.cache.get, 'key')
+        self.assertRaises(exceptions.TsigKeyNotFound, self.cache.get, 'key')
+        self.assertEqual(0, len(self.cache))
+
+    def test_get_disabled(self):
+        self.cache.ttl = 0
+
+        self.cache.get('key')
+        self.cache.get('key')
+
+        self.assertEqual(2, self.storage.find_tsigkey.call_count)
+        self.assertEqual(0, len(self.cache))
+
+    def test_get_expired(self):
+        self.cache.get('key').loaded_at -= 60
+
+        self.cache.get('key')
+
+        self.assertEqual(2, self.storage.find_tsigkey.call_count)
+
+    @mock.patch.object(eventlet, 'spawn_n')
+    def test_get_refresh(self, mock_spawn_n):
+        mock_spawn_n.side_effect = lambda f, *args: f(*args)
+        key = self.cache.get('key')
+        key.loaded_at -= 30
+
+        # The old key is used while the key is reloaded
+        self.assertIs(key, self.cache.get('key'))
+        self.assertIsNot(key, self.cache.get('key'))
+        self.assertEqual(2, self.storage.find_tsigkey.call_count)
+
+    @mock.patch.object(eventlet, 'spawn_n')
+    def test_get_refresh_deleted(self, mock_spawn_n):
+        mock_spawn_n.side_effect = lambda f, *args: f(*args)
+        self.cache.get('key').loaded_at -= 30
+        self.storage.find_tsigkey.side_effect = exceptions.TsigKeyNotFound
+
+        self.cache.get('key')
+
+        self.assertEqual(0, len(self.cache))
+
+    def test_invalidate(self):
+        key = self.cache.get('key')
+
+        self.cache.invalidate('key')
+
+        self.assertIsNot(key, self.cache.get('key'))
+        self.assertEqual(2, self.storage.find_tsigkey.call_count)
+
+    def test_invalidate_during_load(self):
+        def find_tsigkey(context, criterion):
+            # The key changes while it is read
+            self.cache.invalidate('key')
+            return objects.TsigKey(name='key', secret='c2VjcmV0')
+
+        self.storage.find_tsigkey.side_effect = find_tsigkey
+
+        self.cache.get('key')
+
+        # What was loaded is used, but not kept
+        self.assertEqual(0, len(self.cache))
+
+    def test_evict(self):
+        self.cache.get('key1')
+        self.cache.get('key2')
+        self.cache.get('key1')
+        self.cache.get('key3')
+
+        self.assertEqual(2, len(self.cache))
+        self.cache.get('key1')
+        self.assertEqual(3, self.storage.find_tsigkey.call_count)
+        self.cache.get('key2')
+        self.assertEqual(4, self.storage.find_tsigkey.call_count)
+
+    def test_keyring(self):
+        keyring = dnsutils.TsigKeyring(self.storage, self.cache)
+
+        self.assertEqual(b'secret', keyring.get(dns.name.from_text('key')))
+        self.storage.find_tsigkey.side_effect = exceptions.TsigKeyNotFound
+        self.assertIsNone(keyring.get(dns.name.from_text('other')))
+
+    def test_tsig_info_middleware(self):
+        middleware = dnsutils.TsigInfoMiddleware(
+            None, self.storage, self.cache)
+        request = mock.Mock()
+        request.keyname = dns.name.from_text('key')
+        request.environ = {'context': mock.Mock()}
+
+        self.assertIsNone(middleware.process_request(request))
+        self.assertEqual('POOL', request.environ['tsigkey'].scope)
+        self.assertEqual('7fbb6304-5e74-4691-bd80-cef3cff5eb03',
+                         request.environ['context'].tsigkey_id)
+
+        # The keyring already loaded the key
+        dnsutils.TsigKeyring(self.storage, self.cache).get(request.keyname)
+        self.assertEqual(1, self.storage.find_tsigkey.call_count)
+
+
 class TestDoAfxr(oslotest.base.BaseTestCase):
     def setUp(self):
         super(TestDoAfxr, self).setUp()
@@ -0,0 +1,109 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import gzip
+import os
+
+import fixtures
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+import oslotest.base
+
+from designate import exceptions
+from designate import export_store
+from designate.export_store import impl_filesystem
+
+CONF = cfg.CONF
+
+
+class ExportStoreTest(oslotest.base.BaseTestCase):
+    def test_buffer_chunks(self):
+        chunks = [b'ab', b'cd', b'e', b'fgh', b'i']
+
+        blocks = list(export_store.buffer_chunks(chunks, block_size=4))
+
+        self.assertEqual([b'abcd', b'efgh', b'i'], blocks)
+
+    def test_gzip_chunks(self):
+        chunks = [b'example.com. 3600 IN A 192.0.2.1\n'] * 100
+
+        data = b''.join(export_store.gzip_chunks(chunks))
+
+        self.assertEqual(b''.join(chunks), gzip.decompress(data))
+
+    def test_get_location_driver(self):
+        self.assertEqual(
+            'filesystem',
+            export_store.get_location_driver('filesystem://1.zone.gz'))
+
+
+class FilesystemExportStoreTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(FilesystemExportStoreTest, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+        self.path = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'exports')
+        CONF.set_override('path', self.path, 'export_store:filesystem')
+
+        self.store = impl_filesystem.FilesystemExportStore()
+        self.data = b''.join(b'%d\n' % i for i in range(100000))
+
+    def test_write(self):
+        location = self.store.write('1.zone', iter([self.data[:10],
+                                                    self.data[10:]]))
+
+        self.assertEqual('filesystem://1.zone', location)
+        self.assertEqual(['1.zone'], os.listdir(self.path))
+        self.assertEqual(len(self.data), self.store.get_size(location))
+        self.assertEqual(self.data, b''.join(self.store.read(location)))
+
+    def test_write_failure(self):
+        def chunks():
+            yield self.data
+            raise IOError()
+
+        self.assertRaises(IOError, self.store.write, '1.zone', chunks())
+
+        # Nothing is left behind
+        self.assertEqual([], os.listdir(self.path))
+
+    def test_read_range(self):
+        location = self.store.write('1.zone', [self.data])
+
+        self.assertEqual(
+            self.data[70000:100000],
+            b''.join(self.store.read(location, 70000, 100000)))
+        self.assertEqual(
+            self.data[100:],
+            b''.join(self.store.read(location, 100)))
+
+    def test_read_not_found(self):
+        self.assertRaises(
+            exceptions.ZoneExportNotFound,
+            list, self.store.read('filesystem://1.zone'))
+        self.assertRaises(
+            exceptions.ZoneExportNotFound,
+            self.store.get_size, 'filesystem://1.zone')
+
+    def test_invalid_location(self):
+        self.assertRaises(
+            ValueError, self.store.get_size, 'filesystem://../1.zone')
+        self.assertRaises(
+            ValueError, self.store.get_size, 'swift://1.zone')
+
+    def test_delete(self):
+        location = self.store.write('1.zone', [self.data])
+
+        self.store.delete(location)
+
+        self.assertEqual([], os.listdir(self.path))
+        self.assertRaises(
+            exceptions.ZoneExportNotFound, self.store.delete, location)
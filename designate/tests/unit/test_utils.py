@@ -303,6 +303,42 @@ class TestUtils(oslotest.base.BaseTestCase):
         self.assertIsNone(sort_key)
         self.assertIsNone(sort_dir)
 
+    def test_get_paging_params_cursor(self):
+        context = mock.Mock(hide_counts=False)
+        cursor = utils.encode_cursor(
+            'name', 'example.com.', 'f6663a98-281e-4cea-b0c3-3bc425e086ea')
+        params = {'cursor': cursor, 'sort_key': 'name'}
+
+        marker, limit, sort_key, sort_dir = utils.get_paging_params(
+            context, params, ['created_at', 'id', 'name']
+        )
+
+        self.assertEqual({
+            'sort_key': 'name',
+            'value': 'example.com.',
+            'id': 'f6663a98-281e-4cea-b0c3-3bc425e086ea',
+        }, marker)
+        self.assertEqual('name', sort_key)
+        self.assertTrue(context.hide_counts)
+
+    def test_get_paging_params_empty_cursor(self):
+        context = mock.Mock(hide_counts=False)
+        params = {'cursor': ''}
+
+        marker, limit, sort_key, sort_dir = utils.get_paging_params(
+            context, params, ['created_at', 'id']
+        )
+
+        self.assertIsNone(marker)
+        self.assertTrue(context.hide_counts)
+
+    def test_decode_cursor_invalid(self):
+        self.assertRaises(
+            exceptions.InvalidMarker, utils.decode_cursor, 'invalid')
+        self.assertRaises(
+            exceptions.InvalidMarker, utils.decode_cursor,
+            utils.encode_cursor('name', 'example.com.', 'id')[:-4])
+
     def test_get_paging_params_without_sort_keys(self):
         CONF.set_override('default_limit_v2', 0, 'service:api')
 
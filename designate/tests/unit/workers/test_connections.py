@@ -0,0 +1,177 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import struct
+from unittest import mock
+
+import dns.message
+import dns.query
+import dns.rdatatype
+import dns.rrset
+import eventlet
+from eventlet.green import socket
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+import oslotest.base
+
+from designate.worker import connections
+from designate.worker import utils as wutils
+
+CONF = cfg.CONF
+
+
+class FakeTCPNameserver(object):
+    """Answers SOA queries over TCP, on connections kept open by default"""
+
+    def __init__(self, keep_open=True):
+        self.keep_open = keep_open
+        self.connections = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(10)
+        self.port = self.sock.getsockname()[1]
+        self.thread = eventlet.spawn(self._serve)
+
+    def close(self):
+        self.thread.kill()
+        self.sock.close()
+
+    def _serve(self):
+        pool = eventlet.GreenPool()
+        while True:
+            client, _ = self.sock.accept()
+            self.connections += 1
+            pool.spawn_n(self._serve_connection, client)
+
+    def _recv(self, client, length):
+        buf = b''
+        while len(buf) < length:
+            data = client.recv(length - len(buf))
+            if not data:
+                return None
+            buf += data
+        return buf
+
+    def _serve_connection(self, client):
+        try:
+            while True:
+                length = self._recv(client, 2)
+                if length is None:
+                    return
+                wire = self._recv(client, struct.unpack('!H', length)[0])
+
+                query = dns.message.from_wire(wire)
+                response = dns.message.make_response(query)
+                response.answer.append(dns.rrset.from_text(
+                    query.question[0].name, 3600, 'IN', 'SOA',
+                    'ns1.example.org. example.example.com. 10 3600 600 '
+                    '86400 3600'))
+                wire = response.to_wire()
+                client.sendall(struct.pack('!H', len(wire)) + wire)
+
+                if not self.keep_open:
+                    return
+        finally:
+            client.close()
+
+
+class TCPConnectionPoolTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(TCPConnectionPoolTest, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+
+        self.nameserver = FakeTCPNameserver()
+        self.addCleanup(self.nameserver.close)
+
+        self.pool = connections.TCPConnectionPool(size=2, idle_timeout=10)
+        self.addCleanup(self.pool.close)
+
+    def _query(self, zone_name='example.com.', timeout=2):
+        response = self.pool.query(
+            wutils.prepare_msg(zone_name), '127.0.0.1',
+            port=self.nameserver.port, timeout=timeout)
+        return response.answer[0].to_rdataset()[0].serial
+
+    def test_query(self):
+        for _ in range(3):
+            self.assertEqual(10, self._query())
+
+        self.assertEqual(1, self.nameserver.connections)
+
+    def test_query_concurrent(self):
+        pool = eventlet.GreenPool()
+        serials = list(pool.imap(self._query, ['example.com.'] * 4))
+
+        self.assertEqual([10] * 4, serials)
+        # Only 2 of the connections were kept
+        self.assertEqual(2, len(self.pool._idle[
+            ('127.0.0.1', self.nameserver.port)]))
+
+    def test_query_closed_by_nameserver(self):
+        self.nameserver.keep_open = False
+
+        self.assertEqual(10, self._query())
+        eventlet.sleep(0)
+        self.assertEqual(10, self._query())
+
+        self.assertEqual(2, self.nameserver.connections)
+
+    def test_query_closed_while_idle(self):
+        self.nameserver.keep_open = False
+
+        self.assertEqual(10, self._query())
+        eventlet.sleep(0)
+
+        # The closed connection is dropped rather than sent the query
+        with mock.patch.object(self.pool, '_query',
+                               wraps=self.pool._query) as mock_query:
+            self.assertEqual(10, self._query())
+
+        self.assertEqual(1, mock_query.call_count)
+        self.assertEqual(2, self.nameserver.connections)
+
+    def test_query_idle_timeout(self):
+        self.pool.idle_timeout = 0
+
+        self._query()
+        self._query()
+
+        self.assertEqual(2, self.nameserver.connections)
+
+    def test_query_bad_response(self):
+        with mock.patch.object(dns.message.Message, 'is_response',
+                               return_value=False):
+            self.assertRaises(dns.query.BadResponse, self._query)
+
+        # The connection was not kept
+        self._query()
+        self.assertEqual(2, self.nameserver.connections)
+
+    def test_send_dns_msg(self):
+        CONF.set_override('all_tcp', True, 'service:mdns')
+
+        with mock.patch.object(wutils, 'get_tcp_pool',
+                               return_value=self.pool):
+            for _ in range(2):
+                wutils.dig('example.com.', '127.0.0.1', dns.rdatatype.SOA,
+                           port=self.nameserver.port)
+
+        self.assertEqual(1, self.nameserver.connections)
+
+    def test_send_dns_msg_pool_disabled(self):
+        CONF.set_override('all_tcp', True, 'service:mdns')
+        CONF.set_override('tcp_pool_size', 0, 'service:worker')
+
+        with mock.patch.object(wutils.dns.query, 'tcp') as mock_tcp:
+            wutils.dig('example.com.', '127.0.0.1', dns.rdatatype.SOA)
+
+        mock_tcp.assert_called_once_with(
+            mock.ANY, '127.0.0.1', port=53, timeout=10)
@@ -0,0 +1,135 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from unittest import mock
+
+import dns.exception
+import dns.message
+import dns.rdatatype
+import dns.rrset
+import eventlet
+from eventlet.green import socket
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+import oslotest.base
+
+from designate.worker import poller
+from designate.worker import utils as wutils
+
+CONF = cfg.CONF
+
+
+class FakeNameserver(object):
+    """Answers SOA queries with the serial configured for the zone"""
+
+    def __init__(self, serials, drop=0):
+        self.serials = serials
+        self.drop = drop
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        self.thread = eventlet.spawn(self._serve)
+
+    def close(self):
+        self.thread.kill()
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            wire, addr = self.sock.recvfrom(65535)
+            self.queries += 1
+            if self.drop:
+                self.drop -= 1
+                continue
+
+            query = dns.message.from_wire(wire)
+            response = dns.message.make_response(query)
+            name = query.question[0].name.to_text()
+            response.answer.append(dns.rrset.from_text(
+                name, 3600, 'IN', 'SOA',
+                'ns1.example.org. example.example.com. %d 3600 600 86400 '
+                '3600' % self.serials[name]))
+            self.sock.sendto(response.to_wire(), addr)
+
+
+class SerialPollerTest(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(SerialPollerTest, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+
+        self.nameserver = FakeNameserver(
+            {'example.com.': 10, 'example.net.': 20})
+        self.addCleanup(self.nameserver.close)
+
+        self.poller = poller.SerialPoller(
+            sockets=2, min_timeout=0.05, max_timeout=0.2)
+        self.addCleanup(self.poller.close)
+
+    def _get_serial(self, zone_name, timeout=2):
+        response = self.poller.query(
+            wutils.prepare_msg(zone_name), '127.0.0.1',
+            port=self.nameserver.port, timeout=timeout)
+        return response.answer[0][0].serial
+
+    def test_query(self):
+        self.assertEqual(10, self._get_serial('example.com.'))
+
+        nameserver = self.poller._get_nameserver(
+            '127.0.0.1', self.nameserver.port)
+        self.assertIsNotNone(nameserver.srtt)
+        self.assertEqual({}, nameserver._pending)
+
+    def test_query_concurrent(self):
+        pool = eventlet.GreenPool()
+        zones = ['example.com.', 'example.net.'] * 50
+
+        serials = list(pool.imap(self._get_serial, zones))
+
+        self.assertEqual([10, 20] * 50, serials)
+        self.assertEqual(1, len(self.poller._nameservers))
+
+    def test_query_retransmit(self):
+        self.nameserver.drop = 2
+
+        self.assertEqual(10, self._get_serial('example.com.'))
+        self.assertEqual(3, self.nameserver.queries)
+
+    def test_query_timeout(self):
+        self.nameserver.drop = 100
+
+        self.assertRaises(
+            dns.exception.Timeout, self._get_serial, 'example.com.',
+            timeout=0.3)
+        self.assertGreater(self.nameserver.queries, 1)
+
+    def test_update_timeout(self):
+        nameserver = self.poller._get_nameserver(
+            '127.0.0.1', self.nameserver.port)
+
+        nameserver._update_timeout(0.1)
+        self.assertEqual(0.1, nameserver.srtt)
+        self.assertEqual(0.2, nameserver.timeout)
+
+        # Bounded by the minimum timeout
+        for _ in range(50):
+            nameserver._update_timeout(0.001)
+        self.assertEqual(0.05, nameserver.timeout)
+
+    @mock.patch.object(wutils, 'dig')
+    def test_get_serial(self, mock_dig):
+        CONF.set_override('serial_poller_enabled', True, 'service:worker')
+        wutils._SERIAL_POLLER = self.poller
+        self.addCleanup(setattr, wutils, '_SERIAL_POLLER', None)
+
+        self.assertEqual(20, wutils.get_serial(
+            'example.net.', '127.0.0.1', port=self.nameserver.port))
+        mock_dig.assert_not_called()
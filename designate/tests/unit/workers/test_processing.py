@@ -15,6 +15,9 @@
 # under the License.mport threading
 from unittest import mock
 
+import eventlet
+import futurist
+
 from designate import exceptions
 from designate.tests import TestCase
 from designate.tests import fixtures
@@ -79,3 +82,64 @@ class TestProcessingExecutor(TestCase):
         exe = processing.Executor()
 
         self.assertEqual('func_name', exe.task_name(mock_task))
+
+    def test_executor_from_config(self):
+        self.config(threads=2, executor_queue_size=3,
+                    group='service:worker')
+
+        exe = processing.Executor()
+
+        self.assertIsInstance(exe._executor,
+                              futurist.GreenThreadPoolExecutor)
+        self.assertIsNotNone(exe._slots)
+        self.assertEqual([1], exe.run(lambda: 1))
+
+    def test_execute_nested_tasks_when_full(self):
+        exe = processing.Executor(
+            futurist.GreenThreadPoolExecutor(2), max_pending=1)
+
+        def child():
+            return 1
+
+        def parent():
+            # Waiting on a slot here would never finish
+            return exe.run([child, child])
+
+        self.assertEqual([[1, 1]], exe.run(parent))
+
+    def test_execute_blocks_when_full(self):
+        exe = processing.Executor(
+            futurist.GreenThreadPoolExecutor(2), max_pending=1)
+        running = eventlet.event.Event()
+        finish = eventlet.event.Event()
+
+        def slow_task():
+            running.send()
+            finish.wait()
+            return 1
+
+        first = eventlet.spawn(exe.run, slow_task)
+        running.wait()
+
+        second = eventlet.spawn(exe.run, lambda: 2)
+        eventlet.sleep(0.01)
+
+        # The second run waits for the first task to free its slot
+        self.assertFalse(second.dead)
+
+        finish.send()
+        self.assertEqual([1], first.wait())
+        self.assertEqual([2], second.wait())
+
+    @mock.patch.object(processing, 'metrics')
+    def test_execute_metrics(self, mock_metrics):
+        def t1():
+            return 1
+
+        exe = processing.Executor()
+        exe.run(t1)
+
+        self.assertEqual(
+            ['worker.task.t1.queue_wait', 'worker.task.t1.latency'],
+            [call[0][0] for call in mock_metrics.timing.call_args_list]
+        )
@@ -236,6 +236,61 @@ class TestService(oslotest.base.BaseTestCase):
             [mock_zone_action(), mock_send_notify()]
         )
 
+    def _update_zone(self, serial):
+        return mock.Mock(id='zone-id', action='UPDATE', serial=serial)
+
+    def test_do_zone_action_coalesce_updates(self):
+        processed = []
+
+        def run_zone_action(context, zone):
+            processed.append(zone.serial)
+            if zone.serial == 1:
+                # Updates arriving while serial 1 is being pushed out
+                for serial in (3, 2, 5, 4, 1):
+                    self.assertIsNone(self.service._do_zone_action(
+                        self.context, self._update_zone(serial)))
+            return True
+
+        self.service._run_zone_action = mock.Mock(
+            side_effect=run_zone_action)
+
+        self.assertTrue(
+            self.service._do_zone_action(self.context, self._update_zone(1)))
+
+        # Only the highest queued serial is processed after serial 1
+        self.assertEqual([1, 5], processed)
+        self.assertEqual({}, self.service._zones_in_flight)
+
+    def test_do_zone_action_coalesce_after_failure(self):
+        processed = []
+
+        def run_zone_action(context, zone):
+            processed.append(zone.serial)
+            if zone.serial == 1:
+                self.service._do_zone_action(
+                    self.context, self._update_zone(2))
+                raise Exception('Backend failure')
+            return True
+
+        self.service._run_zone_action = mock.Mock(
+            side_effect=run_zone_action)
+
+        self.assertTrue(
+            self.service._do_zone_action(self.context, self._update_zone(1)))
+
+        self.assertEqual([1, 2], processed)
+        self.assertEqual({}, self.service._zones_in_flight)
+
+    def test_do_zone_action_does_not_coalesce_deletes(self):
+        self.service._run_zone_action = mock.Mock(return_value=True)
+        self.service._zones_in_flight['zone-id'] = service.InFlightZone(1)
+
+        zone = mock.Mock(id='zone-id', action='DELETE', serial=2)
+        self.assertTrue(self.service._do_zone_action(self.context, zone))
+
+        self.service._run_zone_action.assert_called_once_with(
+            self.context, zone)
+
     def test_get_pool(self):
         pool = mock.Mock()
         self.service.load_pool = mock.Mock()
@@ -0,0 +1,65 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from unittest import mock
+
+import eventlet
+from oslo_config import cfg
+from oslo_config import fixture as cfg_fixture
+import oslotest.base
+
+from designate.worker import status
+
+CONF = cfg.CONF
+
+
+class TestStatusUpdater(oslotest.base.BaseTestCase):
+    def setUp(self):
+        super(TestStatusUpdater, self).setUp()
+        self.useFixture(cfg_fixture.Config(CONF))
+        self.updater = status.StatusUpdater(interval=0.01, batch_size=3)
+        self.updater._central_api = mock.Mock()
+
+    def test_flush_after_interval(self):
+        self.updater.add('zone1', 'SUCCESS', 1)
+        self.updater.add('zone2', 'ERROR', 2)
+        self.assertFalse(self.updater.central_api.update_statuses.called)
+
+        eventlet.sleep(0.05)
+
+        self.updater.central_api.update_statuses.assert_called_once_with(
+            mock.ANY, [('zone1', 'SUCCESS', 1), ('zone2', 'ERROR', 2)])
+        self.assertIsNone(self.updater._timer)
+
+    def test_flush_when_full(self):
+        for i in range(4):
+            self.updater.add('zone%d' % i, 'SUCCESS', i)
+
+        self.updater.central_api.update_statuses.assert_called_once_with(
+            mock.ANY, [('zone0', 'SUCCESS', 0), ('zone1', 'SUCCESS', 1),
+                       ('zone2', 'SUCCESS', 2)])
+
+        self.updater.flush()
+        self.updater.central_api.update_statuses.assert_called_with(
+            mock.ANY, [('zone3', 'SUCCESS', 3)])
+
+    def test_flush_empty(self):
+        self.updater.flush()
+
+        self.assertFalse(self.updater.central_api.update_statuses.called)
+
+    def test_flush_rpc_failure(self):
+        self.updater.central_api.update_statuses.side_effect = Exception
+
+        self.updater.add('zone1', 'SUCCESS', 1)
+        self.updater.flush()
+
+        self.assertEqual([], self.updater._updates)
@@ -13,6 +13,7 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.mport threading
+import gzip
 from unittest import mock
 
 import dns.exception
@@ -625,6 +626,20 @@ class TestUpdateStatus(oslotest.base.BaseTestCase):
             self.task.zone.serial,
         )
 
+    @mock.patch.object(zone.wstatus, 'get_status_updater')
+    def test_call_batched(self, mock_get_status_updater):
+        self.task.zone.status = 'SUCCESS'
+        self.task._config = mock.Mock(status_update_interval=1)
+
+        self.task()
+
+        mock_get_status_updater().add.assert_called_with(
+            self.task.zone.id,
+            self.task.zone.status,
+            self.task.zone.serial,
+        )
+        self.assertFalse(self.task.central_api.update_status.called)
+
     def test_call_on_delete_error(self):
         self.task.zone.action = 'DELETE'
         self.task.zone.status = 'ERROR'
@@ -740,3 +755,71 @@ class TestExportZone(oslotest.base.BaseTestCase):
 
         self.task()
         self.assertEqual('ERROR', self.export.status)
+
+    def _async_export(self):
+        self.task.zone = objects.Zone(
+            id='e2bed4dc-9d01-11e4-89d3-123b93f75cba',
+            name='example.com.', ttl=3600)
+        self.task._storage.iter_recordsets_export.return_value = iter([
+            ('www.example.com.', None, 'A', '192.0.2.1'),
+            ('www.example.com.', 300, 'A', '192.0.2.2'),
+        ])
+
+        written = []
+
+        def write(name, chunks):
+            written.append(b''.join(chunks))
+            return 'filesystem://%s' % name
+
+        self.task._export_store = mock.Mock()
+        self.task._export_store.write.side_effect = write
+
+        self.task()
+
+        self.task._storage.iter_recordsets_export.assert_called_once_with(
+            self.context, {'zone_id': self.task.zone.id})
+        return written[0] if written else None
+
+    def test_async_export(self):
+        self.task._synchronous_export = mock.Mock(return_value=False)
+
+        data = self._async_export()
+
+        self.assertEqual('COMPLETE', self.export.status)
+        self.assertEqual('filesystem://1.zone', self.export.location)
+        self.assertEqual(
+            b'$ORIGIN example.com.\n$TTL 3600\n\n'
+            b'www.example.com.  IN A 192.0.2.1\n'
+            b'www.example.com. 300 IN A 192.0.2.2\n\n\n',
+            data)
+
+    def test_async_export_too_large_for_sync(self):
+        self.task._quota.limit_check = mock.Mock(
+            side_effect=exceptions.OverQuota)
+
+        self._async_export()
+
+        self.assertEqual('COMPLETE', self.export.status)
+        self.assertEqual('filesystem://1.zone', self.export.location)
+
+    def test_async_export_compressed(self):
+        self.useFixture(cfg_fixture.Config(CONF))
+        CONF.set_override('compress', True, 'export_store')
+        self.task._synchronous_export = mock.Mock(return_value=False)
+
+        data = self._async_export()
+
+        self.assertEqual('filesystem://1.zone.gz', self.export.location)
+        self.assertTrue(
+            gzip.decompress(data).startswith(b'$ORIGIN example.com.\n'))
+
+    def test_async_export_store_fails(self):
+        self.task._synchronous_export = mock.Mock(return_value=False)
+        self.task._export_store = mock.Mock()
+        self.task._export_store.write.side_effect = IOError
+
+        self.task()
+
+        self.assertEqual('ERROR', self.export.status)
+        self.assertEqual('Zone export could not be stored',
+                         self.export.message)
@@ -13,6 +13,7 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
 import copy
 import functools
 import inspect
@@ -116,6 +117,14 @@ def render_template(template, **template_context):
     return template.render(**template_context)
 
 
+def generate_template(template, **template_context):
+    """Render a template piece by piece, rather than into one string"""
+    if not isinstance(template, Template):
+        template = load_template(template)
+
+    return template.generate(**template_context)
+
+
 def render_template_to_file(template_name, output_path, makedirs=True,
                             **template_context):
     output_folder = os.path.dirname(output_path)
@@ -269,11 +278,43 @@ def split_host_port(string, default_port=53):
     return (host, port)
 
 
+def encode_cursor(sort_key, value, item_id):
+    """
+    Encode the position after an item, in a list sorted by sort_key, as an
+    opaque pagination cursor.
+    """
+    data = jsonutils.dumps([sort_key, value, item_id])
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a pagination cursor created by encode_cursor
+
+    :returns: A dict with the sort_key, value and id of the cursor.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        sort_key, value, item_id = jsonutils.loads(data.decode('utf-8'))
+    except (TypeError, ValueError, UnicodeError):
+        raise exceptions.InvalidMarker(_('Invalid pagination cursor'))
+
+    return {'sort_key': sort_key, 'value': value, 'id': item_id}
+
+
 def get_paging_params(context, params, sort_keys):
     """
     Extract any paging parameters
+
+    If a 'cursor' parameter is present, the marker returned is the decoded
+    cursor, used for keyset pagination, instead of a resource id. Counts
+    are not computed for these requests.
     """
     marker = params.pop('marker', None)
+    cursor = params.pop('cursor', None)
+    if cursor is not None:
+        context.hide_counts = True
+        marker = decode_cursor(cursor) if cursor else None
     limit = params.pop('limit', cfg.CONF['service:api'].default_limit_v2)
     sort_key = params.pop('sort_key', None)
     sort_dir = params.pop('sort_dir', None)
@@ -0,0 +1,168 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import errno
+import os
+import threading
+import time
+
+import dns.exception
+import dns.inet
+import dns.query
+from eventlet.green import socket
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from designate.metrics import metrics
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+
+class TCPConnectionPool(object):
+    """
+    Keep TCP connections to nameservers open between DNS queries, rather
+    than opening a connection per query.
+
+    A connection is used by one query at a time. Up to `tcp_pool_size` idle
+    connections are kept per nameserver, for at most `tcp_pool_idle_timeout`
+    seconds, as nameservers close connections that stay idle for long
+    (RFC 7766 section 6.2.3). Kept connections the nameserver closed are
+    found before they are reused, and a query on a connection closed while
+    it was being sent is retried once on a new connection.
+    """
+
+    def __init__(self, size=None, idle_timeout=None):
+        config = CONF['service:worker']
+        self.size = config.tcp_pool_size if size is None else size
+        self.idle_timeout = (config.tcp_pool_idle_timeout
+                             if idle_timeout is None else idle_timeout)
+
+        self._lock = threading.Lock()
+        self._idle = collections.defaultdict(collections.deque)
+
+    def query(self, message, host, port=53, timeout=10):
+        """
+        Send a query over TCP and wait for its response
+
+        :raises: dns.exception.Timeout if no response arrived in time
+        :raises: dns.query.BadResponse if the response does not match
+        :return: dns.Message of the response
+        """
+        key = (host, port)
+        expiration = time.time() + timeout
+        wire = message.to_wire()
+
+        sock = self._get(key)
+        if sock is not None:
+            metrics.counter('worker.tcp_pool.reuse').increment()
+            try:
+                return self._query(key, sock, message, wire, expiration)
+            except (EOFError, socket.error) as e:
+                LOG.debug('Connection to %(host)s:%(port)d was closed, '
+                          'retrying on a new one: %(error)s',
+                          {'host': host, 'port': port, 'error': e})
+
+        metrics.counter('worker.tcp_pool.connect').increment()
+        sock = self._connect(host, port)
+        return self._query(key, sock, message, wire, expiration)
+
+    def close(self):
+        with self._lock:
+            idle = list(self._idle.values())
+            self._idle.clear()
+
+        for connections in idle:
+            for sock, _ in connections:
+                sock.close()
+
+    def _query(self, key, sock, message, wire, expiration):
+        try:
+            dns.query.send_tcp(sock, wire, expiration)
+            response, _ = dns.query.receive_tcp(
+                sock, expiration, keyring=message.keyring,
+                request_mac=message.mac)
+        except Exception:
+            # Whatever is left of the response would be read by the next
+            # query on the connection.
+            sock.close()
+            raise
+
+        if not message.is_response(response):
+            sock.close()
+            raise dns.query.BadResponse
+
+        self._put(key, sock)
+        return response
+
+    @staticmethod
+    def _connect(host, port):
+        sock = socket.socket(dns.inet.af_for_address(host),
+                             socket.SOCK_STREAM)
+        sock.setblocking(False)
+
+        # The connection completes while the query is sent, like in
+        # dns.query.tcp
+        error = sock.connect_ex((host, port))
+        if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK,
+                         errno.EALREADY):
+            sock.close()
+            raise socket.error(error, os.strerror(error))
+
+        return sock
+
+    def _get(self, key):
+        while True:
+            now = time.time()
+            expired = []
+            sock = None
+
+            with self._lock:
+                connections = self._idle.get(key)
+                # The connections idle for longest are on the left
+                while (connections and
+                       now - connections[0][1] >= self.idle_timeout):
+                    expired.append(connections.popleft()[0])
+                if connections:
+                    sock = connections.pop()[0]
+
+            for expired_sock in expired:
+                expired_sock.close()
+
+            if sock is None or self._is_open(sock):
+                return sock
+
+            # Closed by the nameserver, e.g. after its own idle timeout
+            metrics.counter('worker.tcp_pool.closed').increment()
+            sock.close()
+
+    @staticmethod
+    def _is_open(sock):
+        """
+        Whether the nameserver kept an idle connection open. Nothing is sent
+        on an idle connection, so it only becomes readable once closed.
+        """
+        try:
+            sock.recv(1, socket.MSG_PEEK)
+        except socket.error as e:
+            return e.errno in (errno.EAGAIN, errno.EWOULDBLOCK)
+        # Either the end of the connection, or data nobody asked for
+        return False
+
+    def _put(self, key, sock):
+        with self._lock:
+            connections = self._idle[key]
+            if len(connections) < self.size:
+                connections.append((sock, time.time()))
+                return
+
+        sock.close()
@@ -0,0 +1,206 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import errno
+import random
+import threading
+import time
+
+import dns.exception
+import dns.inet
+import dns.message
+import eventlet
+from eventlet import event
+from eventlet.green import socket
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from designate.metrics import metrics
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+
+class SerialPoller(object):
+    """
+    Send DNS queries for many zones over a small, shared set of UDP sockets
+    per nameserver, rather than a socket per query.
+
+    Replies are matched to outstanding queries by message id. Each query is
+    retransmitted with exponential backoff, starting from a timeout adapted
+    to the round trip times seen from its nameserver, until its deadline.
+    """
+
+    def __init__(self, sockets=None, min_timeout=None, max_timeout=None):
+        config = CONF['service:worker']
+        self.sockets = sockets or config.serial_poller_sockets
+        self.min_timeout = min_timeout or config.serial_poller_min_timeout
+        self.max_timeout = max_timeout or config.serial_poller_max_timeout
+
+        self._lock = threading.Lock()
+        self._nameservers = {}
+
+    def query(self, message, host, port=53, timeout=10):
+        """
+        Send a query and wait for its response
+
+        :raises: dns.exception.Timeout if no response arrived in time
+        :return: dns.Message of the response
+        """
+        return self._get_nameserver(host, port).query(message, timeout)
+
+    def close(self):
+        with self._lock:
+            nameservers = list(self._nameservers.values())
+            self._nameservers.clear()
+
+        for nameserver in nameservers:
+            nameserver.close()
+
+    def _get_nameserver(self, host, port):
+        key = (host, port)
+        with self._lock:
+            nameserver = self._nameservers.get(key)
+            if nameserver is None:
+                nameserver = Nameserver(
+                    host, port, self.sockets, self.min_timeout,
+                    self.max_timeout)
+                self._nameservers[key] = nameserver
+            return nameserver
+
+
+class Nameserver(object):
+    """The sockets, outstanding queries and round trip times of a server"""
+
+    def __init__(self, host, port, sockets, min_timeout, max_timeout):
+        self.host = host
+        self.port = port
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+
+        # Smoothed round trip time and its variation, as used for TCP's
+        # retransmission timer (RFC 6298).
+        self.srtt = None
+        self.rttvar = None
+        self.timeout = min_timeout
+
+        self.closed = False
+        self._pending = {}
+        self._sockets = []
+
+        family = dns.inet.af_for_address(host)
+        for _ in range(sockets):
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+            # A connected socket only receives datagrams from the nameserver
+            sock.connect((host, port))
+            self._sockets.append(sock)
+            eventlet.spawn_n(self._receive, sock)
+
+    def query(self, message, timeout):
+        deadline = time.time() + timeout
+        message.id = self._allocate_id()
+        wire = message.to_wire()
+
+        waiter = event.Event()
+        self._pending[message.id] = (message, waiter)
+        try:
+            attempt_timeout = self.timeout
+            attempt = 0
+            while not waiter.ready():
+                sent_at = time.time()
+                remaining = deadline - sent_at
+                if remaining <= 0:
+                    metrics.counter('worker.poller.timeout').increment()
+                    raise dns.exception.Timeout(timeout=timeout)
+
+                sock = self._sockets[(message.id + attempt) %
+                                     len(self._sockets)]
+                try:
+                    sock.send(wire)
+                except socket.error as e:
+                    LOG.debug('Failed to send query to %(host)s:%(port)d: '
+                              '%(error)s',
+                              {'host': self.host, 'port': self.port,
+                               'error': e})
+
+                metrics.counter('worker.poller.query').increment()
+                if attempt:
+                    metrics.counter('worker.poller.retransmit').increment()
+
+                response = None
+                with eventlet.Timeout(min(attempt_timeout, remaining), False):
+                    response = waiter.wait()
+
+                if response is not None:
+                    rtt = time.time() - sent_at
+                    metrics.timing('worker.poller.rtt', rtt)
+                    # Only unambiguous round trips are sampled, a response
+                    # to a retransmitted query may answer any of its copies.
+                    if not attempt:
+                        self._update_timeout(rtt)
+                    return response
+
+                attempt += 1
+                attempt_timeout = min(attempt_timeout * 2, self.max_timeout)
+
+            # A late response to an earlier copy of the query
+            return waiter.wait()
+        finally:
+            del self._pending[message.id]
+
+    def close(self):
+        self.closed = True
+        for sock in self._sockets:
+            sock.close()
+
+    def _allocate_id(self):
+        while True:
+            message_id = random.randint(0, 65535)
+            if message_id not in self._pending:
+                return message_id
+
+    def _update_timeout(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+        self.timeout = min(
+            max(self.srtt + 4 * self.rttvar, self.min_timeout),
+            self.max_timeout)
+
+    def _receive(self, sock):
+        while not self.closed:
+            try:
+                wire = sock.recv(65535)
+            except (socket.error, EOFError) as e:
+                if self.closed or getattr(e, 'errno', None) == errno.EBADF:
+                    return
+                # e.g. ECONNREFUSED from an ICMP port unreachable, the
+                # query will time out.
+                continue
+
+            try:
+                response = dns.message.from_wire(wire)
+            except dns.exception.DNSException:
+                metrics.counter('worker.poller.bad_response').increment()
+                continue
+
+            pending = self._pending.get(response.id)
+            if pending is None or not pending[0].is_response(response):
+                metrics.counter('worker.poller.unmatched').increment()
+                continue
+
+            message, waiter = pending
+            if not waiter.ready():
+                waiter.send(response)
@@ -13,6 +13,7 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import threading
 import time
 
 import futurist
@@ -20,6 +21,7 @@ from oslo_log import log as logging
 from oslo_config import cfg
 
 from designate import exceptions
+from designate.metrics import metrics
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
@@ -38,6 +40,18 @@ def default_executor():
     return futurist.GreenThreadPoolExecutor(thread_count)
 
 
+def default_queue_size():
+    try:
+        queue_size = CONF['service:worker'].executor_queue_size
+    except Exception:
+        return None
+
+    if not queue_size:
+        return None
+
+    return CONF['service:worker'].threads + queue_size
+
+
 class Executor(object):
     """
     Object to facilitate the running of a task, or a set of tasks on an
@@ -45,9 +59,21 @@ class Executor(object):
     threads
     """
 
-    def __init__(self, executor=None):
+    def __init__(self, executor=None, max_pending=None):
         self._executor = executor or default_executor()
 
+        if max_pending is None and executor is None:
+            max_pending = default_queue_size()
+
+        # Bounds the number of running and queued top level tasks. Tasks
+        # submitted by other tasks are not bounded, they would deadlock
+        # waiting for the slots held by their parents.
+        self._slots = None
+        if max_pending:
+            self._slots = threading.BoundedSemaphore(max_pending)
+
+        self._local = threading.local()
+
     @staticmethod
     def do(task):
         try:
@@ -55,6 +81,10 @@ class Executor(object):
         except exceptions.BadAction as e:
             LOG.warning(e)
 
+    @staticmethod
+    def metric_name(task):
+        return getattr(task, '__name__', None) or task.__class__.__name__
+
     @staticmethod
     def task_name(task):
         if hasattr(task, 'task_name'):
@@ -77,7 +107,8 @@ class Executor(object):
 
         if callable(tasks):
             tasks = [tasks]
-        results = [r for r in self._executor.map(self.do, tasks)]
+        futures = [self._submit(task) for task in tasks]
+        results = [future.result() for future in futures]
 
         end_time = time.time()
         task_time = end_time - start_time
@@ -87,3 +118,38 @@ class Executor(object):
                   {'tasks': task_names, 'time': task_time})
 
         return results
+
+    def _submit(self, task):
+        submitted_at = time.time()
+
+        if self._slots is None or getattr(self._local, 'depth', 0):
+            return self._executor.submit(self._do, task, submitted_at)
+
+        if not self._slots.acquire(blocking=False):
+            # The executor is full, wait for a running task to finish
+            metrics.counter('worker.executor.full').increment()
+            self._slots.acquire()
+
+        try:
+            future = self._executor.submit(self._do, task, submitted_at)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def _do(self, task, submitted_at):
+        name = self.metric_name(task)
+        started_at = time.time()
+        metrics.timing('worker.task.%s.queue_wait' % name,
+                       started_at - submitted_at)
+
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        try:
+            return self.do(task)
+        finally:
+            self._local.depth = depth
+            metrics.timing('worker.task.%s.latency' % name,
+                           time.time() - started_at)
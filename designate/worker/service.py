@@ -13,6 +13,7 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import threading
 import time
 
 from oslo_config import cfg
@@ -26,8 +27,10 @@ from designate import service
 from designate import storage
 from designate.central import rpcapi as central_api
 from designate.context import DesignateContext
+from designate.metrics import metrics
 from designate.worker.tasks import zone as zonetasks
 from designate.worker import processing
+from designate.worker import status as wstatus
 
 
 LOG = logging.getLogger(__name__)
@@ -41,6 +44,16 @@ class AlsoNotifyTask(object):
     pass
 
 
+class InFlightZone(object):
+    """
+    The serial of a zone update being processed, and the newest update for
+    the zone that arrived in the meantime
+    """
+    def __init__(self, serial):
+        self.serial = serial
+        self.pending = None
+
+
 class Service(service.RPCService):
     RPC_API_VERSION = '1.0'
 
@@ -53,6 +66,9 @@ class Service(service.RPCService):
         self._executor = None
         self._pools_map = None
 
+        self._zones_lock = threading.Lock()
+        self._zones_in_flight = {}
+
         super(Service, self).__init__(
             self.service_name, cfg.CONF['service:worker'].topic,
             threads=cfg.CONF['service:worker'].threads,
@@ -140,8 +156,83 @@ class Service(service.RPCService):
 
     def stop(self, graceful=True):
         super(Service, self).stop(graceful)
+        # Send any zone status updates still waiting to be batched
+        wstatus.get_status_updater().flush()
 
     def _do_zone_action(self, context, zone):
+        """
+        Push a zone change out to the pool and poll for it.
+
+        Updates to a zone that arrive while an update of the same zone is
+        in flight are coalesced, only the one with the highest serial is
+        queued and processed once the in flight update finishes. The status
+        reported for that serial covers the records of the serials it
+        superseded, as central applies it to every record up to it.
+        """
+        if zone.action != 'UPDATE':
+            return self._run_zone_action(context, zone)
+
+        with self._zones_lock:
+            in_flight = self._zones_in_flight.get(zone.id)
+            if in_flight is not None:
+                self._queue_zone_update(in_flight, context, zone)
+                return None
+            self._zones_in_flight[zone.id] = InFlightZone(zone.serial)
+
+        while True:
+            try:
+                result = self._run_zone_action(context, zone)
+            except Exception:
+                pending = self._next_zone_update(zone.id)
+                if pending is None:
+                    raise
+                LOG.exception('Failed to update zone %(zone)s serial '
+                              '%(serial)s',
+                              {'zone': zone.name, 'serial': zone.serial})
+            else:
+                pending = self._next_zone_update(zone.id)
+                if pending is None:
+                    return result
+
+            context, zone = pending
+
+    @staticmethod
+    def _queue_zone_update(in_flight, context, zone):
+        if in_flight.pending is not None:
+            queued_serial = in_flight.pending[1].serial
+        else:
+            queued_serial = in_flight.serial
+
+        if zone.serial <= queued_serial:
+            superseded_serial = zone.serial
+        else:
+            if in_flight.pending is not None:
+                superseded_serial = queued_serial
+            else:
+                superseded_serial = None
+            in_flight.pending = (context, zone)
+
+        metrics.counter('worker.zone_update.coalesced').increment()
+        if superseded_serial is not None:
+            metrics.counter('worker.zone_update.superseded').increment()
+            LOG.debug('Update of zone %(zone)s to serial %(serial)s '
+                      'superseded by serial %(newer)s',
+                      {'zone': zone.name, 'serial': superseded_serial,
+                       'newer': max(zone.serial, queued_serial)})
+
+    def _next_zone_update(self, zone_id):
+        """Pop the update queued for a zone, or mark it as done"""
+        with self._zones_lock:
+            in_flight = self._zones_in_flight[zone_id]
+            pending = in_flight.pending
+            if pending is None:
+                del self._zones_in_flight[zone_id]
+            else:
+                in_flight.serial = pending[1].serial
+                in_flight.pending = None
+            return pending
+
+    def _run_zone_action(self, context, zone):
         pool = self.get_pool(zone.pool_id)
         all_tasks = []
         all_tasks.append(zonetasks.ZoneAction(
@@ -0,0 +1,93 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import threading
+
+import eventlet
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from designate.central import rpcapi as central_rpcapi
+from designate.context import DesignateContext
+from designate.metrics import metrics
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+_STATUS_UPDATER = None
+
+
+def get_status_updater():
+    global _STATUS_UPDATER
+    if _STATUS_UPDATER is None:
+        _STATUS_UPDATER = StatusUpdater()
+    return _STATUS_UPDATER
+
+
+class StatusUpdater(object):
+    """
+    Collect zone status updates and send them to central in batches.
+
+    Updates are flushed `status_update_interval` seconds after the first
+    one of a batch was added, or as soon as `status_update_batch_size`
+    updates are waiting.
+    """
+
+    def __init__(self, interval=None, batch_size=None):
+        if interval is None:
+            interval = CONF['service:worker'].status_update_interval
+        if batch_size is None:
+            batch_size = CONF['service:worker'].status_update_batch_size
+
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._central_api = None
+        self._lock = threading.Lock()
+        self._updates = []
+        self._timer = None
+
+    @property
+    def central_api(self):
+        if not self._central_api:
+            self._central_api = central_rpcapi.CentralAPI.get_instance()
+        return self._central_api
+
+    def add(self, zone_id, status, serial):
+        with self._lock:
+            self._updates.append((zone_id, status, serial))
+            full = len(self._updates) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = eventlet.spawn_after(self.interval, self.flush)
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            updates, self._updates = self._updates, []
+            if self._timer is not None:
+                if self._timer is not eventlet.getcurrent():
+                    self._timer.cancel()
+                self._timer = None
+
+        if not updates:
+            return
+
+        LOG.debug('Sending %d zone status updates', len(updates))
+        metrics.counter('worker.status_update.sent').increment(len(updates))
+
+        try:
+            self.central_api.update_statuses(
+                DesignateContext.get_admin_context(), updates)
+        except Exception:
+            LOG.exception('Failed to send %d zone status updates',
+                          len(updates))
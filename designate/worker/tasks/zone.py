@@ -20,9 +20,11 @@ import dns
 from oslo_config import cfg
 from oslo_log import log as logging
 
+from designate.worker import status as wstatus
 from designate.worker import utils as wutils
 from designate.worker.tasks import base
 from designate import exceptions
+from designate import export_store
 from designate import utils
 
 LOG = logging.getLogger(__name__)
@@ -510,6 +512,14 @@ class UpdateStatus(base.Task):
                   {'zone': self.zone.name, 'status': self.zone.status,
                    'action': self.zone.action})
 
+        if self.config.status_update_interval:
+            wstatus.get_status_updater().add(
+                self.zone.id,
+                self.zone.status,
+                self.zone.serial
+            )
+            return
+
         self.central_api.update_status(
             self.context,
             self.zone.id,
@@ -536,6 +546,12 @@ class RecoverShard(base.Task):
         self.end_shard = end
 
     def _get_zones(self):
+        # Recovery runs periodically, zones a lagging read replica misses are
+        # picked up by a later run.
+        with self.storage.replica_reads():
+            return self._find_zones()
+
+    def _find_zones(self):
         criterion = {
             'shard': "BETWEEN %s,%s" % (self.begin_shard, self.end_shard),
             'status': 'ERROR'
@@ -591,24 +607,21 @@ class ExportZone(base.Task):
         self.zone = zone
         self.export = export
 
+        self._export_store = None
+
+    @property
+    def export_store(self):
+        if not self._export_store and CONF['export_store'].driver:
+            self._export_store = export_store.get_export_store()
+        return self._export_store
+
     def _synchronous_export(self):
         return CONF['service:worker'].export_synchronous
 
     def _determine_export_method(self, context, export, size):
-        # NOTE(timsim):
-        # The logic here with swift will work like this:
-        #     cfg.CONF.export_swift_enabled:
-        #         An export will land in their swift container, even if it's
-        #         small, but the link that comes back will be the synchronous
-        #         link (unless export_syncronous is False, in which case it
-        #         will behave like the next option)
-        #     cfg.CONF.export_swift_preffered:
-        #         The link that the user gets back will always be the swift
-        #         container, and status of the export resource will depend
-        #         on the Swift process.
-        #     If the export is too large for synchronous, or synchronous is not
-        #     enabled and swift is not enabled, it will fall through to ERROR
-        # swift = False
+        # Exports small enough are rendered by the API when they are
+        # downloaded. Others are written to the export store, if one is
+        # configured, and downloaded from it.
         synchronous = self._synchronous_export()
 
         if synchronous:
@@ -617,22 +630,49 @@ class ExportZone(base.Task):
                         context, context.project_id, api_export_size=size)
             except exceptions.OverQuota:
                 LOG.debug('Zone Export too large to perform synchronously')
-                export.status = 'ERROR'
-                export.message = 'Zone is too large to export'
+            else:
+                export.location = \
+                    'designate://v2/zones/tasks/exports/%(eid)s/export' % \
+                    {'eid': export.id}
+
+                export.status = 'COMPLETE'
                 return export
 
-            export.location = \
-                'designate://v2/zones/tasks/exports/%(eid)s/export' % \
-                {'eid': export.id}
+        if self.export_store is not None:
+            return self._asynchronous_export(context, export)
 
-            export.status = 'COMPLETE'
+        export.status = 'ERROR'
+        if synchronous:
+            export.message = 'Zone is too large to export'
         else:
             LOG.debug('No method found to export zone')
-            export.status = 'ERROR'
             export.message = 'No suitable method for export'
 
         return export
 
+    def _asynchronous_export(self, context, export):
+        name = '%s.zone' % export.id
+        rows = self.storage.iter_recordsets_export(
+            context, {'zone_id': self.zone.id})
+        chunks = (chunk.encode('utf-8') for chunk in utils.generate_template(
+            'export-zone.jinja2', zone=self.zone, recordsets=rows))
+
+        if CONF['export_store'].compress:
+            name += '.gz'
+            chunks = export_store.gzip_chunks(chunks)
+
+        try:
+            export.location = self.export_store.write(
+                name, export_store.buffer_chunks(chunks))
+        except Exception:
+            LOG.exception('Failed to write zone export %s', export.id)
+            export.status = 'ERROR'
+            export.message = 'Zone export could not be stored'
+            return export
+
+        export.status = 'COMPLETE'
+        return export
+
     def __call__(self):
         criterion = {'zone_id': self.zone.id}
         count = self.storage.count_recordsets(self.context, criterion)
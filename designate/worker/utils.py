@@ -12,16 +12,36 @@
 # distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
-# under the License.mport threading
+# under the License.
 import dns
 import dns.exception
 import dns.query
 from oslo_config import cfg
 from oslo_log import log as logging
 
+from designate.worker import connections
+from designate.worker import poller
+
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
+_SERIAL_POLLER = None
+_TCP_POOL = None
+
+
+def get_serial_poller():
+    global _SERIAL_POLLER
+    if _SERIAL_POLLER is None:
+        _SERIAL_POLLER = poller.SerialPoller()
+    return _SERIAL_POLLER
+
+
+def get_tcp_pool():
+    global _TCP_POOL
+    if _TCP_POOL is None:
+        _TCP_POOL = connections.TCPConnectionPool()
+    return _TCP_POOL
+
 
 def prepare_msg(zone_name, rdatatype=dns.rdatatype.SOA, notify=False):
     """
@@ -63,6 +83,9 @@ def send_dns_msg(dns_message, host, port=53):
     if not CONF['service:mdns'].all_tcp:
         return dns.query.udp(
             dns_message, host, port=port, timeout=10)
+    elif CONF['service:worker'].tcp_pool_size:
+        return get_tcp_pool().query(
+            dns_message, host, port=port, timeout=10)
     else:
         return dns.query.tcp(
             dns_message, host, port=port, timeout=10)
@@ -73,7 +96,12 @@ def get_serial(zone_name, host, port=53):
     Possibly raises dns.exception.Timeout or dns.query.BadResponse.
     Possibly returns 0 if, e.g., the answer section is empty.
     """
-    resp = dig(zone_name, host, dns.rdatatype.SOA, port=port)
+    if (CONF['service:worker'].serial_poller_enabled and
+            not CONF['service:mdns'].all_tcp):
+        query = prepare_msg(zone_name, rdatatype=dns.rdatatype.SOA)
+        resp = get_serial_poller().query(query, host, port=port, timeout=10)
+    else:
+        resp = dig(zone_name, host, dns.rdatatype.SOA, port=port)
     if not resp.answer:
         return 0
     rdataset = resp.answer[0].to_rdataset()